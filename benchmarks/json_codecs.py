@@ -0,0 +1,135 @@
+"""
+JSON decoding benchmark for the payloads the app parses.
+
+Compares every installed codec on:
+- whole response bodies (thread histories, thread lists), parsed from bytes
+- stream events, parsed one SSE data line at a time
+For the standard library it also measures the old path of decoding to str
+first, which is what response.json() and line.decode("utf-8") did.
+
+Payloads are read from a directory of recordings: *.json files are response
+bodies and *.sse / *.jsonl files are captured streams. Without --payloads, a
+synthetic thread history shaped like the API's is used.
+
+Usage:
+    python benchmarks/json_codecs.py [--payloads DIR] [--repeat 20] [--json]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def _codecs() -> dict:
+    """Decoders to compare, each taking bytes"""
+    codecs = {
+        "json (decode to str)": lambda data: json.loads(data.decode("utf-8")),
+        "json": json.loads,
+    }
+    try:
+        import orjson
+        codecs["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        codecs["msgspec"] = msgspec.json.decode
+    except ImportError:
+        pass
+    return codecs
+
+
+def synthetic_history(checkpoints: int = 40, names: int = 20) -> bytes:
+    """A thread history in the API's shape: checkpoints repeating a growing state"""
+    context = {
+        "brand_promise": "Simplify financial decisions for growing businesses. " * 4,
+        "brand_values": [f"Value {i}: " + "clarity and trust " * 6 for i in range(8)],
+        "target_audience": "Small and medium business owners " * 10,
+    }
+    history = []
+    for step in range(checkpoints):
+        shown = names * step // checkpoints
+        values = {
+            "brand_context": context,
+            "generated_names": [{"brand_name": f"Name{i}", "naming_category": "Descriptive",
+                                 "brand_personality_alignment": "Confident and warm " * 5, "rank": i}
+                                for i in range(shown)],
+            "evaluation_results": {f"Name{i}": {"overall_score": 7.5, "shortlist_status": "Yes",
+                                                "evaluation_comments": "Strong fit " * 20}
+                                   for i in range(shown)},
+        }
+        history.append({"values": values, "next": ["evaluator"], "created_at": "2024-01-01T00:00:00Z",
+                        "checkpoint": {"checkpoint_id": f"c{step}"}, "metadata": {"step": step}})
+    return json.dumps(history).encode("utf-8")
+
+
+def load_payloads(directory: Path):
+    """Response bodies and stream data lines from a recordings directory"""
+    bodies, lines = [], []
+    for path in sorted(directory.iterdir()):
+        if path.suffix == ".json":
+            bodies.append(path.read_bytes())
+        elif path.suffix in (".sse", ".jsonl"):
+            for line in path.read_bytes().splitlines():
+                if line.startswith(b"data:"):
+                    line = line[5:].strip()
+                if line.startswith((b"{", b"[")):
+                    lines.append(line)
+    return bodies, lines
+
+
+def measure(decode, payloads, repeat: int) -> float:
+    """Median seconds to decode every payload once"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for payload in payloads:
+            decode(payload)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--payloads", type=Path, help="Directory of recorded *.json, *.sse and *.jsonl payloads")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes per codec")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.payloads:
+        bodies, lines = load_payloads(args.payloads)
+    else:
+        bodies = [synthetic_history()]
+        lines = [json.dumps({"evaluator": item["values"]}).encode("utf-8") for item in json.loads(bodies[0])]
+
+    from mae_frontend import jsoncodec
+
+    results = {"app_codec": jsoncodec.CODEC, "bodies": {}, "stream_lines": {}}
+    sizes = {"bodies": sum(map(len, bodies)), "stream_lines": sum(map(len, lines))}
+    for name, decode in _codecs().items():
+        for kind, payloads in (("bodies", bodies), ("stream_lines", lines)):
+            if payloads:
+                seconds = measure(decode, payloads, args.repeat)
+                results[kind][name] = {"ms": seconds * 1000, "mb_per_s": sizes[kind] / seconds / 1e6}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"App codec: {results['app_codec']}")
+    for kind, label in (("bodies", "Response bodies"), ("stream_lines", "Stream lines")):
+        if not results[kind]:
+            continue
+        count = len(bodies if kind == "bodies" else lines)
+        print(f"\n{label} ({count} payloads, {sizes[kind] / 1e6:.2f} MB, median of {args.repeat})")
+        for name, timing in results[kind].items():
+            print(f"  {name:<24} {timing['ms']:8.2f} ms {timing['mb_per_s']:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Startup benchmark for the Streamlit app.
+
+Measures, each in a fresh interpreter:
+- import time of the app's heavy dependencies
+- cold first paint: loading and running app.py once with Streamlit's AppTest
+- warm reruns: the fixed cost paid on every click after the first paint
+
+The API URL points at a closed local port by default so API calls fail fast
+and the numbers reflect the frontend itself.
+
+Usage:
+    python benchmarks/startup.py [--repeat 5] [--reruns 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "src" / "mae_frontend" / "app.py"
+
+# Modules whose import cost matters for cold start
+IMPORT_TARGETS = [
+    "streamlit",
+    "requests",
+    "pandas",
+    "altair",
+    "langchain_core",
+    "mae_frontend.api",
+    "mae_frontend.runs",
+    "mae_frontend.reports",
+]
+
+# Modules that should only load when a view that needs them is rendered
+LAZY_MODULES = [
+    "pandas",
+    "altair",
+    "langchain",
+    "langchain_core",
+    "mae_frontend.async_loader",
+    "mae_frontend.blob_store",
+    "mae_frontend.checkpoint_sync",
+    "mae_frontend.conditional",
+    "mae_frontend.history_extract",
+    "mae_frontend.prompt_cache",
+    "mae_frontend.reports",
+    "mae_frontend.timeline",
+]
+
+BENCH_ENV = {
+    "LANGGRAPH_STUDIO_URL": "http://127.0.0.1:9",
+    "LANGGRAPH_ASSISTANT_ID": "benchmark",
+    "LANGGRAPH_API_KEY": "benchmark",
+    "LOG_FILE": "",
+}
+
+_IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+_APP_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+first_paint = time.perf_counter() - started
+loaded = [m for m in {lazy!r} if m in sys.modules]
+reruns = []
+for _ in range({reruns}):
+    started = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - started)
+print(json.dumps({{"first_paint": first_paint, "reruns": reruns, "loaded": loaded,
+                  "exceptions": len(at.exception)}}))
+"""
+
+
+def _run_python(code: str) -> str:
+    env = dict(os.environ)
+    for key, value in BENCH_ENV.items():
+        env.setdefault(key, value)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_imports(repeat: int) -> dict:
+    """Median cold import time per module, in seconds (None if not installed)"""
+    results = {}
+    for module in IMPORT_TARGETS:
+        try:
+            samples = [float(_run_python(_IMPORT_SNIPPET.format(module=module))) for _ in range(repeat)]
+            results[module] = statistics.median(samples)
+        except RuntimeError:
+            results[module] = None
+    return results
+
+
+def measure_app(repeat: int, reruns: int) -> dict:
+    """Cold first paint and warm rerun times for app.py"""
+    first_paints, rerun_times, loaded, exceptions = [], [], set(), 0
+    for _ in range(repeat):
+        sample = json.loads(_run_python(
+            _APP_SNIPPET.format(app=str(APP_PATH), lazy=LAZY_MODULES, reruns=reruns)
+        ))
+        first_paints.append(sample["first_paint"])
+        rerun_times.extend(sample["reruns"])
+        loaded.update(sample["loaded"])
+        exceptions += sample["exceptions"]
+    return {
+        "first_paint": statistics.median(first_paints),
+        "rerun": statistics.median(rerun_times) if rerun_times else None,
+        "heavy_modules_loaded": sorted(loaded),
+        "exceptions": exceptions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per measurement")
+    parser.add_argument("--reruns", type=int, default=5, help="Warm reruns per interpreter")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {"imports": measure_imports(args.repeat), "app": measure_app(args.repeat, args.reruns)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("Import time (median of fresh interpreters)")
+    for module, seconds in results["imports"].items():
+        print(f"  {module:<24} {'not installed' if seconds is None else f'{seconds * 1000:8.1f} ms'}")
+    app = results["app"]
+    print("\napp.py")
+    print(f"  {'first paint':<24} {app['first_paint'] * 1000:8.1f} ms")
+    if app["rerun"] is not None:
+        print(f"  {'warm rerun':<24} {app['rerun'] * 1000:8.1f} ms")
+    print(f"  {'heavy modules loaded':<24} {', '.join(app['heavy_modules_loaded']) or 'none'}")
+    if app["exceptions"]:
+        print(f"  {'script exceptions':<24} {app['exceptions']}")
+
+
+if __name__ == "__main__":
+    main()
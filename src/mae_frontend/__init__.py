@@ -0,0 +1,5 @@
+"""MAE Brand Namer frontend"""
+from mae_frontend.config import load_env
+
+# Submodules read their settings at import time, so .env must be in the environment first
+load_env()
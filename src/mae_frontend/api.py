@@ -0,0 +1,364 @@
+"""
+Shared HTTP helper for LangGraph API calls.
+
+Every call goes through api_request so latency, status and payload size are
+recorded per endpoint. Endpoint labels are path templates (e.g.
+"/threads/{thread_id}/history") to keep metric cardinality bounded. Read
+requests can opt into retries and circuit breaking (see resilience).
+
+Responses, including run streams, are requested compressed with every
+encoding urllib3 can decode here: gzip and deflate always, br with brotli
+installed, zstd with zstandard installed. Bodies are decompressed
+incrementally as they are read, and bytes before and after decompression are
+counted per endpoint.
+
+Requests made inside a CancelScope (see request_scope) can be aborted from
+another thread: cancelling the scope closes every response it is reading, so
+the blocked call fails at once with RequestCancelled.
+
+Configuration (environment):
+    API_CONNECT_TIMEOUT   Connect timeout in seconds (default 10)
+    API_READ_TIMEOUT      Read timeout for requests that do not set their own (default 60)
+    API_POOL_SIZE         Keep-alive connections per API host (default 32)
+    API_COMPRESSION       Ask for compressed responses (default true)
+"""
+import contextlib
+import contextvars
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import Callable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError, SSLError
+from urllib3.util.request import ACCEPT_ENCODING as SUPPORTED_ENCODINGS
+
+from mae_frontend.metrics import API_BODY_BYTES, API_LATENCY, API_REQUESTS, API_RESPONSE_BYTES, API_WIRE_BYTES
+from mae_frontend.ratelimit import throttle_api
+from mae_frontend.resilience import send_with_retries
+
+try:
+    import brotli
+except ImportError:  # optional; br is then decoded by urllib3 if at all
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional; zstd is then decoded by urllib3 if at all
+    zstandard = None
+
+# Errors raised by the incremental decoders for corrupt bodies
+DECODE_ERRORS = (zlib.error,) + ((brotli.error,) if brotli else ()) + ((zstandard.ZstdError,) if zstandard else ())
+
+# Timeouts (seconds) for requests that do not set their own
+CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "60"))
+
+# Keep-alive connections per host, shared by every session and loader thread
+POOL_SIZE = int(os.getenv("API_POOL_SIZE", "32"))
+
+API_COMPRESSION = os.getenv("API_COMPRESSION", "true").strip().lower() in ("1", "true", "yes", "on")
+
+# urllib3 lists only the encodings it can decode with the packages installed
+ACCEPT_ENCODING = ", ".join(SUPPORTED_ENCODINGS.split(",")) if API_COMPRESSION else "identity"
+
+# Read size for streamed bodies; chunked responses still yield each chunk as it arrives
+STREAM_CHUNK_SIZE = 8 * 1024
+
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE))
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE))
+_session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+
+class RequestCancelled(requests.RequestException):
+    """Raised for a request made or read after its CancelScope was cancelled"""
+
+
+class CancelScope:
+    """The responses in flight for a group of requests, so they can be aborted together from another thread"""
+
+    def __init__(self):
+        self.cancelled = False
+        self._responses = set()
+        self._lock = threading.Lock()
+
+    def track(self, response: requests.Response):
+        """Close response if the scope is cancelled while it is open (RequestCancelled if it already is)"""
+        with self._lock:
+            if not self.cancelled:
+                self._responses.add(response)
+                return
+        response.close()
+        raise RequestCancelled("Request cancelled")
+
+    def discard(self, response: requests.Response):
+        with self._lock:
+            self._responses.discard(response)
+
+    def cancel(self):
+        """Cancel the scope, aborting its open responses so blocked reads fail"""
+        with self._lock:
+            self.cancelled = True
+            responses, self._responses = self._responses, set()
+        for response in responses:
+            _abort(response)
+
+
+def _abort(response: requests.Response):
+    """Close a response that another thread may be blocked reading"""
+    # Closing a socket does not wake a thread blocked in recv on it; shutting it down does.
+    # urllib3 keeps it on the connection, or only in the body's file object once the
+    # server said it will close the connection.
+    raw = getattr(response, "raw", None)
+    sock = getattr(getattr(raw, "_connection", None), "sock", None)
+    if sock is None:
+        body_file = getattr(getattr(raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(body_file, "raw", None), "_sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    try:
+        response.close()
+    except Exception:
+        pass
+
+
+_current_scope: contextvars.ContextVar[Optional[CancelScope]] = contextvars.ContextVar("api_cancel_scope", default=None)
+
+
+@contextlib.contextmanager
+def request_scope(scope: CancelScope):
+    """Make requests sent in this context (thread or contextvars context) cancellable through scope"""
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def request_cancelled() -> bool:
+    """Whether the requests of the current context have been cancelled (their results are incomplete)"""
+    scope = _current_scope.get()
+    return scope is not None and scope.cancelled
+
+
+def api_headers(api_key: str, **extra) -> dict:
+    """Build the standard headers for LangGraph API requests"""
+    headers = {"X-Api-Key": api_key, "Content-Type": "application/json"}
+    headers.update(extra)
+    return headers
+
+
+def _wire_bytes(response: requests.Response) -> Optional[int]:
+    """Bytes read from the network for this response so far (compressed size), if known"""
+    raw = getattr(response, "raw", None)
+    if getattr(raw, "chunked", False):
+        # urllib3 does not count chunked bodies read through it: tell() stays at 0
+        return None
+    try:
+        return int(raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def record_transfer(response: requests.Response, endpoint: str, body_bytes: int):
+    """Count a response's bytes on the wire and after decompression"""
+    encoding = (response.headers.get("Content-Encoding") or "identity").lower()
+    wire = _wire_bytes(response)
+    if wire is None and encoding == "identity":
+        wire = body_bytes
+    if wire is not None:
+        API_WIRE_BYTES.labels(endpoint=endpoint, encoding=encoding).inc(wire)
+    API_BODY_BYTES.labels(endpoint=endpoint, encoding=encoding).inc(body_bytes)
+
+
+class _DeflateDecoder:
+    """Incremental deflate decoder that also accepts the raw (headerless) deflate some servers send"""
+
+    def __init__(self):
+        # 32 + MAX_WBITS accepts both gzip and zlib headers
+        self._decoder = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        # Input kept until the first output shows the header was accepted
+        self._seen: Optional[bytes] = b""
+
+    def __call__(self, data: bytes) -> bytes:
+        if self._seen is None:
+            return self._decoder.decompress(data)
+        self._seen += data
+        try:
+            decoded = self._decoder.decompress(data)
+        except zlib.error:
+            # No zlib header: start over on everything so far as raw deflate
+            self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            data, self._seen = self._seen, None
+            return self._decoder.decompress(data)
+        if decoded:
+            self._seen = None
+        return decoded
+
+
+def _decompressor(encoding: str) -> Optional[Callable[[bytes], bytes]]:
+    """Incremental decoder for a Content-Encoding (None for identity); LookupError if unsupported"""
+    if encoding == "identity":
+        return None
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    if encoding in ("gzip", "x-gzip"):
+        # 32 + MAX_WBITS accepts both gzip and zlib headers
+        return zlib.decompressobj(32 + zlib.MAX_WBITS).decompress
+    if encoding == "br" and brotli is not None:
+        return brotli.Decompressor().process
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj().decompress
+    raise LookupError(encoding)
+
+
+def iter_body(response: requests.Response, endpoint: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a streamed body decompressed chunk by chunk, counting its bytes when done"""
+    encoding = (response.headers.get("Content-Encoding") or "identity").lower()
+    raw = getattr(response, "raw", None)
+    body_bytes = 0
+    try:
+        # urllib3 does not count the wire bytes of chunked bodies (e.g. event streams), so
+        # those are read undecoded, one transfer chunk at a time, and decompressed here
+        decode = _decompressor(encoding) if getattr(raw, "chunked", False) else False
+    except LookupError:
+        decode = False
+    if decode is False:
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                body_bytes += len(chunk)
+                yield chunk
+        finally:
+            record_transfer(response, endpoint, body_bytes)
+        return
+
+    wire_bytes = 0
+    try:
+        # Translate errors the way response.iter_content does, so callers see requests exceptions
+        try:
+            for chunk in raw.read_chunked(decode_content=False):
+                wire_bytes += len(chunk)
+                if decode is not None:
+                    chunk = decode(chunk)
+                if chunk:
+                    body_bytes += len(chunk)
+                    yield chunk
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        except SSLError as e:
+            raise requests.exceptions.SSLError(e)
+        except DECODE_ERRORS as e:
+            raise requests.exceptions.ContentDecodingError(e)
+    finally:
+        API_WIRE_BYTES.labels(endpoint=endpoint, encoding=encoding).inc(wire_bytes)
+        API_BODY_BYTES.labels(endpoint=endpoint, encoding=encoding).inc(body_bytes)
+
+
+def iter_lines(response: requests.Response, endpoint: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield the lines of a streamed body (e.g. server-sent events) as they arrive.
+
+    Like response.iter_lines, but decompressed data is split as it comes in and
+    transfer sizes are recorded for the endpoint.
+    """
+    pending = None
+    after_cr = False
+    for chunk in iter_body(response, endpoint, chunk_size):
+        if after_cr and chunk.startswith(b"\n"):
+            # The \r\n was split between chunks; the \r already ended the line
+            chunk = chunk[1:]
+            after_cr = False
+        if not chunk:
+            continue
+        after_cr = chunk.endswith(b"\r")
+        if pending is not None:
+            chunk = pending + chunk
+        lines = chunk.splitlines()
+        # The last line continues in the next chunk unless the chunk ended with a line break
+        pending = lines.pop() if lines and chunk[-1:] not in (b"\n", b"\r") else None
+        yield from lines
+    if pending is not None:
+        yield pending
+
+
+def _send(method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+    """Send a single request and record metrics for it"""
+    scope = _current_scope.get()
+    if scope is not None and scope.cancelled:
+        raise RequestCancelled("Request cancelled")
+    throttle_api()
+    started = time.perf_counter()
+    status = "error"
+    stream = kwargs.pop("stream", False)
+    try:
+        # Bodies are always read through iter_body, so chunked ones have their wire bytes counted too
+        response = _session.request(method, url, stream=True, **kwargs)
+        status = str(response.status_code)
+        if scope is not None:
+            # Streamed responses stay tracked until the scope is dropped; closing twice is harmless
+            scope.track(response)
+
+        # Streaming bodies are counted by the stream processor as they arrive
+        if stream:
+            content_length = response.headers.get("Content-Length", "")
+            if content_length.isdigit():
+                API_RESPONSE_BYTES.labels(endpoint=endpoint).observe(int(content_length))
+        else:
+            try:
+                response._content = b"".join(iter_body(response, endpoint))
+            except Exception as e:
+                if scope is not None and scope.cancelled:
+                    raise RequestCancelled("Request cancelled while reading the response") from e
+                raise
+            finally:
+                response._content_consumed = True
+                response.close()
+                if scope is not None:
+                    scope.discard(response)
+            if scope is not None and scope.cancelled:
+                # Closed mid-body without an error: the content is truncated
+                raise RequestCancelled("Request cancelled while reading the response")
+            API_RESPONSE_BYTES.labels(endpoint=endpoint).observe(len(response._content))
+        return response
+    finally:
+        API_REQUESTS.labels(endpoint=endpoint, method=method, status=status).inc()
+        API_LATENCY.labels(endpoint=endpoint, method=method).observe(time.perf_counter() - started)
+
+
+def api_request(method: str, url: str, endpoint: str, retry: bool = False, serve_stale: bool = False,
+                **kwargs) -> requests.Response:
+    """
+    Send a request and record metrics for it.
+
+    Args:
+        method: HTTP method
+        url: Full request URL
+        endpoint: Path template used as the metric label
+        retry: Retry transient failures with backoff behind the endpoint's circuit
+            breaker (only for requests that are safe to repeat)
+        serve_stale: With retry, return the last good response while the circuit is open
+        **kwargs: Passed through to requests.request (timeout defaults to
+            (API_CONNECT_TIMEOUT, API_READ_TIMEOUT))
+
+    Returns:
+        The requests response
+    """
+    method = method.upper()
+    # requests waits forever without a timeout, so every call gets the defaults
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    if not retry:
+        return _send(method, url, endpoint, **kwargs)
+
+    return send_with_retries(
+        lambda m, u, **kw: _send(m, u, endpoint, **kw),
+        method, url, endpoint, serve_stale=serve_stale, **kwargs
+    )
@@ -1,18 +1,60 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import requests
-import json
 import time
-import logging
-import os
-import pandas as pd
-import altair as alt
-from langchain.callbacks.streamlit import StreamlitCallbackHandler
-from langchain.callbacks.base import BaseCallbackHandler
-from dotenv import load_dotenv
-
-# Force clear all Streamlit caches on startup
-st.cache_data.clear()
-st.cache_resource.clear()
+import functools
+from mae_frontend.api import api_request, iter_lines, request_cancelled
+from mae_frontend.favorites import Favorites, FavoritesStore, is_anonymous_user_id, new_user_id
+from mae_frontend import jsoncodec
+from mae_frontend.profiler import RerunProfiler, profiling_requested
+from mae_frontend.config import get_config, reload_config
+from mae_frontend.logging_config import configure_logging, set_log_context
+from mae_frontend.metrics import (
+    ACTIVE_SESSIONS,
+    CACHE_REQUESTS,
+    RUN_DURATION,
+    STREAM_BYTES,
+    STREAM_EVENT_RATE,
+    STREAM_EVENTS,
+    STREAM_FIRST_EVENT,
+    STREAM_FIRST_NAME,
+    SessionTracker,
+    start_metrics_file_writer,
+    start_metrics_server,
+)
+from mae_frontend.runs import (
+    AVAILABLE_STREAM_MODES,
+    MAX_STREAM_RECONNECTS,
+    RUN_NOT_FOUND,
+    RUN_POLL_INTERVAL,
+    RUN_STATUS_MAX_FAILURES,
+    RUN_TIMEOUT,
+    TERMINAL_RUN_STATUSES,
+    ActiveRunRegistry,
+    RunTimeoutError,
+    cancel_run,
+    configured_stream_modes,
+    get_run_status,
+    get_thread_state,
+    iter_with_timeouts,
+    join_run_stream,
+    parse_stream_modes,
+    run_id_from_response,
+    stream_timeout,
+)
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Modules used by a single view or feature (history, reports, comparison, streaming, the run
+# queue, ...) are imported by the functions that use them, so a rerun only loads what it renders
+
+# Section timings for this rerun (PROFILE=true or ?profile=1); a no-op otherwise
+profiler = RerunProfiler(enabled=profiling_requested(st.query_params.get("profile")))
+profiler.enter("config")
+
+# Configuration is loaded once per process, before logging so its secrets can be redacted
+config = get_config()
+logger = configure_logging()
 
 # Page configuration
 st.set_page_config(
@@ -25,57 +67,96 @@ st.set_page_config(
     }
 )
 
-# API configuration - Read environment variables fresh each time
-def get_fresh_api_url():
-    """Get a fresh API URL from environment, bypassing any caching"""
-    # Load from .env file if present
-    load_dotenv(override=True)  # Reload environment variables
-    
-    url = os.getenv("LANGGRAPH_STUDIO_URL", None)  # Get fresh value
-    print(f"DEBUG: Fresh API URL read from env: {url}")
-    if not url:
-        st.error("Please set the LANGGRAPH_STUDIO_URL environment variable")
-        st.stop()
-    return url
-
-API_URL = get_fresh_api_url()
-print(f"DEBUG: Using API_URL: {API_URL}")
-
-ASSISTANT_ID = os.getenv("LANGGRAPH_ASSISTANT_ID")
-API_KEY = os.getenv("LANGGRAPH_API_KEY")
+# API configuration (see reload_app_config to pick up .env changes without a restart)
+API_URL = config.api_url
+ASSISTANT_ID = config.assistant_id
+API_KEY = config.api_key
 
 # Check if required environment variables are set
-if not API_URL:
-    st.error("Please set the LANGGRAPH_STUDIO_URL environment variable")
-    st.stop()
-if not ASSISTANT_ID:
-    st.error("Please set the LANGGRAPH_ASSISTANT_ID environment variable")
-    st.stop()
-if not API_KEY:
-    st.error("Please set the LANGGRAPH_API_KEY environment variable")
+for missing_var in config.missing():
+    st.error(f"Please set the {missing_var} environment variable")
     st.stop()
 
-print(f"DEBUG: Final API_URL being used: {API_URL}")  # Debug the final value
+def reload_app_config():
+    """Re-read .env; cached API data is keyed by API URL and key, so a new backend or key starts with a cold cache"""
+    reload_config()
+    logger.info("Configuration reloaded")
 
-# Add file-based debug logging
-logging.basicConfig(
-    filename="debug_output.txt",
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    filemode="w"  # Overwrite the file on each run
-)
+@st.cache_resource
+def get_favorites_store():
+    """Process-wide handle on the favorites database"""
+    return FavoritesStore()
+
+def signed_in_user():
+    """The signed-in account if Streamlit auth is configured, else None"""
+    try:
+        if st.user.is_logged_in:
+            return st.user.get("email") or st.user.get("sub")
+    except Exception:
+        pass
+    return None
+
+# Users without an account are identified by a random ID in this cookie, never in the page URL
+USER_COOKIE = "mae_user"
+USER_COOKIE_MAX_AGE = 365 * 24 * 3600
+
+def _remember_user_cookie(user_id):
+    """Store an anonymous user's ID in a cookie on the app's origin, read back by the next session"""
+    components.html(
+        f"<script>window.parent.document.cookie = '{USER_COOKIE}={user_id}; Max-Age={USER_COOKIE_MAX_AGE}; "
+        f"Path=/; SameSite=Strict';</script>",
+        height=0,
+    )
+
+def get_user_id():
+    """
+    Identify the user: the signed-in account if auth is configured, else a random ID kept in a
+    browser cookie, so favorites stay with this browser and never travel in a shared link.
+    """
+    user = signed_in_user()
+    if user:
+        return user
+    user_id = st.context.cookies.get(USER_COOKIE)
+    if not is_anonymous_user_id(user_id):
+        user_id = new_user_id()
+        _remember_user_cookie(user_id)
+    # Links from before the cookie carry the ID in ?user=; move its favorites here so the link stops working
+    link_user_id = st.query_params.get("user")
+    if link_user_id is not None:
+        del st.query_params["user"]
+        if is_anonymous_user_id(link_user_id) and link_user_id != user_id:
+            get_favorites_store().reassign(link_user_id, user_id)
+    return user_id
 
 # Initialize session state
 if "history" not in st.session_state:
     st.session_state.history = []
+if "user_id" not in st.session_state:
+    # Resolved once per session: a new anonymous ID only reaches the cookie after this run
+    st.session_state.user_id = get_user_id()
 if "favorite_names" not in st.session_state:
-    st.session_state.favorite_names = []
+    st.session_state.favorite_names = Favorites(get_favorites_store(), st.session_state.user_id)
 if "current_thread_id" not in st.session_state:
     st.session_state.current_thread_id = None
 if "generation_complete" not in st.session_state:
     st.session_state.generation_complete = False
 if "langsmith_trace_ids" not in st.session_state:
     st.session_state.langsmith_trace_ids = set()
+if "stream_modes" not in st.session_state:
+    st.session_state.stream_modes = configured_stream_modes()
+if "active_run" not in st.session_state:
+    st.session_state.active_run = None
+    
+    # A page reload loses session state, so pick a running generation back up
+    # from the URL
+    if "run" in st.query_params and "/" in st.query_params["run"]:
+        resume_thread_id, resume_run_id = st.query_params["run"].split("/", 1)
+        st.session_state.active_run = {
+            "thread_id": resume_thread_id,
+            "run_id": resume_run_id,
+            "history_index": None,
+            "started_at": time.time()
+        }
 
 # Initialize session state for industry selection
 if "industry_selection" not in st.session_state:
@@ -135,161 +216,720 @@ INDUSTRY_HIERARCHY = {
     }
 }
 
+# Failed fetches return an empty value; keep those only briefly so they are retried soon
+EMPTY_RESULT_TTL = 10
+
+def api_cache_key(cache_name, args=(), kwargs=None):
+    """
+    Key of a cached API call: also the name of the blob store ref of its result.
+
+    Deployments sharing a cache only share entries if they use the same API URL and key
+    (cache_key hashes its parts, so the key itself is never stored).
+    """
+    from mae_frontend.cache_backends import cache_key
+    
+    return cache_key(cache_name, API_URL, API_KEY, args, kwargs or {})
+
+def metered_cache_data(cache_name, ttl, blobs=False):
+    """
+    Cache an API fetcher's JSON result in the shared cache backend (see CACHE_BACKEND),
+    counting hits and misses in the metrics registry.
+
+    With blobs=True the result itself goes to the compressed, deduplicated blob store
+    under a ref named by its cache key, and the cache backend only holds its root hash.
+    If the blob store fails the result is returned uncached.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            from mae_frontend.cache_backends import get_backend
+            if blobs:
+                from mae_frontend import blob_store
+            
+            backend = get_backend()
+            key = api_cache_key(cache_name, args, kwargs)
+            cached = backend.get(key)
+            if cached is not None:
+                if blobs:
+                    result = blob_store.guarded("get", lambda: blob_store.get_blob_store().get(cached.decode("ascii")))
+                else:
+                    result = jsoncodec.loads(cached)
+                if result is not None:
+                    CACHE_REQUESTS.labels(cache=cache_name, result="hit").inc()
+                    return result
+            CACHE_REQUESTS.labels(cache=cache_name, result="miss").inc()
+            result = func(*args, **kwargs)
+            if request_cancelled():
+                # The page load was cancelled mid-fetch, so the result is incomplete
+                return result
+            entry_ttl = ttl if result else min(ttl, EMPTY_RESULT_TTL)
+            if blobs:
+                root = blob_store.guarded("put", lambda: blob_store.get_blob_store().put(result))
+                if root is not None:
+                    blob_store.guarded("set_ref", lambda: blob_store.get_blob_store().set_ref(key, root))
+                    backend.set(key, root.encode("ascii"), entry_ttl)
+            else:
+                backend.set(key, jsoncodec.dumps(result), entry_ttl)
+            return result
+        
+        def clear():
+            from mae_frontend.cache_backends import get_backend
+            
+            get_backend().delete_prefix(f"{cache_name}:")
+        
+        wrapper.clear = clear
+        return wrapper
+    return decorator
+
 # Cached API functions
-@st.cache_data(ttl=3600)
+@metered_cache_data("assistants", ttl=3600)
 def fetch_assistants():
     """Fetch available assistants from the API"""
     headers = {"X-Api-Key": API_KEY, "Content-Type": "application/json"}
     try:
-        response = requests.post(
+        response = api_request(
+            "POST",
             f"{API_URL}/assistants/search",
+            "/assistants/search",
             headers=headers,
-            json={"graph_id": "brand_naming"}
+            json={"graph_id": "brand_naming"},
+            retry=True,
+            serve_stale=True
         )
         response.raise_for_status()
-        return response.json()
+        return jsoncodec.response_json(response)
     except Exception as e:
         st.error(f"Error fetching assistants: {str(e)}")
         return []
 
-@st.cache_data(ttl=60)
+def _post_history(thread_id, payload, stream=False):
+    """POST to a thread's history endpoint, raising for anything but HTTP 200"""
+    headers = {"X-Api-Key": API_KEY, "Content-Type": "application/json"}
+    response = api_request(
+        "POST",
+        f"{API_URL}/threads/{thread_id}/history",
+        "/threads/{thread_id}/history",
+        headers=headers,
+        json=payload,
+        retry=True,
+        serve_stale=not stream,
+        stream=stream
+    )
+    if response.status_code != 200:
+        logger.warning("Error fetching thread history for %s: HTTP %s - %.200s", thread_id, response.status_code, response.text)
+        raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+    return response
+
+def _fetch_full_history(thread_id):
+    """Download a thread's whole history, extracted down to the report's keys"""
+    # Extraction happens while downloading when ijson is installed (see history_extract).
+    # A streamed body can only be read once, so the stale-response fallback needs the buffered path.
+    from mae_frontend.history_extract import STREAMING, read_history
+    
+    logger.debug("Fetching full thread history for %s", thread_id)
+    return read_history(_post_history(thread_id, {}, stream=STREAMING))
+
+def _fetch_history_page(thread_id, limit, before):
+    """Fetch up to limit raw checkpoints, newest first, older than before (if given)"""
+    payload = {"limit": limit}
+    if before:
+        payload["before"] = before
+    return jsoncodec.response_json(_post_history(thread_id, payload))
+
+def _stored_history(thread_id):
+    """The history last stored for a thread, kept in the blob store long after its cache entry expires"""
+    from mae_frontend import blob_store
+    
+    key = api_cache_key("thread_history", (thread_id,))
+    return blob_store.guarded("get_value", lambda: blob_store.get_blob_store().get_value(key))
+
+@st.cache_resource
+def get_checkpoint_sync():
+    """Process-wide record of the newest checkpoint seen per thread"""
+    from mae_frontend.checkpoint_sync import CheckpointSync
+    
+    return CheckpointSync(_fetch_full_history, _fetch_history_page, load_stored=_stored_history)
+
+@metered_cache_data("thread_history", ttl=60, blobs=True)
 def get_thread_history(thread_id: str):
-    """Get the history of a thread"""
+    """Get the history of a thread, downloading only checkpoints added since the last fetch"""
     if not thread_id:
-        print("DEBUG: No thread_id provided to get_thread_history")
+        logger.debug("No thread_id provided to get_thread_history")
         return []
         
-    headers = {"X-Api-Key": API_KEY, "Content-Type": "application/json"}
     try:
-        print(f"DEBUG: Fetching thread history for {thread_id}")
-        response = requests.post(
-            f"{API_URL}/threads/{thread_id}/history",
-            headers=headers,
-            json={}  # Send empty JSON payload for POST request
-        )
-        
-        # Check if the response was successful
-        if response.status_code == 200:
-            history_data = response.json()
-            print(f"DEBUG: Successfully fetched thread history. Data type: {type(history_data)}")
-            return history_data
-        else:
-            print(f"DEBUG: Error fetching thread history: HTTP {response.status_code} - {response.text}")
-            st.error(f"Error fetching thread history: HTTP {response.status_code}")
-            return []
+        history_data = get_checkpoint_sync().sync(thread_id)
+        logger.debug("Synced thread history for %s (%d checkpoints kept)", thread_id, len(history_data))
+        return history_data
             
     except Exception as e:
-        print(f"DEBUG: Exception in get_thread_history: {str(e)}")
+        logger.exception("Exception in get_thread_history")
         st.error(f"Error fetching thread history: {str(e)}")
         return []
 
-@st.cache_data(ttl=60)
+@metered_cache_data("thread_details", ttl=60)
 def get_thread_details(thread_id: str):
     """Get detailed information about a thread"""
+    from mae_frontend.conditional import conditional_get
+    
     if not thread_id:
-        print("DEBUG: No thread_id provided to get_thread_details")
+        logger.debug("No thread_id provided to get_thread_details")
         return None
         
     headers = {"X-Api-Key": API_KEY, "Content-Type": "application/json"}
     try:
-        print(f"DEBUG: Fetching thread details for {thread_id}")
-        response = requests.get(
+        logger.debug("Fetching thread details for %s", thread_id)
+        fetched = conditional_get(
             f"{API_URL}/threads/{thread_id}",
-            headers=headers
+            "/threads/{thread_id}",
+            headers=headers,
+            serve_stale=True
         )
         
         # Check if the response was successful
-        if response.status_code == 200:
-            thread_data = response.json()
-            print(f"DEBUG: Successfully fetched thread details. Data keys: {list(thread_data.keys()) if isinstance(thread_data, dict) else 'Not a dict'}")
-            return thread_data
+        if fetched.status_code == 200:
+            logger.debug("Fetched thread details for %s (revalidated: %s)", thread_id, fetched.revalidated)
+            return fetched.value
         else:
-            print(f"DEBUG: Error fetching thread details: HTTP {response.status_code} - {response.text}")
-            st.error(f"Error fetching thread details: HTTP {response.status_code}")
+            logger.warning("Error fetching thread details for %s: HTTP %s - %.200s", thread_id, fetched.status_code, fetched.response.text)
+            st.error(f"Error fetching thread details: HTTP {fetched.status_code}")
             return None
             
     except Exception as e:
-        print(f"DEBUG: Exception in get_thread_details: {str(e)}")
+        logger.exception("Exception in get_thread_details")
         st.error(f"Error fetching thread details: {str(e)}")
         return None
 
-@st.cache_data(ttl=60)
+@metered_cache_data("thread_runs", ttl=60)
 def get_thread_runs(thread_id: str):
     """Get all runs for a thread"""
+    from mae_frontend.conditional import conditional_get
+    
     if not thread_id:
-        print("DEBUG: No thread_id provided to get_thread_runs")
+        logger.debug("No thread_id provided to get_thread_runs")
         return None
         
     headers = {"X-Api-Key": API_KEY, "Content-Type": "application/json"}
     try:
-        print(f"DEBUG: Fetching thread runs for {thread_id}")
-        response = requests.get(
+        logger.debug("Fetching thread runs for %s", thread_id)
+        fetched = conditional_get(
             f"{API_URL}/threads/{thread_id}/runs",
-            headers=headers
+            "/threads/{thread_id}/runs",
+            headers=headers,
+            serve_stale=True
         )
         
         # Check if the response was successful
-        if response.status_code == 200:
-            runs_data = response.json()
-            print(f"DEBUG: Successfully fetched thread runs. Found {len(runs_data) if isinstance(runs_data, list) else '0'} runs.")
+        if fetched.status_code == 200:
+            runs_data = fetched.value
+            logger.debug("Fetched %d runs for thread %s", len(runs_data) if isinstance(runs_data, list) else 0, thread_id)
             return runs_data
         else:
-            print(f"DEBUG: Error fetching thread runs: HTTP {response.status_code} - {response.text}")
-            st.error(f"Error fetching thread runs: HTTP {response.status_code}")
+            logger.warning("Error fetching thread runs for %s: HTTP %s - %.200s", thread_id, fetched.status_code, fetched.response.text)
+            st.error(f"Error fetching thread runs: HTTP {fetched.status_code}")
             return None
             
     except Exception as e:
-        print(f"DEBUG: Exception in get_thread_runs: {str(e)}")
+        logger.exception("Exception in get_thread_runs")
         st.error(f"Error fetching thread runs: {str(e)}")
         return None
 
-@st.cache_data(ttl=60)
+@metered_cache_data("run_details", ttl=60)
 def get_run_details(thread_id: str, run_id: str):
     """Get detailed information about a specific run"""
+    from mae_frontend.conditional import conditional_get
+    
     headers = {"X-Api-Key": API_KEY, "Content-Type": "application/json"}
     try:
-        response = requests.get(
+        # A finished run never changes again, so its last copy is reused without a request
+        fetched = conditional_get(
             f"{API_URL}/threads/{thread_id}/runs/{run_id}",
-            headers=headers
+            "/threads/{thread_id}/runs/{run_id}",
+            headers=headers,
+            settled=lambda run: isinstance(run, dict) and run.get("status") in TERMINAL_RUN_STATUSES,
+            serve_stale=True
         )
-        response.raise_for_status()
-        return response.json()
+        if fetched.status_code != 200:
+            fetched.response.raise_for_status()
+        return fetched.value
     except Exception as e:
         st.error(f"Error fetching run details: {str(e)}")
         return None
 
-@st.cache_data(ttl=300)
+@metered_cache_data("threads", ttl=300)
 def fetch_all_threads():
     """Fetch all threads from the LangGraph API"""
     headers = {"X-Api-Key": API_KEY, "Content-Type": "application/json"}
     try:
-        # Debug logging
-        print(f"DEBUG: API_URL at fetch time: {API_URL}")
         request_url = f"{API_URL}/threads/search"
-        print(f"DEBUG: Full request URL: {request_url}")
-        print(f"DEBUG: Headers: {headers}")
+        logger.debug("Searching threads at %s", request_url)
         
         # Use the threads/search endpoint to get all threads
-        response = requests.post(
+        response = api_request(
+            "POST",
             request_url,
+            "/threads/search",
             headers=headers,
             json={
                 "limit": 50,  # Fetch up to 50 threads
                 "order": "desc",  # Most recent first
                 "order_by": "created_at"
-            }
+            },
+            retry=True,
+            serve_stale=True
         )
-        # Debug logging
-        print(f"DEBUG: Response status: {response.status_code}")
-        print(f"DEBUG: Request URL after response: {response.url}")  # Show final URL after any redirects
-        print(f"DEBUG: Response text: {response.text[:200]}...")  # First 200 chars
+        logger.debug("Thread search returned HTTP %s from %s", response.status_code, response.url)
+        if getattr(response, "stale", False):
+            logger.warning("Thread search is unavailable; serving the last good result")
         
         response.raise_for_status()
-        return response.json()
+        return jsoncodec.response_json(response)
     except Exception as e:
+        logger.exception("Error fetching threads")
         st.error(f"Error fetching threads: {str(e)}")
         return []
 
+def get_session_id():
+    """Return the ID of the current browser session"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "no-session"
+
+def _is_session_active(session_id):
+    """Check whether a browser session is still connected"""
+    return Runtime.exists() and Runtime.instance().is_active_session(session_id)
+
+def _cancel_registered_run(thread_id, run_id):
+    """Cancel a run from the registry, against the configuration current at the time (it may have been reloaded)"""
+    current = get_config()
+    return cancel_run(current.api_url, current.api_key, thread_id, run_id)
+
+@st.cache_resource
+def get_run_registry():
+    """Process-wide registry of streaming runs, with a reaper for abandoned sessions"""
+    registry = ActiveRunRegistry(_cancel_registered_run)
+    registry.start_reaper(_is_session_active)
+    return registry
+
+@st.cache_resource
+def get_prompt_cache():
+    """Process-wide cache of finished runs keyed by brief, shared by all sessions"""
+    from mae_frontend.prompt_cache import PromptResultCache
+    
+    return PromptResultCache()
+
+def remember_prompt_result(prompt, thread_id, generated_names):
+    """Record a finished run so the same brief can reuse it"""
+    from mae_frontend.prompt_cache import PROMPT_CACHE_ENABLED, prompt_cache_key
+    
+    if PROMPT_CACHE_ENABLED and prompt and thread_id and generated_names:
+        get_prompt_cache().put(prompt_cache_key(prompt, ASSISTANT_ID), thread_id, len(generated_names))
+
+def _load_timeline(thread_id):
+    from mae_frontend import blob_store
+    
+    return blob_store.guarded("get_value", lambda: blob_store.get_blob_store().get_value(api_cache_key("timeline", (thread_id,))))
+
+def _save_timeline(thread_id, data):
+    from mae_frontend import blob_store
+    
+    root = blob_store.guarded("put", lambda: blob_store.get_blob_store().put(data))
+    if root is not None:
+        blob_store.guarded("set_ref", lambda: blob_store.get_blob_store().set_ref(api_cache_key("timeline", (thread_id,)), root))
+
+@st.cache_resource
+def get_timeline_store():
+    """Process-wide node timelines by thread, kept across reloads and resumed streams and saved in the blob store"""
+    from mae_frontend.timeline import TimelineStore
+    
+    return TimelineStore(load=_load_timeline, save=_save_timeline)
+
+@st.cache_resource
+def get_name_index():
+    """Process-wide index of every generated name, for near-duplicate warnings"""
+    from mae_frontend.name_index import NameIndex
+    
+    return NameIndex()
+
+# Favorites are private to their user, so they are indexed per session rather than in the shared index
+FAVORITES_SOURCE = "favorites"
+
+def get_favorites_index():
+    """This session's favorites as a name index, kept in step by add_to_favorites/remove_from_favorites"""
+    if "favorites_index" not in st.session_state:
+        from mae_frontend.name_index import NameIndex
+        
+        index = NameIndex()
+        index.add_many(st.session_state.favorite_names, FAVORITES_SOURCE)
+        st.session_state.favorites_index = index
+    return st.session_state.favorites_index
+
+def _name_text(name):
+    if isinstance(name, dict):
+        return name.get("brand_name") or name.get("name") or ""
+    return str(name) if name else ""
+
+def index_generated_names(thread_id, generated_names):
+    """Add a finished run's names to the near-duplicate index"""
+    if thread_id and generated_names:
+        get_name_index().add_many((_name_text(name) for name in generated_names), thread_id)
+
+def index_past_generations():
+    """
+    Index names from the recent threads returned by thread search, once per session.
+    
+    Called when a view starts rendering, never while a run streams; runs that finish
+    later are indexed as they complete.
+    """
+    from mae_frontend.results_store import find_value_in_data
+    
+    if st.session_state.get("past_generations_indexed"):
+        return
+    st.session_state.past_generations_indexed = True
+    for thread in fetch_all_threads() or []:
+        generated_names = find_value_in_data(thread.get("values"), ["generated_names"])
+        if isinstance(generated_names, list):
+            index_generated_names(thread.get("thread_id"), generated_names)
+
+def _describe_source(source):
+    return "your favorites" if source == FAVORITES_SOURCE else f"generation {source[:8]}..."
+
+def render_similar_names(name, thread_id=None):
+    """Warn when a name looks or sounds like one generated before in another thread or the favorites"""
+    from mae_frontend.name_index import closest_matches
+    
+    thread_id = thread_id or st.session_state.get("current_thread_id")
+    matches = closest_matches(
+        get_name_index().find_similar(name, exclude_source=thread_id, limit=3)
+        + get_favorites_index().find_similar(name, limit=3),
+        limit=3
+    )
+    for match in matches:
+        if match.reason == "exact":
+            detail = "same name"
+        elif match.reason == "spelling":
+            detail = f"{match.distance} edit{'s' if match.distance > 1 else ''} apart"
+        else:
+            detail = "sounds alike"
+        sources = ", ".join(_describe_source(source) for source in match.sources[:2])
+        st.caption(f"⚠️ Similar to **{match.name}** ({detail}) in {sources}")
+
+def _choose_cached_result(choice):
+    """Button callback for the reuse/force-fresh choice"""
+    hit = st.session_state.pop("prompt_cache_hit", None)
+    if choice == "reuse":
+        st.session_state.reuse_cached_result = hit
+    else:
+        st.session_state.force_fresh_run = True
+
+def _format_age(seconds):
+    if seconds < 3600:
+        return f"{max(1, int(seconds // 60))} min"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h"
+    return f"{int(seconds // 86400)} d"
+
+def render_prompt_cache_choice(container):
+    """Offer to reuse the earlier result of an identical brief or run it again"""
+    hit = st.session_state.get("prompt_cache_hit")
+    if not hit:
+        return
+    with container:
+        st.info(
+            f"♻️ This brief was already generated {_format_age(time.time() - hit['created_at'])} ago "
+            f"({hit['name_count']} names). Reuse that result or start a fresh run?"
+        )
+        cols = st.columns(2)
+        with cols[0]:
+            st.button("Reuse Previous Result", key="reuse_cached_result_btn", on_click=_choose_cached_result,
+                      args=("reuse",), use_container_width=True)
+        with cols[1]:
+            st.button("Force Fresh Run", key="force_fresh_run_btn", on_click=_choose_cached_result,
+                      args=("fresh",), use_container_width=True)
+
+def load_cached_result(hit, results_container, status_container):
+    """Show the finished result of an earlier run of the same brief instead of starting a new one"""
+    thread_id = hit["thread_id"]
+    values = get_thread_state(API_URL, API_KEY, thread_id)
+    if not values:
+        get_prompt_cache().invalidate(hit["key"])
+        status_container.warning("The previous result is no longer available. Generate again for a fresh run.")
+        return
+    
+    st.session_state.latest_data = {}
+    processed_data = process_raw_stream_json(values)
+    display_structured_results(processed_data, results_container)
+    generated_names = processed_data.get("generated_names", [])
+    st.session_state.history.append({
+        "prompt": hit["prompt"],
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "status": "completed",
+        "results": None,
+        "thread_id": thread_id,
+        "generated_names": generated_names,
+        "evaluations": processed_data.get("evaluation_results", {}),
+        "reused": True
+    })
+    st.session_state.current_thread_id = thread_id
+    st.session_state.generation_complete = True
+    status_container.success(f"Reused the result generated {_format_age(time.time() - hit['created_at'])} ago.")
+
+@st.cache_resource
+def get_run_admission():
+    """Process-wide admission queue that paces generation runs per user and globally"""
+    from mae_frontend.ratelimit import RunAdmission
+    
+    return RunAdmission(active_runs=get_run_registry().active_count)
+
+def leave_run_queue():
+    """Give up a queued generation"""
+    st.session_state.pop("run_queued", None)
+    st.session_state.pop("force_fresh_run", None)
+    get_run_admission().withdraw(get_session_id())
+
+def wait_for_run_slot(status_container, force_fresh=False):
+    """
+    Ask for a generation slot, showing this session's place in the queue.
+
+    Returns True once admitted and False if the session gave up waiting. While it is
+    still queued the script reruns after a few seconds to ask again, so waiting never
+    holds the script thread.
+    """
+    from mae_frontend.ratelimit import ADMITTED, EXPIRED
+    
+    queue_message = status_container.empty()
+    
+    def _show_position(position, eta):
+        wait_text = f"about {eta:.0f}s" if eta < 3600 else "a while"
+        queue_message.info(
+            f"⏳ Queued for a generation slot: you are #{position} in the queue ({wait_text})."
+        )
+    
+    outcome = get_run_admission().wait(get_session_id(), _show_position, user_id=st.session_state.user_id)
+    if outcome == ADMITTED or outcome == EXPIRED:
+        queue_message.empty()
+        return outcome == ADMITTED
+    
+    # Still queued: ask again on the next rerun, keeping a "Force Fresh Run" request
+    st.session_state.run_queued = True
+    if force_fresh:
+        st.session_state.force_fresh_run = True
+    status_container.button("Leave Queue", key="leave_run_queue", on_click=leave_run_queue)
+    st.rerun()
+
+@st.cache_resource
+def get_page_loader():
+    """Process-wide concurrent data loader; loads from closed sessions are cancelled"""
+    from mae_frontend.async_loader import PageLoader
+    
+    loader = PageLoader()
+    loader.start_reaper(_is_session_active)
+    return loader
+
+def load_page_data(calls):
+    """Run independent data fetches for this render concurrently, scoped to the current session"""
+    return get_page_loader().gather(calls, scope=get_session_id())
+
+@st.cache_resource
+def get_result_store():
+    """Process-wide cache of normalized per-thread results for the comparison view"""
+    from mae_frontend.results_store import ResultStore
+    
+    return ResultStore()
+
+def load_comparison_rows(thread_ids, created_by_thread):
+    """Normalized rows for the selected threads; only threads not already cached are fetched"""
+    from mae_frontend.results_store import normalize_thread_results
+    
+    def _load_missing(missing):
+        histories = load_page_data({
+            thread_id: functools.partial(get_thread_history, thread_id) for thread_id in missing
+        })
+        return {
+            thread_id: normalize_thread_results(thread_id, history, created_by_thread.get(thread_id))
+            for thread_id, history in histories.items()
+            # Failed fetches return an empty list; leave them uncached so they are retried
+            if history
+        }
+    
+    return get_result_store().rows_for(thread_ids, _load_missing)
+
+@st.cache_resource
+def init_metrics():
+    """Start the metrics exporters once per process and return the session tracker"""
+    tracker = SessionTracker(_is_session_active)
+    ACTIVE_SESSIONS.set_function(tracker.count)
+    
+    if config.metrics_port:
+        try:
+            start_metrics_server(config.metrics_port, config.metrics_addr)
+        except OSError as e:
+            # Another worker on this host already serves the port
+            logger.info("Metrics endpoint not started on port %s: %s", config.metrics_port, e)
+    
+    if config.metrics_file:
+        start_metrics_file_writer(config.metrics_file, config.metrics_file_interval)
+    
+    return tracker
+
+def remember_run_id(run_id):
+    """Record the run ID of the active run once the stream reports it"""
+    active_run = st.session_state.active_run
+    if active_run and not active_run.get("run_id"):
+        active_run["run_id"] = run_id
+        get_run_registry().update(get_session_id(), run_id=run_id)
+        st.query_params["run"] = f"{active_run['thread_id']}/{run_id}"
+
+def clear_active_run():
+    """Forget the active run once it has finished, failed or been cancelled"""
+    st.session_state.active_run = None
+    if "run" in st.query_params:
+        del st.query_params["run"]
+
+def cancel_active_run():
+    """Cancel the current session's run (used as the Stop button callback)"""
+    active_run = st.session_state.active_run
+    if not active_run:
+        return
+    
+    # The registry also closes the stream; fall back to the session copy if the
+    # registry entry is gone (e.g. the stream already ended)
+    if not get_run_registry().cancel(get_session_id()):
+        cancel_run(API_URL, API_KEY, active_run.get("thread_id"), active_run.get("run_id"))
+    
+    RUN_DURATION.labels(outcome="cancelled").observe(time.time() - active_run.get("started_at", time.time()))
+    history_index = active_run.get("history_index")
+    if history_index is not None and history_index < len(st.session_state.history):
+        st.session_state.history[history_index]["status"] = "cancelled"
+    clear_active_run()
+    st.toast("Generation cancelled")
+
+def merge_final_state(thread_id, container):
+    """
+    Merge the run's final state into the streamed results.
+    
+    Only needed when the stream did not include "values" snapshots, in which
+    case the final state is fetched once instead of after every node.
+    
+    Returns:
+        Tuple of (generated_names, evaluations) from the merged results
+    """
+    processed_data = st.session_state.get("latest_data", {})
+    if "values" not in parse_stream_modes(st.session_state.stream_modes):
+        values = get_thread_state(API_URL, API_KEY, thread_id)
+        if values:
+            processed_data = process_raw_stream_json(values)
+            display_structured_results(processed_data, container)
+    return processed_data.get("generated_names", []), processed_data.get("evaluation_results", {})
+
+def _finish_resumed_run(status, generated_names=None, evaluations=None, error=None):
+    """Record the outcome of a resumed run in the session history"""
+    active_run = st.session_state.active_run or {}
+    RUN_DURATION.labels(outcome=status).observe(time.time() - active_run.get("started_at", time.time()))
+    history_index = active_run.get("history_index")
+    if history_index is not None and history_index < len(st.session_state.history):
+        entry = st.session_state.history[history_index]
+        entry["status"] = status
+        if generated_names is not None:
+            entry["generated_names"] = generated_names
+            entry["evaluations"] = evaluations or {}
+            if status == "completed":
+                remember_prompt_result(entry.get("prompt"), entry.get("thread_id"), generated_names)
+                index_generated_names(entry.get("thread_id"), generated_names)
+        if error:
+            entry["error"] = error
+    st.session_state.generation_complete = status == "completed"
+    clear_active_run()
+
+def resume_active_run(results_container, status_container, progress_bar):
+    """
+    Rejoin a run whose stream was lost to a network blip, rerun or page reload.
+    
+    Rejoins the run's event stream from the last seen event ID; if the stream
+    cannot be rejoined, polls the run until it finishes and loads the final
+    state instead.
+    """
+    active_run = st.session_state.active_run
+    thread_id = active_run.get("thread_id")
+    run_id = active_run.get("run_id")
+    if not thread_id or not run_id:
+        # Without a run ID there is nothing to rejoin
+        clear_active_run()
+        return
+    
+    session_id = get_session_id()
+    run_registry = get_run_registry()
+    status_container.info("Reconnecting to the running generation...")
+    
+    join_response = None
+    try:
+        join_response = join_run_stream(
+            API_URL, API_KEY, thread_id, run_id, active_run.get("last_event_id")
+        )
+        run_registry.register(session_id, thread_id, run_id, join_response, active_run.get("started_at"))
+        generated_names, evaluations = process_stream_data(
+            iter_with_timeouts(iter_lines(join_response, "/threads/{thread_id}/runs/{run_id}/stream"), active_run.get("started_at", time.time())),
+            results_container,
+            status_container,
+            progress_bar,
+            resume=True
+        )
+        run_registry.unregister(session_id)
+        generated_names, evaluations = merge_final_state(thread_id, results_container)
+        _finish_resumed_run("completed", generated_names, evaluations)
+    except RunTimeoutError as e:
+        if not run_registry.cancel(session_id):
+            cancel_run(API_URL, API_KEY, thread_id, run_id)
+        _finish_resumed_run("timed out", error=str(e))
+        st.error(f"Generation stopped: {str(e)}")
+        return
+    except requests.HTTPError:
+        # The stream can't be rejoined (e.g. the run was not resumable), so wait
+        # for the run to finish and load its final state instead
+        run_registry.register(session_id, thread_id, run_id, None, active_run.get("started_at"))
+        status_message = status_container.empty()
+        deadline = active_run.get("started_at", time.time()) + RUN_TIMEOUT
+        status = get_run_status(API_URL, API_KEY, thread_id, run_id)
+        failures = 0 if status else 1
+        # A run that is gone (or a status that keeps failing) would otherwise block the page until the deadline
+        while (status not in TERMINAL_RUN_STATUSES and status != RUN_NOT_FOUND
+               and failures < RUN_STATUS_MAX_FAILURES and time.time() < deadline):
+            status_message.info(f"Waiting for the run to finish (status: {status or 'unknown'})...")
+            time.sleep(RUN_POLL_INTERVAL)
+            status = get_run_status(API_URL, API_KEY, thread_id, run_id)
+            failures = 0 if status else failures + 1
+        run_registry.unregister(session_id)
+        
+        if status == RUN_NOT_FOUND or failures >= RUN_STATUS_MAX_FAILURES:
+            status_message.empty()
+            _finish_resumed_run("failed", error="The run could not be found")
+            st.warning("Could not reconnect to the generation: the run no longer exists or its status is unavailable.")
+            return
+        
+        values = get_thread_state(API_URL, API_KEY, thread_id) or {}
+        processed_data = process_raw_stream_json(values)
+        display_structured_results(processed_data, results_container)
+        progress_bar.progress(100)
+        _finish_resumed_run(
+            "completed" if status == "success" else (status or "failed"),
+            processed_data.get("generated_names", []),
+            processed_data.get("evaluation_results", {})
+        )
+    except requests.RequestException as e:
+        # Keep the run so the next rerun tries again, up to the reconnect limit
+        active_run["reconnect_attempts"] = active_run.get("reconnect_attempts", 0) + 1
+        if active_run["reconnect_attempts"] < MAX_STREAM_RECONNECTS:
+            time.sleep(RUN_POLL_INTERVAL)
+            st.rerun()
+        run_registry.unregister(session_id)
+        _finish_resumed_run("failed", error=str(e))
+        st.error(f"Lost connection to the running generation: {str(e)}")
+        return
+    finally:
+        if join_response is not None:
+            join_response.close()
+    
+    st.rerun()
+
 def build_complete_prompt(base_prompt, industry_info, target_audience, geographic_scope, name_style):
     """Build a complete prompt with additional context"""
     prompt_parts = [base_prompt.strip()]
@@ -328,17 +968,22 @@ def build_complete_prompt(base_prompt, industry_info, target_audience, geographi
     
     return " ".join(prompt_parts)
 
-def add_to_favorites(name):
-    """Add a name to favorites"""
-    if name not in st.session_state.favorite_names:
-        st.session_state.favorite_names.append(name)
+def add_to_favorites(name, thread_id=None, evaluation=None):
+    """Add a name to favorites, keeping the thread it came from and its evaluation scores"""
+    from mae_frontend.results_store import to_number
+    
+    evaluation = evaluation if isinstance(evaluation, dict) else {}
+    metadata = {key: value for key, value in evaluation.items() if key.endswith("_score") or key == "shortlist_status"}
+    if st.session_state.favorite_names.add(name, thread_id=thread_id, score=to_number(evaluation.get("overall_score")),
+                                           metadata=metadata):
+        get_favorites_index().add(name, FAVORITES_SOURCE)
         return True
     return False
 
 def remove_from_favorites(name):
     """Remove a name from favorites"""
-    if name in st.session_state.favorite_names:
-        st.session_state.favorite_names.remove(name)
+    if st.session_state.favorite_names.remove(name):
+        get_favorites_index().remove(name, FAVORITES_SOURCE)
         return True
     return False
 
@@ -451,6 +1096,7 @@ def display_structured_results(data, container):
                     name_text = name.get("brand_name", "") or name.get("name", "")
                     if name_text:
                         with st.expander(name_text, expanded=True):
+                            render_similar_names(name_text)
                             # Show additional info if available
                             if "naming_category" in name:
                                 st.write(f"**Category:** {name['naming_category']}")
@@ -460,6 +1106,7 @@ def display_structured_results(data, container):
                                 st.write(f"**Methodology:** {name['name_generation_methodology']}")
                 else:
                     st.markdown(f"### {name}")
+                    render_similar_names(str(name))
         tab_index += 1
     
     # Analysis tab
@@ -482,18 +1129,36 @@ def display_structured_results(data, container):
                     st.markdown("---")
         tab_index += 1
 
-def process_stream_data(stream, container, status_container, progress_bar):
-    """Process streaming data from the API"""
+def process_stream_data(stream, container, status_container, progress_bar, resume=False):
+    """
+    Process streaming data from the API
+    
+    When resume is True the stream is a rejoined run, so the data merged from
+    events seen before the disconnect is kept instead of being reset.
+    """
+    from mae_frontend.timeline import NodeTimeline, extract_token_count
+    
     generated_names = []
     evaluations = {}
     
     # Reset latest data and displayed sections for a fresh run
-    st.session_state.latest_data = {}
-    st.session_state.displayed_sections = set()
+    if not resume or "latest_data" not in st.session_state:
+        st.session_state.latest_data = {}
+        st.session_state.displayed_sections = set()
     
     # Track run metrics
     token_counts = {"total": 0, "prompt": 0, "completion": 0}
     run_metadata = {"start_time": time.time(), "steps_completed": 0}
+    if resume and st.session_state.active_run:
+        run_metadata["start_time"] = st.session_state.active_run.get("started_at", run_metadata["start_time"])
+    
+    # Per-node timing, kept per thread so it survives reruns, reloads and resumed streams
+    timeline_thread_id = (st.session_state.active_run or {}).get("thread_id")
+    timeline = get_timeline_store().get(timeline_thread_id) if resume else None
+    if timeline is None:
+        timeline = NodeTimeline(run_metadata["start_time"])
+        if timeline_thread_id:
+            get_timeline_store().put(timeline_thread_id, timeline)
     
     # Create containers for metrics and progress
     metrics_container = status_container.container()
@@ -521,18 +1186,21 @@ def process_stream_data(stream, container, status_container, progress_bar):
     # Initialize debug data list in session state if not already there
     if "raw_debug_data" not in st.session_state:
         st.session_state.raw_debug_data = []
-    else:
+    elif not resume:
         # Clear existing debug data for new run
         st.session_state.raw_debug_data = []
     
     # Also track raw stream data before JSON processing
     if "raw_stream_lines" not in st.session_state:
         st.session_state.raw_stream_lines = []
-    else:
+    elif not resume:
         st.session_state.raw_stream_lines = []
     
     # Set up counters and trackers
     line_count = 0
+    event_count = 0
+    sse_event = None
+    first_name_seen = bool(st.session_state.latest_data.get("generated_names"))
     
     # Clear the results container initially
     container.empty()
@@ -544,13 +1212,14 @@ def process_stream_data(stream, container, status_container, progress_bar):
             continue
             
         line_count += 1
-        line_str = line.decode("utf-8")
+        line_bytes = len(line)
+        STREAM_BYTES.inc(line_bytes)
         
         # Store the raw line before any processing
-        st.session_state.raw_stream_lines.append(line_str)
+        st.session_state.raw_stream_lines.append(line)
         
         # Skip empty lines
-        if not line_str.strip():
+        if not line.strip():
             continue
         
         # Update progress information
@@ -558,52 +1227,77 @@ def process_stream_data(stream, container, status_container, progress_bar):
         elapsed_time = time.time() - run_metadata["start_time"]
         time_display.metric("Time", f"{elapsed_time:.1f}s")
             
+        # Remember the SSE event ID so a dropped stream can be rejoined from here.
+        # Replayed events are harmless: merging into latest_data is idempotent.
+        # Only these short control lines are decoded; data payloads are parsed as bytes.
+        if line.startswith(b"id:"):
+            if st.session_state.active_run:
+                st.session_state.active_run["last_event_id"] = line[3:].strip().decode("utf-8")
+            continue
+        
         # Handle Server-Sent Events (SSE) format
-        if line_str.startswith("event:") or line_str.startswith(":"):
+        if line.startswith(b"event:") or line.startswith(b":"):
             # This is an SSE event marker or comment, not JSON data
-            if line_str.startswith(":"):
+            if line.startswith(b":"):
                 # This is a comment/heartbeat
                 status_message.info("Server heartbeat")
                 continue
                 
             # Extract event type for debugging
-            event_type = line_str.replace("event:", "").strip()
+            event_type = line[6:].strip().decode("utf-8")
+            sse_event = event_type
             status_message.info(f"Event stream: {event_type}")
             continue
             
         # Process JSON data
         data = None
-        json_str = None
             
         # Look for data payload in SSE format
-        if line_str.startswith("data:"):
+        if line.startswith(b"data:"):
             # Extract the JSON data after "data:"
-            json_str = line_str[5:].strip()
+            payload = line[5:].strip()
             
             # Skip empty data
-            if not json_str:
+            if not payload:
                 continue
         else:
             # Try to parse as raw JSON (fallback for non-SSE format)
-            json_str = line_str
+            payload = line
         
         # Try to parse the JSON data
         try:
-            data = json.loads(json_str)
+            data = jsoncodec.loads(payload)
             
             # Store raw data for debugging
             st.session_state.raw_debug_data.append(data)
-            print(f"DEBUG: Received data: {data.get('type', 'unknown')}")
-        except json.JSONDecodeError as json_err:
+            
+            event_count += 1
+            STREAM_EVENTS.labels(event=(sse_event or "data").split("|")[0]).inc()
+            if event_count == 1 and not resume:
+                STREAM_FIRST_EVENT.observe(time.time() - run_metadata["start_time"])
+            logger.debug("Received %s event", sse_event or "data", extra={"sampled": True})
+        except jsoncodec.DecodeError as json_err:
             # Log the error and the problematic data
-            print(f"Error parsing JSON: {str(json_err)}")
-            print(f"Problematic data: '{json_str}'")
-            status_message.warning(f"Received non-JSON data (length: {len(json_str)})")
+            text = payload.decode("utf-8", errors="replace")
+            logger.warning("Error parsing stream JSON (%s): %.200r", json_err, text)
+            status_message.warning(f"Received non-JSON data (length: {len(payload)})")
             
             # Store as raw text for debugging
-            st.session_state.raw_debug_data.append({"type": "raw_text", "content": json_str})
+            st.session_state.raw_debug_data.append({"type": "raw_text", "content": text})
             continue  # Skip to next line
             
+        # Message tuples and other non-dict payloads are kept for debugging only,
+        # but message chunks still tell us which node is running and its token usage
+        if not isinstance(data, dict):
+            if (isinstance(data, list) and len(data) == 2 and isinstance(data[1], dict)
+                    and "langgraph_node" in data[1]):
+                message_tokens = extract_token_count(data[0])
+                timeline.node_progress(data[1]["langgraph_node"], data[1].get("langgraph_step"), message_tokens, line_bytes)
+                if message_tokens:
+                    token_counts["total"] += message_tokens
+                    tokens_display.metric("Tokens", token_counts["total"])
+            continue
+        
         # If we have valid data, process it
         if data:
             try:
@@ -611,6 +1305,11 @@ def process_stream_data(stream, container, status_container, progress_bar):
                 event_type = data.get("type", "unknown")
                 metadata = data.get("metadata", {}) if isinstance(data, dict) else {}
                 
+                # The metadata event carries the run ID needed for cancellation
+                if sse_event == "metadata" and isinstance(data.get("run_id"), str):
+                    remember_run_id(data["run_id"])
+                    continue
+                
                 # Handle status message
                 if event_type == "status" and "message" in data:
                     status_message.info(data["message"])
@@ -623,12 +1322,49 @@ def process_stream_data(stream, container, status_container, progress_bar):
                     if "langgraph_node" in metadata:
                         current_node = metadata["langgraph_node"]
                         current_step_display.info(f"Processing node: {current_node}")
+                        
+                        status_tokens = extract_token_count(data)
+                        timeline.node_progress(current_node, metadata.get("langgraph_step"), status_tokens, line_bytes)
+                        if status_tokens:
+                            token_counts["total"] += status_tokens
+                            tokens_display.metric("Tokens", token_counts["total"])
                 
                 # Process structured data - check multiple possible locations
                 structured_data = None
                 
+                # Subgraph events are named "<mode>|<namespace>"
+                stream_mode = (sse_event or "").split("|")[0]
+                
+                # "debug" task events give exact node start and end times
+                if stream_mode == "debug" and isinstance(data.get("payload"), dict):
+                    task_name = data["payload"].get("name")
+                    if task_name and event_type == "task":
+                        timeline.node_started(task_name, data.get("step"))
+                    elif task_name and event_type == "task_result":
+                        timeline.node_finished(task_name, data.get("step"), nbytes=line_bytes)
+                
+                # "updates" events wrap each node's state delta in the node name
+                if stream_mode == "updates":
+                    structured_data = {}
+                    for node_name, node_update in data.items():
+                        if node_name.startswith("__") or not isinstance(node_update, dict):
+                            continue
+                        update_tokens = timeline.node_finished(
+                            node_name, tokens=extract_token_count(node_update), nbytes=line_bytes // len(data)
+                        )
+                        if update_tokens:
+                            token_counts["total"] += update_tokens
+                            tokens_display.metric("Tokens", token_counts["total"])
+                        run_metadata["steps_completed"] += 1
+                        agent_display.metric("Agent", node_name)
+                        steps_display.metric("Steps", run_metadata["steps_completed"])
+                        current_step_display.info(f"Processing node: {node_name}")
+                        structured_data.update(node_update)
+                # "values" events carry the full state snapshot
+                elif stream_mode == "values":
+                    structured_data = data
                 # Try to extract structured data from various possible locations
-                if "data" in data and isinstance(data["data"], dict):
+                elif "data" in data and isinstance(data["data"], dict):
                     structured_data = data["data"]
                 elif "result" in data and isinstance(data["result"], dict):
                     structured_data = data["result"]
@@ -649,6 +1385,9 @@ def process_stream_data(stream, container, status_container, progress_bar):
                     # Extract names for return value
                     if "generated_names" in processed_data:
                         generated_names = processed_data["generated_names"]
+                        if generated_names and not first_name_seen:
+                            first_name_seen = True
+                            STREAM_FIRST_NAME.observe(time.time() - run_metadata["start_time"])
                     
                     # Extract evaluations for return value
                     if "evaluation_results" in processed_data:
@@ -658,14 +1397,19 @@ def process_stream_data(stream, container, status_container, progress_bar):
                     display_structured_results(processed_data, results_display)
             except Exception as e:
                 # Log any errors in processing
-                print(f"Error processing data: {str(e)}")
+                logger.exception("Error processing stream data")
                 status_message.error(f"Error: {str(e)}")
         else:
-            print(f"No valid data after parsing: {json_str}")
+            logger.debug("No valid data after parsing: %.200r", payload, extra={"sampled": True})
     
     # Final update to progress indicators
     progress_bar.progress(100)
     run_metadata["end_time"] = time.time()
+    timeline.close(run_metadata["end_time"])
+    get_timeline_store().save(timeline_thread_id)
+    stream_seconds = run_metadata["end_time"] - run_metadata["start_time"]
+    if stream_seconds > 0:
+        STREAM_EVENT_RATE.set(event_count / stream_seconds)
     elapsed_time = run_metadata["end_time"] - run_metadata["start_time"]
     time_display.metric("Time", f"{elapsed_time:.1f}s (Completed)")
     current_step_display.success("Generation completed")
@@ -675,6 +1419,223 @@ def process_stream_data(stream, container, status_container, progress_bar):
     
     return generated_names, evaluations
 
+def render_node_timeline(timeline):
+    """Render a Gantt-style timeline and per-node summary for a run"""
+    rows = timeline.rows() if timeline else []
+    if not rows:
+        st.info("No node timing data was captured for this run.")
+        return
+    
+    # Imported on first use to keep them off the startup path
+    import altair as alt
+    import pandas as pd
+    
+    timeline_df = pd.DataFrame(rows)
+    chart = alt.Chart(timeline_df).mark_bar().encode(
+        x=alt.X("start:Q", title="Seconds since run start"),
+        x2="end:Q",
+        y=alt.Y("node:N", sort=alt.EncodingSortField(field="start", op="min"), title=None),
+        color=alt.Color("node:N", legend=None),
+        # Inferred spans are drawn faded
+        opacity=alt.condition(alt.datum.timing == "exact", alt.value(1.0), alt.value(0.45)),
+        tooltip=["node", "step", "start", "end", "duration", "timing", "events", "tokens", "bytes"]
+    ).properties(height=max(120, 28 * timeline_df["node"].nunique()))
+    st.altair_chart(chart, use_container_width=True)
+    if timeline.approximate:
+        st.caption("Faded bars are approximate: their start was inferred from the node before them, so parallel "
+                   "nodes appear one after another. Add the `debug` stream mode for exact start and end times.")
+    if not any(row["tokens"] for row in rows):
+        st.caption("No token usage was reported. Add the `messages-tuple` stream mode to count tokens per node.")
+    
+    # Slowest nodes first, with their share of total node time
+    summary_df = pd.DataFrame(timeline.summary()).rename(columns={
+        "node": "Node",
+        "runs": "Runs",
+        "duration": "Duration (s)",
+        "tokens": "Tokens",
+        "bytes": "Bytes",
+        "share": "Share (%)",
+        "timing": "Timing"
+    })
+    st.dataframe(summary_df, hide_index=True, use_container_width=True)
+
+COMPARISON_COLUMNS = {
+    "thread": "Thread",
+    "brand_name": "Name",
+    "shortlisted": "Shortlisted",
+    "overall_score": "Overall",
+    "memorability": "Memorability",
+    "pronounceability": "Pronounceability",
+    "domain_viability": "Domain Viability",
+    "brand_fit": "Brand Fit",
+    "strategic_alignment": "Strategic Alignment",
+    "translation_viability": "Translation Viability",
+    "languages_needing_adaptation": "Languages Needing Adaptation",
+    "domain_exact_match": "Exact Domain",
+    "domain_acquisition_cost": "Domain Cost",
+    "survey_market_adoption": "Survey: Adoption",
+    "survey_personality_fit": "Survey: Personality Fit",
+    "survey_differentiation": "Survey: Differentiation",
+    "survey_brand_promise": "Survey: Brand Promise",
+    "survey_respondents": "Survey Respondents",
+}
+
+@st.fragment
+def render_past_generations():
+    """Thread picker and report for past generations; picking a thread reruns only this view"""
+    # Fetch all threads from API
+    with st.spinner("Loading past generations..."):
+        all_threads = fetch_all_threads()
+    
+    if not all_threads:
+        st.info("No generation history found in the API")
+    else:
+        st.success(f"Found {len(all_threads)} past generations")
+        
+        # First, show a summary table
+        thread_data = []
+        for thread in all_threads:
+            # Extract thread info
+            thread_id = thread.get("thread_id", "N/A")
+            created_at = thread.get("created_at", "Unknown")
+            if isinstance(created_at, str) and "T" in created_at:
+                created_at = created_at.split("T")[0]
+            
+            # Add to table data
+            thread_data.append({
+                "Thread ID": thread_id[:8] + "..." if len(thread_id) > 8 else thread_id,
+                "Created": created_at,
+                "Full Thread ID": thread_id  # For reference
+            })
+        
+        # Display as dataframe
+        import pandas as pd
+        df = pd.DataFrame(thread_data)
+        
+        # Add selection functionality
+        selected_thread = st.selectbox(
+            "Filter by thread id below:",
+            options=df["Full Thread ID"].tolist(),
+            format_func=lambda x: f"Thread {x[:8]}... - {df[df['Full Thread ID']==x]['Created'].iloc[0]}"
+        )
+        
+        # Show thread details when selected
+        if selected_thread:
+            st.markdown("**Brand Name Generation Report Details:**")
+            
+            # History, details and runs are independent, so they load side by side
+            thread_history, thread_details, thread_runs = load_thread_page(selected_thread)
+            
+            # Render thread data
+            render_thread_data(thread_history, selected_thread)
+            
+            if (thread_details or thread_runs) and st.toggle("Show thread information and runs",
+                                                             key=f"thread_info_{selected_thread}"):
+                render_thread_info(selected_thread, thread_details, thread_runs)
+
+@st.fragment
+def render_generation_comparison(all_threads):
+    """Compare names from several threads in one aligned table and chart"""
+    from mae_frontend.results_store import METRIC_COLUMNS
+    
+    if not all_threads:
+        st.info("No generation history found in the API")
+        return
+    
+    created_by_thread = {}
+    for thread in all_threads:
+        created_at = thread.get("created_at") or "Unknown"
+        if isinstance(created_at, str) and "T" in created_at:
+            created_at = created_at.split("T")[0]
+        created_by_thread[thread.get("thread_id")] = created_at
+    
+    selected_threads = st.multiselect(
+        "Generations to compare:",
+        options=[thread_id for thread_id in created_by_thread if thread_id],
+        format_func=lambda x: f"Thread {x[:8]}... - {created_by_thread[x]}",
+        key="compare_threads"
+    )
+    if not selected_threads:
+        st.info("Select two or more generations to compare their names side by side.")
+        return
+    
+    with st.spinner("Loading results..."):
+        rows = load_comparison_rows(selected_threads, created_by_thread)
+    if not rows:
+        st.warning("No evaluated names were found in the selected generations.")
+        return
+    
+    filter_cols = st.columns([1, 2])
+    with filter_cols[0]:
+        shortlisted_only = st.checkbox("Shortlisted names only", key="compare_shortlisted")
+    if shortlisted_only:
+        rows = [row for row in rows if row["shortlisted"]]
+    with filter_cols[1]:
+        names = sorted({row["brand_name"] for row in rows})
+        selected_names = st.multiselect("Limit to names:", options=names, key="compare_names")
+    if selected_names:
+        rows = [row for row in rows if row["brand_name"] in selected_names]
+    if not rows:
+        st.info("No names match the current filters.")
+        return
+    
+    # Imported on first use to keep them off the startup path
+    import altair as alt
+    import pandas as pd
+    
+    compare_df = pd.DataFrame(rows)
+    compare_df["thread"] = compare_df["thread_id"].str[:8] + " (" + compare_df["created_at"].astype(str) + ")"
+    compare_df = compare_df.sort_values(["brand_name", "thread"])
+    st.dataframe(
+        compare_df[list(COMPARISON_COLUMNS)].rename(columns=COMPARISON_COLUMNS),
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    metric = st.selectbox(
+        "Chart metric:",
+        options=[column for column in METRIC_COLUMNS if compare_df[column].notna().any()],
+        format_func=lambda column: COMPARISON_COLUMNS[column],
+        key="compare_metric"
+    )
+    if metric:
+        chart = alt.Chart(compare_df.dropna(subset=[metric])).mark_bar().encode(
+            x=alt.X("brand_name:N", title=None, sort="-y"),
+            y=alt.Y(f"{metric}:Q", title=COMPARISON_COLUMNS[metric]),
+            color=alt.Color("thread:N", title="Generation"),
+            xOffset="thread:N",
+            tooltip=["brand_name", "thread", metric]
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+PROFILE_OVERLAY_CSS = """
+<style>
+.st-key-profile_overlay {
+    position: fixed; bottom: 1rem; right: 1rem; z-index: 1000;
+    width: 24rem; max-height: 60vh; overflow-y: auto; padding: 0.5rem 0.75rem;
+    background: var(--background-color, #fff); border: 1px solid rgba(128, 128, 128, 0.4);
+    border-radius: 0.5rem; box-shadow: 0 2px 8px rgba(0, 0, 0, 0.15);
+}
+</style>
+"""
+
+def render_profile_overlay(profiler):
+    """Finish the rerun profile and pin its section timings to the corner of the page"""
+    timings = profiler.finish()
+    logger.debug("Rerun took %.0f ms: %s", profiler.total * 1000,
+                 ", ".join(f"{row['section']}={row['ms']}ms" for row in timings))
+    st.markdown(PROFILE_OVERLAY_CSS, unsafe_allow_html=True)
+    with st.container(key="profile_overlay"):
+        st.markdown(f"**⏱️ Rerun: {profiler.total * 1000:.0f} ms**")
+        lines = [
+            f"{'&nbsp;' * 4 * row['depth']}{row['section'].rsplit('/', 1)[-1]}: "
+            f"**{row['ms']:.0f} ms** ({row['share']:.0f}%)"
+            for row in timings
+        ]
+        st.markdown("  \n".join(lines), unsafe_allow_html=True)
+        if profiler.capture_path:
+            st.caption(f"Profile saved to {profiler.capture_path}")
+
 def display_results(generated_names, evaluations, container):
     """
     Legacy function for displaying results.
@@ -737,16 +1698,24 @@ def display_run_details(thread_id, run_id):
     if "error" in run_data and run_data["error"]:
         st.error(f"Run Error: {run_data['error']}")
 
-def display_thread_history(thread_id):
-    """Display comprehensive thread history with visualizations"""
-    history_data = get_thread_history(thread_id)
-    thread_details = get_thread_details(thread_id)
-    thread_runs = get_thread_runs(thread_id)
+def load_thread_page(thread_id):
+    """Fetch a thread's history, details and runs concurrently"""
+    page_data = load_page_data({
+        "history": lambda: get_thread_history(thread_id),
+        "details": lambda: get_thread_details(thread_id),
+        "runs": lambda: get_thread_runs(thread_id),
+    })
+    return page_data["history"], page_data["details"], page_data["runs"]
+
+def render_thread_info(thread_id, thread_details, thread_runs):
+    """Thread metadata and one expander per run, with every run's details fetched concurrently"""
+    # Warm the run details cache in one round trip instead of one per expander
+    if thread_runs:
+        load_page_data({
+            run["run_id"]: functools.partial(get_run_details, thread_id, run["run_id"])
+            for run in thread_runs if run.get("run_id")
+        })
     
-    if not history_data:
-        st.warning("No history data available")
-        return
-        
     # Display thread details
     st.markdown("#### Thread Information")
     
@@ -772,6 +1741,16 @@ def display_thread_history(thread_id):
             
             with st.expander(f"{status_emoji} Run {i+1}: {run_id[:8]}... ({status})", expanded=i==0):
                 display_run_details(thread_id, run_id)
+
+def display_thread_history(thread_id):
+    """Display comprehensive thread history with visualizations"""
+    history_data, thread_details, thread_runs = load_thread_page(thread_id)
+    
+    if not history_data:
+        st.warning("No history data available")
+        return
+    
+    render_thread_info(thread_id, thread_details, thread_runs)
     
     # Display message history
     if history_data:
@@ -796,51 +1775,6 @@ def display_thread_history(thread_id):
                     with st.expander("Message Data", expanded=False):
                         st.json(message["data"])
 
-def find_value_in_data(data, field_names, max_depth=10, current_depth=0):
-    """
-    Recursively search through a data structure to find values matching any of the given field names.
-    
-    Args:
-        data: The data structure to search (can be dict, list, or scalar)
-        field_names: List of field names to search for
-        max_depth: Maximum recursion depth to prevent stack overflow
-        current_depth: Current recursion depth (used internally)
-        
-    Returns:
-        The first matching value found, or None if no match is found
-    """
-    # Prevent excessive recursion
-    if current_depth > max_depth:
-        return None
-        
-    # If data is None, return None
-    if data is None:
-        return None
-        
-    # If data is a dictionary
-    if isinstance(data, dict):
-        # First check if any of our field names are direct keys
-        for field_name in field_names:
-            if field_name in data:
-                return data[field_name]
-        
-        # If not found, recursively check all values
-        for value in data.values():
-            result = find_value_in_data(value, field_names, max_depth, current_depth + 1)
-            if result is not None:
-                return result
-    
-    # If data is a list
-    elif isinstance(data, list):
-        # Check each item in the list
-        for item in data:
-            result = find_value_in_data(item, field_names, max_depth, current_depth + 1)
-            if result is not None:
-                return result
-    
-    # If we get here, we didn't find anything
-    return None
-
 def _render_survey_persona(persona):
     """
     Helper function to render a survey persona's responses in a structured format.
@@ -963,7 +1897,7 @@ def _render_survey_persona(persona):
                 try:
                     # If it's a string, try to parse it as JSON
                     if isinstance(raw_feedback, str):
-                        raw_feedback = json.loads(raw_feedback)
+                        raw_feedback = jsoncodec.loads(raw_feedback)
                     
                     # Now handle the parsed dictionary
                     if isinstance(raw_feedback, dict):
@@ -974,7 +1908,7 @@ def _render_survey_persona(persona):
                     else:
                         # If it's not a dictionary after parsing, display directly
                         st.markdown(raw_feedback)
-                except json.JSONDecodeError:
+                except jsoncodec.DecodeError:
                     # If JSON parsing fails, display as raw text
                     st.markdown(raw_feedback)
         
@@ -986,8 +1920,8 @@ def _render_survey_persona(persona):
                 if isinstance(brand_relationships, str):
                     try:
                         # Try to parse as JSON if it's a string
-                        brand_relationships = json.loads(brand_relationships)
-                    except json.JSONDecodeError:
+                        brand_relationships = jsoncodec.loads(brand_relationships)
+                    except jsoncodec.DecodeError:
                         # If parsing fails, display as raw text
                         st.write(brand_relationships)
                         brand_relationships = None
@@ -1089,16 +2023,73 @@ def _render_domain_analysis(analysis):
             st.write("**Additional Considerations**")
             st.write(analysis["notes"])
 
-def render_thread_data(thread_data):
+def render_report_download(thread_id, report_url, file_size_kb=None, key_prefix="report"):
+    """
+    Render a download for a report URL, streaming it through the on-disk cache.
+    
+    The report is only fetched when the user asks for it, and the download button
+    reads it from disk on click, so the payload is never held in session state.
+    """
+    from mae_frontend.reports import (
+        ReportDownloadError,
+        cached_report,
+        fetch_report,
+        is_api_url,
+        read_report,
+        report_file_name,
+        report_mime_type,
+    )
+    
+    file_name = report_file_name(report_url)
+    cached_path = cached_report(thread_id, file_name)
+    
+    if cached_path:
+        st.download_button(
+            "📥 Download Report",
+            data=lambda: read_report(cached_path),
+            file_name=file_name,
+            mime=report_mime_type(file_name),
+            key=f"{key_prefix}_download_{thread_id}_{file_name}",
+            use_container_width=True,
+        )
+        return
+    
+    if st.button("📥 Prepare Download", key=f"{key_prefix}_prepare_{thread_id}_{file_name}"):
+        # Only send API credentials to our own backend, never to third-party storage
+        headers = {"X-Api-Key": API_KEY} if is_api_url(report_url, API_URL) else {}
+        try:
+            with st.spinner("Downloading report..."):
+                fetch_report(
+                    report_url,
+                    thread_id,
+                    file_name=file_name,
+                    expected_size_kb=file_size_kb,
+                    headers=headers,
+                )
+            st.rerun()
+        except ReportDownloadError as e:
+            st.error(str(e))
+    
+    # Keep the direct link as a fallback
+    st.markdown(f"[Open report in browser]({report_url})")
+
+def render_thread_data(thread_data, thread_id=None):
     """
     Renders thread data in a structured format with tabs for different sections.
     
     Args:
         thread_data: A dictionary containing thread data from the LangSmith API
+        thread_id: ID of the thread, used to key cached downloads
     """
+    from mae_frontend.reports import ReportDownloadError, read_report, report_mime_type, store_report_content
+    from mae_frontend.results_store import find_value_in_data
+    
     if not thread_data:
         st.error("No thread data available. Please check the thread ID and try again.")
         return
+    
+    if not thread_id:
+        thread_id = find_value_in_data(thread_data, ["thread_id"]) or "unknown_thread"
         
     # Create main tabs for different sections in the specified order
     tabs = st.tabs([
@@ -1163,7 +2154,7 @@ def render_thread_data(thread_data):
                 st.write(analysis.get("notes"))
 
     # 1. Brand Context
-    with tabs[0]:
+    with tabs[0], profiler.section("thread_data/brand_context"):
         st.markdown("**Detailed Brand Identity Results**")
         st.write("*The following sections provide a comprehensive overview of the brand context, including core identity, brand voice, market position, and industry context. All of this information was extracted and generated based on the single prompt provided by the user.*")
         brand_context = {}
@@ -1254,7 +2245,7 @@ def render_thread_data(thread_data):
                             _render_analysis_section(value, display_name.lower())
     
     # 2. Name Generation
-    with tabs[1]:
+    with tabs[1], profiler.section("thread_data/name_generation"):
         st.markdown("**Preliminary Brand Name Generation Results**")
         st.write("*The following brand names were generated using Alina Wheeler's brand name methodology based on the context provided within the generated Brand Context results.*")
         generated_names = find_value_in_data(thread_data, ["generated_names"])
@@ -1281,6 +2272,7 @@ def render_thread_data(thread_data):
                 brand_name = name_data.get("brand_name", "") or name_data.get("name", "")
                 if brand_name:
                     with st.expander(f"{brand_name}", expanded=True):
+                        render_similar_names(brand_name, thread_id)
                         # Create tabs for different aspects of the name
                         name_tabs = st.tabs([
                             "Core Details",
@@ -1315,7 +2307,7 @@ def render_thread_data(thread_data):
             st.info("No generated names found in the thread data.")
     
     # 3. Pre Analyses with child tabs
-    with tabs[2]:
+    with tabs[2], profiler.section("thread_data/name_analysis"):
         st.markdown("**Generated Brand Name Analysis**")
         st.write("*Each brand name is analyzed for linguistic, semantic, and cultural sensitivity*")
         pre_analysis_tabs = st.tabs(["Linguistic Analysis", "Semantic Analysis", "Cultural Sensitivity"])
@@ -1402,7 +2394,7 @@ def render_thread_data(thread_data):
                 st.info("No cultural sensitivity analysis data found.")
     
     # 4. Name Evaluation
-    with tabs[3]:
+    with tabs[3], profiler.section("thread_data/name_evaluation"):
         st.markdown("**Name Evaluation Results**")
         st.write("*Name Evaluation Results are based on a comprehensive evaluation of each name against the brand context, semantic, cultural, and linguistic analyses*")
         evaluation_results = find_value_in_data(thread_data, ["evaluation_results"])
@@ -1452,7 +2444,7 @@ def render_thread_data(thread_data):
             st.info("No evaluation results found.")
     
     # 5. Translation Analysis (now a parent tab)
-    with tabs[4]:
+    with tabs[4], profiler.section("thread_data/translation_analysis"):
         st.markdown("**Translation Analysis Results**")
         st.write("*Shotlisted Brand Names are translated against the top six (6) global languages to ensure global market accessibility*")
         translation_analysis = find_value_in_data(thread_data, ["translation_analysis_results"])
@@ -1487,7 +2479,7 @@ def render_thread_data(thread_data):
             st.info("No translation analysis data found.")
 
     # 6. Domain Analysis (now a parent tab)
-    with tabs[5]:
+    with tabs[5], profiler.section("thread_data/domain_analysis"):
         st.markdown("**Domain Analysis Results**")
         st.write("*Shortlisted Brand Names are analyzed for domain availability and social media potential*")
         domain_analysis = find_value_in_data(thread_data, ["domain_analysis_results"])
@@ -1508,7 +2500,7 @@ def render_thread_data(thread_data):
             st.info("No domain analysis data found.")
     
     # 7. Research with child tabs
-    with tabs[6]:
+    with tabs[6], profiler.section("thread_data/research"):
         st.markdown("**Market Research**")
         st.write("*In depth market research is conducted to understand the market size, growth rate, customer needs, SEO potential, and competitive landscape. Along with this research a survey is conducted, utilizing synthetic persona data, to understand the customer preferences.*")
         research_tabs = st.tabs([
@@ -1752,7 +2744,7 @@ def render_thread_data(thread_data):
                 st.info("No competitor analysis data found.")
     
     # 8. Report Details
-    with tabs[7]:
+    with tabs[7], profiler.section("thread_data/report"):
         
         # Display input prompt
         user_prompt = find_value_in_data(thread_data, ["user_prompt"])
@@ -1789,18 +2781,14 @@ def render_thread_data(thread_data):
             st.markdown("**Report Download**")
             col1, col2 = st.columns([3, 1])
             with col1:
-                st.markdown(
-                    f"[Download Report]({report_url})",
-                    unsafe_allow_html=True
-                )
+                render_report_download(thread_id, report_url, file_size_kb)
             with col2:
                 if file_size_kb:
                     # Convert KB to MB with one decimal place
                     file_size_mb = round(float(file_size_kb) / 1024, 1)
                     st.caption(f"Size: {file_size_mb} MB")
 
-    # 5. Downloadable Report
-    with tabs[4]:
+        # Inline reports are spilled to the disk cache and served from there
         st.markdown("**Available Reports**")
         
         reports = find_value_in_data(thread_data, ["reports"])
@@ -1815,11 +2803,18 @@ def render_thread_data(thread_data):
                                 st.caption(f"{report.get('size')} KB")
                         with cols[1]:
                             if report.get('content'):
+                                file_name = report.get('name', 'report.txt')
+                                try:
+                                    report_path = store_report_content(thread_id, file_name, report['content'])
+                                except ReportDownloadError as e:
+                                    st.error(str(e))
+                                    continue
                                 st.download_button(
                                     "📥 Download",
-                                    report['content'],
-                                    file_name=report.get('name', 'report.txt'),
-                                    mime='text/plain',
+                                    data=lambda path=report_path: read_report(path),
+                                    file_name=file_name,
+                                    mime=report_mime_type(file_name),
+                                    key=f"inline_report_{thread_id}_{file_name}",
                                     use_container_width=True,
                                 )
                     st.divider()
@@ -1903,11 +2898,148 @@ def _render_market_research(analysis):
         st.write("**Strategic Recommendations**")
         st.write(analysis.get("recommendations", "No recommendations available"))
 
+# Start metrics exporters and count this session
+init_metrics().touch(get_session_id())
+set_log_context(session_id=get_session_id(), thread_id=st.session_state.current_thread_id)
+
 # Main application layout
 st.title("MAE Brand Namer")
 st.caption("AI-driven brand naming and strategic analysis, powered by Alina Wheeler's methodology. Provides comprehensive insights: linguistic, semantic, cultural, SEO, domain, market research, targeted persona surveys (derived from AI generated synthetic personas), and competitive intelligence. For efficient, data-backed brand decisions.")
 
+def on_industry_change():
+    """Reset sector and subsector when industry changes"""
+    st.session_state.industry_selection["sector"] = ""
+    st.session_state.industry_selection["subsector"] = ""
+
+def on_sector_change():
+    """Reset subsector when sector changes"""
+    st.session_state.industry_selection["subsector"] = ""
+
+@st.fragment
+def render_additional_parameters():
+    """Industry hierarchy and brand context inputs; values are read back from session state"""
+    # Industry selection with 3-level hierarchy
+    st.markdown("#### Industry Classification")
+    
+    # Industry dropdown (top level)
+    industry = st.selectbox(
+        "Industry",
+        options=[""] + list(INDUSTRY_HIERARCHY.keys()),
+        key="industry_dropdown",
+        index=0,  # Start with empty selection
+        on_change=on_industry_change,
+        format_func=lambda x: x if x else "Select Industry (Optional)"
+    )
+    
+    # Store in session state
+    st.session_state.industry_selection["industry"] = industry
+    
+    # Sector dropdown (dependent on industry)
+    if industry:
+        sector_options = [""] + list(INDUSTRY_HIERARCHY.get(industry, {}).keys())
+        sector = st.selectbox(
+            "Sector",
+            options=sector_options,
+            key="sector_dropdown",
+            index=0,  # Start with empty selection
+            on_change=on_sector_change,
+            format_func=lambda x: x if x else "Select Sector (Optional)"
+        )
+        # Store in session state
+        st.session_state.industry_selection["sector"] = sector
+        
+        # Subsector dropdown (dependent on industry and sector)
+        if sector:
+            subsector_options = [""] + INDUSTRY_HIERARCHY.get(industry, {}).get(sector, [])
+            subsector = st.selectbox(
+                "Subsector",
+                options=subsector_options,
+                key="subsector_dropdown",
+                index=0,  # Start with empty selection
+                format_func=lambda x: x if x else "Select Subsector (Optional)"
+            )
+            # Store in session state
+            st.session_state.industry_selection["subsector"] = subsector
+    
+    st.markdown("#### Additional Brand Context")
+    st.text_input(
+        "Target Market",
+        key="target_audience",
+        placeholder="e.g., Enterprise manufacturing companies"
+    )
+    
+    st.selectbox(
+        "Market Scope",
+        ["", "Global Enterprise", "Regional", "National", "Local"],
+        key="geographic_scope"
+    )
+    
+    st.multiselect(
+        "Brand Positioning",
+        ["Enterprise", "Technical", "Professional", "Innovative", "Traditional"],
+        key="name_style"
+    )
+
+def toggle_favorite(name, thread_id=None, evaluation=None):
+    """Heart button callback; reads membership at click time so stale buttons still do the right thing"""
+    if name in st.session_state.favorite_names:
+        remove_from_favorites(name)
+    else:
+        add_to_favorites(name, thread_id, evaluation)
+
+@st.fragment
+def render_favorite_names():
+    """Sidebar favorites list; removing a favorite reruns only this list"""
+    if not st.session_state.favorite_names:
+        return
+    st.markdown("---")
+    st.subheader("Favorite Names")
+    if not signed_in_user():
+        st.caption("🔖 Favorites are saved in this browser; clearing its cookies starts an empty list.")
+    for favorite in st.session_state.favorite_names.records():
+        name = favorite["name"]
+        cols = st.columns([4, 1])
+        with cols[0]:
+            st.markdown(f"**{name}**")
+            details = []
+            if favorite.get("score") is not None:
+                details.append(f"score {favorite['score']:g}")
+            if favorite.get("thread_id"):
+                details.append(f"thread {favorite['thread_id'][:8]}...")
+            if details:
+                st.caption(" · ".join(details))
+        with cols[1]:
+            st.button("✖️", key=f"remove_{name}", on_click=remove_from_favorites, args=(name,))
+    export_cols = st.columns(2)
+    with export_cols[0]:
+        st.download_button("Export CSV", st.session_state.favorite_names.export_csv(),
+                           file_name="favorite_names.csv", mime="text/csv", on_click="ignore",
+                           use_container_width=True)
+    with export_cols[1]:
+        st.download_button("Export JSON", st.session_state.favorite_names.export_json(),
+                           file_name="favorite_names.json", mime="application/json", on_click="ignore",
+                           use_container_width=True)
+
+@st.fragment
+def render_run_names(index, run):
+    """
+    A session history entry's names with favorite toggles; a toggle reruns only this list.
+    The sidebar favorites list picks up the change on the next full rerun.
+    """
+    st.write("**Generated Names:**")
+    evaluations = run.get("evaluations") or {}
+    for name in run.get("generated_names", []):
+        name = _name_text(name)
+        cols = st.columns([4, 1])
+        with cols[0]:
+            st.markdown(f"- **{name}**")
+        with cols[1]:
+            favorite = name in st.session_state.favorite_names
+            st.button("❤️" if favorite else "🤍", key=f"h_fav_{index}_{name}", on_click=toggle_favorite,
+                      args=(name, run.get("thread_id"), evaluations.get(name)))
+
 # Sidebar for inputs
+profiler.enter("sidebar")
 with st.sidebar:
     st.subheader("Brand Requirements")
     
@@ -1931,113 +3063,56 @@ with st.sidebar:
         height=120
     )
     
-    # Create callback functions to maintain hierarchy
-    def on_industry_change():
-        """Reset sector and subsector when industry changes"""
-        st.session_state.industry_selection["sector"] = ""
-        st.session_state.industry_selection["subsector"] = ""
-
-    def on_sector_change():
-        """Reset subsector when sector changes"""
-        st.session_state.industry_selection["subsector"] = ""
-
-    # Advanced parameters in expander
+    # Advanced parameters in expander; a fragment, so the dependent dropdowns rerun only themselves
     with st.expander("Additional Parameters", expanded=False):
-        # Industry selection with 3-level hierarchy
-        st.markdown("#### Industry Classification")
-        
-        # Industry dropdown (top level)
-        industry = st.selectbox(
-            "Industry",
-            options=[""] + list(INDUSTRY_HIERARCHY.keys()),
-            key="industry_dropdown",
-            index=0,  # Start with empty selection
-            on_change=on_industry_change,
-            format_func=lambda x: x if x else "Select Industry (Optional)"
-        )
-        
-        # Store in session state
-        st.session_state.industry_selection["industry"] = industry
-        
-        # Sector dropdown (dependent on industry)
-        if industry:
-            sector_options = [""] + list(INDUSTRY_HIERARCHY.get(industry, {}).keys())
-            sector = st.selectbox(
-                "Sector",
-                options=sector_options,
-                key="sector_dropdown",
-                index=0,  # Start with empty selection
-                on_change=on_sector_change,
-                format_func=lambda x: x if x else "Select Sector (Optional)"
-            )
-            # Store in session state
-            st.session_state.industry_selection["sector"] = sector
-            
-            # Subsector dropdown (dependent on industry and sector)
-            if sector:
-                subsector_options = [""] + INDUSTRY_HIERARCHY.get(industry, {}).get(sector, [])
-                subsector = st.selectbox(
-                    "Subsector",
-                    options=subsector_options,
-                    key="subsector_dropdown",
-                    index=0,  # Start with empty selection
-                    format_func=lambda x: x if x else "Select Subsector (Optional)"
-                )
-                # Store in session state
-                st.session_state.industry_selection["subsector"] = subsector
-        
-        # Create an industry info dictionary to pass to the prompt builder
-        industry_info = {
-            "industry": st.session_state.industry_selection["industry"],
-            "sector": st.session_state.industry_selection["sector"],
-            "subsector": st.session_state.industry_selection["subsector"]
-        }
-        
-        st.markdown("#### Additional Brand Context")
-        target_audience = st.text_input(
-            "Target Market",
-            placeholder="e.g., Enterprise manufacturing companies"
-        )
-        
-        geographic_scope = st.selectbox(
-            "Market Scope",
-            ["", "Global Enterprise", "Regional", "National", "Local"]
-        )
-        
-        name_style = st.multiselect(
-            "Brand Positioning",
-            ["Enterprise", "Technical", "Professional", "Innovative", "Traditional"]
-        )
-        
-        # Build complete prompt with additional requirements
-        complete_prompt = build_complete_prompt(
-            user_input,
-            industry_info,
-            target_audience,
-            geographic_scope,
-            name_style
-        )
+        render_additional_parameters()
+    
+    # Build complete prompt with additional requirements
+    complete_prompt = build_complete_prompt(
+        user_input,
+        dict(st.session_state.industry_selection),
+        st.session_state.get("target_audience", ""),
+        st.session_state.get("geographic_scope", ""),
+        st.session_state.get("name_style", [])
+    )
     
     # Generate button
     generate_button = st.button("Generate Brand Names", type="primary", use_container_width=True)
     
+    # "Force Fresh Run" on a cached brief counts as a generate click that skips the cache,
+    # and a generation still waiting for a slot asks again on every rerun
+    force_fresh = st.session_state.pop("force_fresh_run", False)
+    generate_requested = generate_button or force_fresh or st.session_state.pop("run_queued", False)
+    
+    # Debugging controls
+    with st.expander("Developer Options", expanded=False):
+        st.multiselect(
+            "Stream Modes",
+            AVAILABLE_STREAM_MODES,
+            key="stream_modes",
+            help="Events requested from the run stream. 'updates' sends node deltas only; "
+                 "add 'values' to stream full state snapshots, or 'debug'/'messages' for troubleshooting."
+        )
+        st.button(
+            "Reload Configuration",
+            on_click=reload_app_config,
+            help="Re-read .env (API URL, assistant, keys) without restarting the app"
+        )
+    
     # Display favorites
-    if st.session_state.favorite_names:
-        st.markdown("---")
-        st.subheader("Favorite Names")
-        for name in st.session_state.favorite_names:
-            cols = st.columns([4, 1])
-            with cols[0]:
-                st.markdown(f"**{name}**")
-            with cols[1]:
-                if st.button("✖️", key=f"remove_{name}"):
-                    remove_from_favorites(name)
-                    st.rerun()
-
-# Main content area with tabs
-tab1, tab2 = st.tabs(["Generator", "History"])
-
-with tab1:
+    render_favorite_names()
+
+# Main content area. Only the selected view runs: st.tabs would execute every
+# view on each rerun, including history fetches and report rendering nobody sees.
+MAIN_VIEWS = ["Generator", "History"]
+if "main_view" not in st.session_state or generate_requested or st.session_state.get("reuse_cached_result"):
+    st.session_state.main_view = "Generator"
+main_view = st.radio("View", MAIN_VIEWS, key="main_view", horizontal=True, label_visibility="collapsed")
+
+if main_view == "Generator":
+    profiler.enter("generator")
+    index_past_generations()
+    
     # Message area
     if not user_input.strip():
         st.info("Enter your brand requirements in the sidebar to get started.")
@@ -2054,19 +3129,38 @@ with tab1:
         st.subheader("Name Generation Flow")
         st.caption("This section shows detailed information about each step in the graph execution pipeline.")
     
-    # Create a container for Streamlit callback and place it before the progress indicators
-    st_callback_container = st.container()
-    # Initialize LangChain callback handler for Streamlit
-    st_callback = StreamlitCallbackHandler(st_callback_container, expand_new_thoughts=False, max_thought_containers=10)
-
+    # Stop control, filled in while a run is streaming
+    stop_placeholder = st.empty()
+    
+    # A run left streaming by an interrupted rerun can still be stopped
+    if st.session_state.active_run and not generate_requested:
+        with stop_placeholder.container():
+            st.info("A generation is still running in the background.")
+            st.button(
+                "⏹️ Stop Generation",
+                key="stop_generation",
+                on_click=cancel_active_run,
+                use_container_width=True
+            )
+    
     # Progress indicators
     progress_bar = st.progress(0)
     status_container = st.container()
     
+    # Rejoin a generation whose stream was interrupted
+    if st.session_state.active_run and not generate_requested:
+        resume_active_run(results_container, status_container, progress_bar)
+    
     # Show persisted debug data if we have it (from previous runs/tab switches)
     debug_container = st.container()
-    with debug_container:
+    with debug_container, profiler.section("debug_panel"):
         if "generation_complete" in st.session_state and st.session_state.generation_complete:
+            # Node timing for the most recent run
+            current_timeline = get_timeline_store().get(st.session_state.current_thread_id)
+            if current_timeline is not None:
+                st.subheader("Node Timeline")
+                render_node_timeline(current_timeline)
+            
             if "raw_debug_data" in st.session_state and len(st.session_state.raw_debug_data) > 0:
                 st.write(f"Debug data available: {len(st.session_state.raw_debug_data)} events")
                 
@@ -2139,11 +3233,32 @@ with tab1:
                 with st.expander("View Raw Event Data", expanded=False):
                     st.json(st.session_state.raw_debug_data[:10])
 
+    # Offer the finished result of an identical brief instead of running the pipeline again
+    if generate_requested:
+        from mae_frontend.prompt_cache import PROMPT_CACHE_ENABLED, prompt_cache_key
+        
+        st.session_state.pop("prompt_cache_hit", None)
+        if PROMPT_CACHE_ENABLED and not force_fresh and user_input.strip():
+            cache_key = prompt_cache_key(complete_prompt, ASSISTANT_ID)
+            cached_run = get_prompt_cache().get(cache_key)
+            if cached_run:
+                st.session_state.prompt_cache_hit = {**cached_run, "key": cache_key, "prompt": complete_prompt}
+                generate_requested = False
+    render_prompt_cache_choice(status_container)
+    reuse_hit = st.session_state.pop("reuse_cached_result", None)
+    if reuse_hit:
+        load_cached_result(reuse_hit, results_container, status_container)
+    
     # Process generation
-    if generate_button:
+    if generate_requested:
         if not user_input.strip():
             st.error("Please provide a description of your brand requirements.")
             st.stop()
+        
+        # Runs are queued rather than rejected when this session or the whole app is over budget
+        if not wait_for_run_slot(status_container, force_fresh):
+            st.warning("The generator is busy right now. Please try again in a few minutes.")
+            st.stop()
             
         # Clear debug data from previous runs
         if "debug_data" not in st.session_state:
@@ -2159,15 +3274,6 @@ with tab1:
         # Display initial status
         status_container.info("Initializing generation process...")
         
-        # Build complete prompt with additional requirements
-        complete_prompt = build_complete_prompt(
-            user_input,
-            industry_info,
-            target_audience,
-            geographic_scope,
-            name_style
-        )
-        
         # Store the current request in session state
         current_run = {
             "prompt": complete_prompt,
@@ -2184,6 +3290,10 @@ with tab1:
             if not st.session_state.generation_complete:
                 st.empty()
         
+        run_response = None
+        session_id = get_session_id()
+        run_registry = get_run_registry()
+        
         try:
             # API headers
             headers = {
@@ -2192,8 +3302,10 @@ with tab1:
             }
             
             # Create a new thread
-            thread_response = requests.post(
+            thread_response = api_request(
+                "POST",
                 f"{API_URL}/threads",
+                "/threads",
                 headers=headers,
                 json={}
             )
@@ -2202,62 +3314,105 @@ with tab1:
             
             # Save current thread ID to session state
             st.session_state.current_thread_id = thread_id
+            set_log_context(thread_id=thread_id)
             current_run["thread_id"] = thread_id
             
             # Start a run with the user input
-            run_response = requests.post(
+            run_started_at = time.time()
+            run_response = api_request(
+                "POST",
                 f"{API_URL}/threads/{thread_id}/runs/stream",
+                "/threads/{thread_id}/runs/stream",
                 headers=headers,
                 json={
                     "assistant_id": ASSISTANT_ID,
                     "input": {
                         "user_prompt": complete_prompt
-                    }
+                    },
+                    # Only request the events the UI needs
+                    "stream_mode": parse_stream_modes(st.session_state.stream_modes),
+                    # Keep the run going if the connection drops so it can be rejoined
+                    "stream_resumable": True,
+                    "on_disconnect": "continue"
                 },
-                stream=True
+                stream=True,
+                timeout=stream_timeout()
             )
             run_response.raise_for_status()
             
+            # Register the run so it can be cancelled or reaped if the session goes away
+            run_id = run_id_from_response(run_response)
+            run_registry.register(session_id, thread_id, run_id, run_response)
+            st.session_state.active_run = {
+                "thread_id": thread_id,
+                "run_id": run_id,
+                "history_index": current_index,
+                "started_at": run_started_at,
+                "last_event_id": None
+            }
+            if run_id:
+                st.query_params["run"] = f"{thread_id}/{run_id}"
+            stop_placeholder.button(
+                "⏹️ Stop Generation",
+                key="stop_generation",
+                on_click=cancel_active_run,
+                use_container_width=True
+            )
+            
             # Process the stream
             generated_names, evaluations = process_stream_data(
-                run_response.iter_lines(),
+                iter_with_timeouts(iter_lines(run_response, "/threads/{thread_id}/runs/stream"), run_started_at),
                 results_container,
                 status_container,
                 progress_bar
             )
             
+            # The run finished normally, so it no longer needs lifecycle tracking
+            run_registry.unregister(session_id)
+            clear_active_run()
+            stop_placeholder.empty()
+            RUN_DURATION.labels(outcome="completed").observe(time.time() - run_started_at)
+            
+            # Pick up the complete final state once, rather than streaming it after every node
+            generated_names, evaluations = merge_final_state(thread_id, results_container)
+            
             # If we didn't get LangGraph data, try to get it directly from LangSmith
             if not st.session_state.langsmith_trace_ids and thread_id:
                 try:
                     # Get run details to extract LangSmith trace IDs
                     thread_runs = get_thread_runs(thread_id)
-                    logging.debug(f"Retrieved {len(thread_runs) if thread_runs else 0} runs for thread {thread_id}")
+                    logger.debug("Retrieved %d runs for thread %s", len(thread_runs) if thread_runs else 0, thread_id)
                     
                     if thread_runs:
+                        # Fetch the details of every run concurrently
+                        all_run_details = load_page_data({
+                            run["run_id"]: functools.partial(get_run_details, thread_id, run["run_id"])
+                            for run in thread_runs if run.get("run_id")
+                        })
                         for run in thread_runs:
                             run_id = run.get("run_id")
                             if run_id:
                                 # Add run ID to the trace IDs
                                 st.session_state.langsmith_trace_ids.add(run_id)
-                                logging.debug(f"Added run_id {run_id} from thread runs")
+                                logger.debug("Added run_id %s from thread runs", run_id)
                                 
                                 # Get the detailed run info
-                                run_details = get_run_details(thread_id, run_id)
+                                run_details = all_run_details.get(run_id)
                                 if run_details and "metadata" in run_details:
                                     metadata = run_details.get("metadata", {})
                                     # Look for trace IDs in metadata
                                     if "ls_run_id" in metadata:
                                         st.session_state.langsmith_trace_ids.add(metadata["ls_run_id"])
-                                        logging.debug(f"Added ls_run_id {metadata['ls_run_id']} from run metadata")
+                                        logger.debug("Added ls_run_id %s from run metadata", metadata["ls_run_id"])
                                     if "ls_parent_run_id" in metadata:
                                         st.session_state.langsmith_trace_ids.add(metadata["ls_parent_run_id"])
-                                        logging.debug(f"Added ls_parent_run_id {metadata['ls_parent_run_id']} from run metadata")
+                                        logger.debug("Added ls_parent_run_id %s from run metadata", metadata["ls_parent_run_id"])
                 except Exception as e:
-                    logging.error(f"Error fetching additional trace info: {str(e)}")
+                    logger.error("Error fetching additional trace info: %s", e)
             
             # Manual debug log if we didn't capture anything
             if len(st.session_state.raw_debug_data) == 0:
-                logging.warning("No debug data was captured during processing. Creating synthetic debug data.")
+                logger.warning("No debug data was captured during processing. Creating synthetic debug data.")
                 
                 # Create synthetic debug data
                 debug_entry = {
@@ -2291,11 +3446,13 @@ with tab1:
             current_run["evaluations"] = evaluations
             st.session_state.history[current_index] = current_run
             st.session_state.generation_complete = True
+            remember_prompt_result(complete_prompt, thread_id, generated_names)
+            index_generated_names(thread_id, generated_names)
 
             # Log the final results
-            logging.debug(f"Final generation results: {len(generated_names)} names")
+            logger.debug("Final generation results: %d names", len(generated_names))
             for name in generated_names:
-                logging.debug(f"Generated name: {name}")
+                logger.debug("Generated name: %s", name)
 
             # Ensure results are displayed clearly
             with results_container:
@@ -2344,6 +3501,7 @@ with tab1:
                         # Add category as caption if available
                         if isinstance(name_data, dict) and "naming_category" in name_data:
                             st.caption(f"Category: {name_data['naming_category']}")
+                        render_similar_names(name)
                         
                         if name in evaluations:
                             with st.expander("View analysis"):
@@ -2405,22 +3563,49 @@ with tab1:
             # Force refresh the history display
             st.rerun()
 
+        except RunTimeoutError as e:
+            # Free the backend slot held by the run
+            if not run_registry.cancel(session_id):
+                cancel_run(API_URL, API_KEY, current_run.get("thread_id"), (st.session_state.active_run or {}).get("run_id"))
+            clear_active_run()
+            stop_placeholder.empty()
+            RUN_DURATION.labels(outcome="timed out").observe(time.time() - run_started_at)
+            st.error(f"Generation stopped: {str(e)}")
+            current_run["status"] = "timed out"
+            current_run["error"] = str(e)
+            st.session_state.history[current_index] = current_run
         except requests.RequestException as e:
+            # If the stream dropped after the run started, rejoin it on the next rerun
+            if st.session_state.active_run and st.session_state.active_run.get("run_id"):
+                st.toast("Connection lost, reconnecting to the running generation...")
+                st.rerun()
+            run_registry.unregister(session_id)
+            clear_active_run()
+            stop_placeholder.empty()
             st.error(f"Error connecting to the API: {str(e)}")
             current_run["status"] = "failed"
             current_run["error"] = str(e)
             st.session_state.history[current_index] = current_run
             if st.checkbox("Show detailed error"):
                 st.code(str(e))
+        finally:
+            # Always release the connection; if the script was interrupted the run
+            # stays registered so it can be cancelled or reaped later
+            if run_response is not None:
+                run_response.close()
 
 # History tab
-with tab2:
+if main_view == "History":
+    profiler.enter("history")
+    index_past_generations()
+    
     st.subheader("Generation History")
     
     # Add refresh button
     if st.button("Refresh History"):
-        # Clear the cache to force fresh data fetch
-        st.cache_data.clear()
+        # Clear only the history caches; every session (and replica, with a shared backend) uses them
+        for cached_fetch in (fetch_all_threads, get_thread_history, get_thread_details, get_thread_runs):
+            cached_fetch.clear()
         st.toast("Refreshing data...")
         
         # Refresh the page to ensure all data is updated
@@ -2433,11 +3618,17 @@ with tab2:
                 if run.get("generated_names"):
                     st.session_state.history[i]["status"] = "completed"
     
-    # Create tabs for local and API history
-    history_tabs = st.tabs(["Current Session", "All Brand Name Generations"])
+    # Local and API history; like the main views, only the selected section runs
+    history_view = st.radio(
+        "History",
+        ["Current Session", "All Brand Name Generations", "Compare Generations"],
+        key="history_view",
+        horizontal=True,
+        label_visibility="collapsed"
+    )
     
     # Current session history
-    with history_tabs[0]:
+    if history_view == "Current Session":
         if not st.session_state.history:
             st.info("No generations in current session. Generate some brand names first!")
         else:
@@ -2448,75 +3639,34 @@ with tab2:
                     
                     # Display generated names, even for runs in "running" state that have results
                     if (run['status'] == "completed" or run.get("generated_names")) and run.get("generated_names"):
-                        st.write("**Generated Names:**")
-                        for name in run.get("generated_names", []):
-                            cols = st.columns([4, 1])
-                            with cols[0]:
-                                st.markdown(f"- **{name}**")
-                            with cols[1]:
-                                if name in st.session_state.favorite_names:
-                                    if st.button("❤️", key=f"h_unfav_{i}_{name}"):
-                                        remove_from_favorites(name)
-                                else:
-                                    if st.button("🤍", key=f"h_fav_{i}_{name}"):
-                                        add_to_favorites(name)
+                        render_run_names(i, run)
                     
                     # For runs that are still "running" but have no results, show a spinner
                     elif run['status'] == "running":
                         st.info("Generation in progress... Refresh to check for updates.")
                     
+                    run_timeline = get_timeline_store().get(run.get("thread_id"))
+                    if run_timeline is not None:
+                        if st.checkbox("Show node timeline", key=f"timeline_{i}"):
+                            render_node_timeline(run_timeline)
+                    
                     if run.get("thread_id"):
                         if st.button("Load Full Results", key=f"load_{i}"):
                             thread_data = get_thread_history(run["thread_id"])
-                            render_thread_data(thread_data)
+                            render_thread_data(thread_data, run["thread_id"])
     
     # All API history
-    with history_tabs[1]:
-        # Fetch all threads from API
-        with st.spinner("Loading past generations..."):
-            all_threads = fetch_all_threads()
-        
-        if not all_threads:
-            st.info("No generation history found in the API")
-        else:
-            st.success(f"Found {len(all_threads)} past generations")
-            
-            # First, show a summary table
-            thread_data = []
-            for thread in all_threads:
-                # Extract thread info
-                thread_id = thread.get("thread_id", "N/A")
-                created_at = thread.get("created_at", "Unknown")
-                if isinstance(created_at, str) and "T" in created_at:
-                    created_at = created_at.split("T")[0]
-                
-                # Add to table data
-                thread_data.append({
-                    "Thread ID": thread_id[:8] + "..." if len(thread_id) > 8 else thread_id,
-                    "Created": created_at,
-                    "Full Thread ID": thread_id  # For reference
-                })
-            
-            # Display as dataframe
-            df = pd.DataFrame(thread_data)
-            
-            # Add selection functionality
-            selected_thread = st.selectbox(
-                "Filter by thread id below:",
-                options=df["Full Thread ID"].tolist(),
-                format_func=lambda x: f"Thread {x[:8]}... - {df[df['Full Thread ID']==x]['Created'].iloc[0]}"
-            )
-            
-            # Show thread details when selected
-            if selected_thread:
-                st.markdown("**Brand Name Generation Report Details:**")
-                
-                # Get thread history
-                thread_history = get_thread_history(selected_thread)
-                
-                # Render thread data
-                render_thread_data(thread_history)
+    elif history_view == "All Brand Name Generations":
+        render_past_generations()
+
+    # Side-by-side comparison across threads
+    elif history_view == "Compare Generations":
+        render_generation_comparison(fetch_all_threads())
 
 # Footer
+profiler.enter("footer")
 st.markdown("---")
-st.caption("MAE Brand Namer | Powered by LangGraph AI") 
\ No newline at end of file
+st.caption("MAE Brand Namer | Powered by LangGraph AI") 
+
+if profiler.enabled:
+    render_profile_overlay(profiler)
\ No newline at end of file
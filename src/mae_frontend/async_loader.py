@@ -0,0 +1,161 @@
+"""
+Concurrent loading of page data.
+
+Independent API calls for a page render (thread history, details, runs and
+per-run details) are run side by side on a bounded worker pool instead of one
+after another, so a render waits for the slowest call rather than the sum of
+all of them. Streamlit code stays synchronous through PageLoader.gather.
+
+Each call runs with the caller's ScriptRunContext and logging context
+attached, so the existing cached fetchers (shared cache, retries, circuit
+breakers, st.error) behave exactly as they do inline. The pool is shared by
+every session in the process, which bounds how many calls are in flight at
+once. Each load gets its own api.CancelScope, grouped per session: cancelling
+a session (or a timed-out load) closes the responses its calls are reading
+and skips the calls that have not started yet.
+"""
+import concurrent.futures
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from mae_frontend.api import CancelScope, request_scope
+
+# Upper bound on concurrent calls across all sessions in this process
+LOADER_MAX_CONCURRENCY = int(os.getenv("LOADER_MAX_CONCURRENCY", "16"))
+
+# How long a page render waits for its data before giving up
+LOADER_TIMEOUT = float(os.getenv("LOADER_TIMEOUT", "120"))
+
+
+class PageLoadCancelled(Exception):
+    """Raised when a load is cancelled because its scope was cancelled"""
+
+
+def _run_call(fn: Callable[[], Any], script_ctx, cancel: CancelScope):
+    """Run fn on a pool thread with the caller's Streamlit context, inside the load's cancel scope"""
+    if cancel.cancelled:
+        raise PageLoadCancelled("Page load was cancelled before this call started")
+    if script_ctx is not None:
+        # Pool threads are shared by all sessions, so every call attaches its caller's context
+        add_script_run_ctx(threading.current_thread(), script_ctx)
+    with request_scope(cancel):
+        return fn()
+
+
+class PageLoader:
+    """
+    Runs independent blocking calls concurrently on a bounded thread pool.
+
+    Usage:
+        results = loader.gather({
+            "history": lambda: get_thread_history(thread_id),
+            "runs": lambda: get_thread_runs(thread_id),
+        }, scope=session_id)
+    """
+
+    def __init__(self, max_concurrency: int = LOADER_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="page-loader"
+        )
+        self._scopes: Dict[str, Set[CancelScope]] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def gather(self, calls: Dict[str, Callable[[], Any]], scope: Optional[str] = None,
+               timeout: float = LOADER_TIMEOUT) -> Dict[str, Any]:
+        """
+        Run the calls concurrently and return their results by name.
+
+        Args:
+            calls: Zero-argument callables keyed by name
+            scope: Cancellation scope, normally the browser session ID
+            timeout: Seconds to wait for all calls
+
+        Returns:
+            Dict mapping each name to its call's result
+
+        Raises:
+            The first exception raised by a call (after all calls have finished),
+            concurrent.futures.TimeoutError if the calls took longer than timeout, or
+            PageLoadCancelled if the scope was cancelled while waiting
+        """
+        if not calls:
+            return {}
+
+        cancel = CancelScope()
+        if scope is not None:
+            with self._lock:
+                self._scopes.setdefault(scope, set()).add(cancel)
+        try:
+            if len(calls) == 1:
+                # Nothing to overlap: run on the caller's thread, still cancellable
+                name, fn = next(iter(calls.items()))
+                try:
+                    with request_scope(cancel):
+                        results = {name: fn()}
+                except Exception as e:
+                    if cancel.cancelled:
+                        raise PageLoadCancelled(f"Page load for {scope} was cancelled") from e
+                    raise
+            else:
+                script_ctx = get_script_run_ctx()
+                # One context copy per call: a Context cannot be entered by two threads at once
+                futures = {
+                    name: self._executor.submit(contextvars.copy_context().run, _run_call, fn, script_ctx, cancel)
+                    for name, fn in calls.items()
+                }
+                _, pending = concurrent.futures.wait(futures.values(), timeout)
+                if pending:
+                    # Abort the calls still reading and drop the ones not started
+                    cancel.cancel()
+                    raise concurrent.futures.TimeoutError(f"Page load did not finish within {timeout:.0f}s")
+                results = None if cancel.cancelled else {name: future.result() for name, future in futures.items()}
+        finally:
+            if scope is not None:
+                with self._lock:
+                    pending_scopes = self._scopes.get(scope)
+                    if pending_scopes is not None:
+                        pending_scopes.discard(cancel)
+                        if not pending_scopes:
+                            del self._scopes[scope]
+
+        if cancel.cancelled:
+            # Results of cancelled calls are incomplete (fetchers turn the errors into empty values)
+            raise PageLoadCancelled(f"Page load for {scope} was cancelled")
+        return results
+
+    def cancel_scope(self, scope: str) -> int:
+        """Cancel every pending load in a scope, returning how many were cancelled"""
+        with self._lock:
+            pending = self._scopes.pop(scope, set())
+        for cancel in pending:
+            cancel.cancel()
+        return len(pending)
+
+    def reap(self, is_session_active: Callable[[str], bool]) -> int:
+        """Cancel loads whose session is no longer active"""
+        with self._lock:
+            stale = [scope for scope in self._scopes if not is_session_active(scope)]
+        return sum(self.cancel_scope(scope) for scope in stale)
+
+    def start_reaper(self, is_session_active: Callable[[str], bool], interval: float = 30.0):
+        """Start the background reaper thread (idempotent)"""
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+
+        def _loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reap(is_session_active)
+                except Exception:
+                    pass
+
+        self._reaper = threading.Thread(target=_loop, name="page-loader-reaper", daemon=True)
+        self._reaper.start()
@@ -0,0 +1,345 @@
+"""
+Compressed, content-addressed storage for large JSON payloads.
+
+Thread histories are long lists of checkpoints that repeat the same brand
+context, and successive fetches of a thread repeat almost everything. A
+BlobStore splits a JSON value into subtrees, stores every subtree larger than
+BLOB_MIN_SUBTREE_BYTES once under the SHA-256 of its canonical encoding, and
+replaces it in its parent with a reference. Identical state therefore costs
+one row however many checkpoints or fetches contain it.
+
+Blobs are compressed with zstd when the optional zstandard package is
+installed (with a trained dictionary if BLOB_ZSTD_DICT points to one), and
+with zlib otherwise. The codec is recorded per blob, so a store stays readable
+when zstandard is added or removed.
+
+Stored values are reached through named refs, which outlive the response
+cache: a thread history whose cache entry has expired is read back through its
+ref and only brought up to date (see checkpoint_sync). Refs not written for
+BLOB_RETENTION_DAYS are dropped, and blobs no longer reachable from any ref
+are garbage collected.
+
+The store is an optimisation, never a requirement: callers go through
+guarded(), which logs and counts failures (a locked or unwritable database)
+and returns None, and a circuit breaker skips the store after repeated
+failures.
+
+Configuration (environment):
+    BLOB_STORE_PATH          SQLite file holding the blobs (default data/blobs.db)
+    BLOB_MIN_SUBTREE_BYTES   Smallest encoded subtree stored as its own blob (default 512)
+    BLOB_ZSTD_LEVEL          zstd compression level (default 9)
+    BLOB_ZSTD_DICT           Trained zstd dictionary file (default none)
+    BLOB_RETENTION_DAYS      Days a ref is kept after it was last written (default 90)
+    BLOB_GC_INTERVAL         Seconds between garbage collection passes (default 3600)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Iterable, Optional
+
+from mae_frontend.jsoncodec import loads as json_loads
+from mae_frontend.logging_config import get_logger
+from mae_frontend.metrics import counter
+from mae_frontend.resilience import get_breaker
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is used instead
+    zstandard = None
+
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "data/blobs.db")
+BLOB_MIN_SUBTREE_BYTES = int(os.getenv("BLOB_MIN_SUBTREE_BYTES", "512"))
+BLOB_ZSTD_LEVEL = int(os.getenv("BLOB_ZSTD_LEVEL", "9"))
+BLOB_ZSTD_DICT = os.getenv("BLOB_ZSTD_DICT", "")
+BLOB_RETENTION_DAYS = float(os.getenv("BLOB_RETENTION_DAYS", "90"))
+BLOB_GC_INTERVAL = float(os.getenv("BLOB_GC_INTERVAL", "3600"))
+
+BLOB_WRITES = counter("mae_blob_writes_total", "Subtrees written to the blob store", ("result",))
+BLOB_BYTES = counter("mae_blob_bytes_total", "Bytes of new blobs before and after compression", ("kind",))
+BLOB_ERRORS = counter("mae_blob_errors_total", "Blob store operations that failed", ("op",))
+
+logger = get_logger("blobs")
+
+# Key standing in for a stored subtree; a NUL-prefixed key cannot come from the API
+REF_KEY = "\x00blob"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS blobs ("
+    "hash TEXT PRIMARY KEY, codec TEXT NOT NULL, data BLOB NOT NULL, "
+    "raw_size INTEGER NOT NULL, stored_size INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS edges (parent TEXT NOT NULL, child TEXT NOT NULL, PRIMARY KEY (parent, child))",
+    "CREATE TABLE IF NOT EXISTS refs (name TEXT PRIMARY KEY, hash TEXT NOT NULL, updated_at REAL NOT NULL)",
+)
+
+
+def canonical_json(value) -> bytes:
+    """Encoding used for hashing: equal values always produce equal bytes"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class Codec:
+    """Compresses blobs with zstd (optionally with a dictionary) or zlib"""
+
+    def __init__(self, level: int = BLOB_ZSTD_LEVEL, dictionary_path: str = BLOB_ZSTD_DICT):
+        self.name = "zlib"
+        self._compressor = self._decompressor = None
+        if zstandard is None:
+            if dictionary_path:
+                logger.warning("BLOB_ZSTD_DICT is set but zstandard is not installed; using zlib")
+            return
+        dictionary = None
+        if dictionary_path:
+            try:
+                with open(dictionary_path, "rb") as f:
+                    dictionary = zstandard.ZstdCompressionDict(f.read())
+            except OSError:
+                logger.exception("Could not read the zstd dictionary %s; compressing without it", dictionary_path)
+        if dictionary is not None:
+            self.name = f"zstd-d{dictionary.dict_id()}"
+            self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        else:
+            self.name = "zstd"
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+        # zstd contexts are not safe to share between threads
+        self._lock = threading.Lock()
+
+    def compress(self, data: bytes) -> bytes:
+        if self._compressor is None:
+            return zlib.compress(data, 6)
+        with self._lock:
+            return self._compressor.compress(data)
+
+    def decompress(self, codec: str, data: bytes) -> Optional[bytes]:
+        """Decompress a blob, or None if it was written with a codec this process lacks"""
+        if codec == "zlib":
+            return zlib.decompress(data)
+        if codec == "zstd" and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(data)
+        if codec == self.name:
+            with self._lock:
+                return self._decompressor.decompress(data)
+        return None
+
+
+def train_dictionary(samples: Iterable, size: int = 112 * 1024) -> bytes:
+    """
+    Train a zstd dictionary from sample JSON values (e.g. a few hundred thread histories).
+
+    Save the result to a file and point BLOB_ZSTD_DICT at it. Requires zstandard.
+    """
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary requires the zstandard package")
+    encoded = [canonical_json(sample) for sample in samples]
+    return zstandard.train_dictionary(size, encoded).as_bytes()
+
+
+class BlobStore:
+    """SQLite store of compressed, deduplicated JSON subtrees, safe to share across threads"""
+
+    def __init__(self, path: str = BLOB_STORE_PATH, min_subtree_bytes: int = BLOB_MIN_SUBTREE_BYTES,
+                 codec: Optional[Codec] = None):
+        self.path = path
+        self.min_subtree_bytes = min_subtree_bytes
+        self.codec = codec or Codec()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._last_gc = time.time()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def _split(self, value, pending: dict):
+        """
+        Replace large subtrees of value with refs, bottom-up.
+
+        Returns the value with refs and the hashes of the blobs it references directly.
+        Small subtrees are re-encoded by each parent, but only up to the subtree threshold,
+        so encoding stays roughly linear in the size of the value.
+        New blobs are collected in pending as hash -> (encoded bytes, child hashes).
+        """
+        if isinstance(value, dict):
+            items = [(key, self._split(item, pending)) for key, item in value.items()]
+            node = {key: split[0] for key, split in items}
+            children = {child for _, split in items for child in split[1]}
+        elif isinstance(value, list):
+            splits = [self._split(item, pending) for item in value]
+            node = [split[0] for split in splits]
+            children = {child for split in splits for child in split[1]}
+        else:
+            return value, set()
+
+        encoded = canonical_json(node)
+        if len(encoded) < self.min_subtree_bytes:
+            return node, children
+        digest = hashlib.sha256(encoded).hexdigest()
+        pending.setdefault(digest, (encoded, children))
+        return {REF_KEY: digest}, {digest}
+
+    def put(self, value) -> str:
+        """Store a JSON value and return the hash of its root blob"""
+        pending = {}
+        node, children = self._split(value, pending)
+        if isinstance(node, dict) and set(node) == {REF_KEY}:
+            root = node[REF_KEY]
+        else:
+            # Values below the subtree threshold still get a root blob of their own
+            encoded = canonical_json(node)
+            root = hashlib.sha256(encoded).hexdigest()
+            pending.setdefault(root, (encoded, children))
+
+        with self._lock:
+            placeholders = ",".join("?" * len(pending))
+            existing = {row[0] for row in self._conn.execute(
+                f"SELECT hash FROM blobs WHERE hash IN ({placeholders})", list(pending))}
+            new = {digest: entry for digest, entry in pending.items() if digest not in existing}
+            rows, raw_bytes, stored_bytes = [], 0, 0
+            for digest, (encoded, _) in new.items():
+                data = self.codec.compress(encoded)
+                rows.append((digest, self.codec.name, sqlite3.Binary(data), len(encoded), len(data)))
+                raw_bytes += len(encoded)
+                stored_bytes += len(data)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO blobs (hash, codec, data, raw_size, stored_size) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO edges (parent, child) VALUES (?, ?)",
+                    [(digest, child) for digest, (_, children) in new.items() for child in children],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        BLOB_WRITES.labels(result="new").inc(len(new))
+        BLOB_WRITES.labels(result="dedup").inc(len(pending) - len(new))
+        BLOB_BYTES.labels(kind="raw").inc(raw_bytes)
+        BLOB_BYTES.labels(kind="stored").inc(stored_bytes)
+        return root
+
+    def _load(self, digest: str, blobs: dict):
+        """Fetch a blob and every blob below it, one query per tree level"""
+        wanted = [digest]
+        while wanted:
+            placeholders = ",".join("?" * len(wanted))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT hash, codec, data FROM blobs WHERE hash IN ({placeholders})", wanted
+                ).fetchall()
+                children = self._conn.execute(
+                    f"SELECT child FROM edges WHERE parent IN ({placeholders})", wanted
+                ).fetchall()
+            if len(rows) < len(set(wanted)):
+                return False
+            for row_hash, codec, data in rows:
+                raw = self.codec.decompress(codec, bytes(data))
+                if raw is None:
+                    logger.warning("Blob %s uses codec %s, which is not available", row_hash, codec)
+                    return False
+                blobs[row_hash] = json_loads(raw)
+            wanted = list({child for (child,) in children} - set(blobs))
+        return True
+
+    def get(self, digest: str):
+        """Rebuild a stored value from its root hash, or None if any part of it is missing"""
+        blobs = {}
+        if not self._load(digest, blobs):
+            return None
+
+        def resolve(node):
+            if isinstance(node, dict):
+                if len(node) == 1 and REF_KEY in node:
+                    return resolve(blobs[node[REF_KEY]])
+                return {key: resolve(item) for key, item in node.items()}
+            if isinstance(node, list):
+                return [resolve(item) for item in node]
+            return node
+
+        return resolve(blobs[digest])
+
+    def set_ref(self, name: str, digest: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refs (name, hash, updated_at) VALUES (?, ?, ?)", (name, digest, time.time())
+            )
+        if time.time() - self._last_gc > BLOB_GC_INTERVAL:
+            self.collect_garbage()
+
+    def get_ref(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT hash FROM refs WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def collect_garbage(self, retention_days: float = BLOB_RETENTION_DAYS) -> int:
+        """Drop expired refs and every blob no ref reaches; returns the number of blobs removed"""
+        self._last_gc = time.time()
+        cutoff = time.time() - retention_days * 86400
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM refs WHERE updated_at < ?", (cutoff,))
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS live (hash TEXT PRIMARY KEY)")
+                self._conn.execute("DELETE FROM live")
+                self._conn.execute(
+                    "WITH RECURSIVE reach(hash) AS ("
+                    "SELECT hash FROM refs UNION "
+                    "SELECT edges.child FROM edges JOIN reach ON edges.parent = reach.hash) "
+                    "INSERT INTO live SELECT hash FROM reach"
+                )
+                removed = self._conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM live)").rowcount
+                self._conn.execute("DELETE FROM edges WHERE parent NOT IN (SELECT hash FROM live)")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if removed:
+            logger.info("Removed %d unreferenced blobs", removed)
+        return removed
+
+    def get_value(self, name: str):
+        """The value a ref points at, or None if the ref or any part of the value is missing"""
+        digest = self.get_ref(name)
+        return self.get(digest) if digest else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
+
+
+_breaker = get_breaker("blobs")
+
+
+def guarded(op: str, fn, *args):
+    """Run a blob store operation, returning None instead of raising if the store fails"""
+    if not _breaker.allow():
+        return None
+    try:
+        result = fn(*args)
+    except Exception:
+        _breaker.record_failure()
+        BLOB_ERRORS.labels(op=op).inc()
+        logger.warning("Blob store %s failed", op, exc_info=True)
+        return None
+    _breaker.record_success()
+    return result
@@ -0,0 +1,299 @@
+"""
+Pluggable cache backends for API responses.
+
+st.cache_data is private to one process, so every replica behind a load
+balancer warms its own copy of the same threads and runs. The API fetchers
+instead cache through a CacheBackend chosen by CACHE_BACKEND:
+
+    memory  In-process LRU bounded by total bytes (one cache per process)
+    sqlite  SQLite file bounded by total bytes, shared by every process on the host
+            (or on a shared volume)
+    redis   Redis, shared by every replica; size is bounded by the server's
+            maxmemory / allkeys-lru policy
+
+Values are stored as bytes with a TTL. Backend failures are logged and
+treated as misses, and repeated failures open a circuit breaker that bypasses
+the backend for a while, so a cache outage slows the app down but never
+breaks it.
+
+Configuration (environment):
+    CACHE_BACKEND      memory, sqlite or redis (default memory)
+    CACHE_MAX_BYTES    Byte budget for the memory and sqlite backends (default 64 MiB)
+    CACHE_SQLITE_PATH  SQLite cache file (default data/cache.db)
+    CACHE_REDIS_URL    Redis URL (default redis://localhost:6379/0)
+    CACHE_KEY_PREFIX   Prefix for every key, to share one Redis between apps (default mae:)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from mae_frontend.logging_config import get_logger
+from mae_frontend.metrics import counter, gauge
+from mae_frontend.resilience import get_breaker
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 ** 2)))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "data/cache.db")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "mae:")
+
+CACHE_EVICTIONS = counter("mae_cache_evictions_total", "Entries evicted to stay within the byte budget", ("backend",))
+CACHE_ERRORS = counter("mae_cache_errors_total", "Cache backend operations that failed", ("backend", "op"))
+CACHE_BYTES = gauge("mae_cache_bytes", "Bytes held by the memory or sqlite response cache")
+
+logger = get_logger("cache")
+
+
+class CacheBackend:
+    """Bytes-in, bytes-out cache with per-entry TTLs"""
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str = ""):
+        """Drop every entry whose key starts with prefix (everything for "")"""
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Thread-safe in-process LRU bounded by the total size of its values"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        CACHE_BYTES.set_function(lambda: self.bytes)
+
+    def _drop(self, key: str):
+        _, value = self._entries.pop(key)
+        self.bytes -= len(value)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + ttl, value)
+            self.bytes += len(value)
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                CACHE_EVICTIONS.labels(backend=self.name).inc()
+
+    def delete_prefix(self, prefix: str = ""):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._drop(key)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    SQLite-backed cache bounded by total value size, evicting least recently used entries.
+
+    Every process on the host opens the same file (WAL mode), so replicas share hits.
+    """
+
+    name = "sqlite"
+
+    # Recording every read would turn hits into writes; refresh access times at most this often
+    TOUCH_INTERVAL = 30.0
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        CACHE_BYTES.set_function(self._total_bytes)
+
+    def _total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, accessed_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            if now - accessed_at > self.TOUCH_INTERVAL:
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, sqlite3.Binary(value), len(value), now + ttl, now),
+                )
+                self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+                evicted = 0
+                while total > self.max_bytes:
+                    oldest = self._conn.execute(
+                        "SELECT key, size FROM cache WHERE key != ? ORDER BY accessed_at LIMIT 1", (key,)
+                    ).fetchone()
+                    if oldest is None:
+                        break
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (oldest[0],))
+                    total -= oldest[1]
+                    evicted += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if evicted:
+            CACHE_EVICTIONS.labels(backend=self.name).inc(evicted)
+
+    def delete_prefix(self, prefix: str = ""):
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",))
+
+
+class RedisBackend(CacheBackend):
+    """Redis cache shared by every replica; requires the optional redis package"""
+
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_REDIS_URL, client=None):
+        """Connect to url, or use an existing redis-py compatible client (e.g. fakeredis)"""
+        self.url = url
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self._client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def delete_prefix(self, prefix: str = ""):
+        keys = list(self._client.scan_iter(match=f"{prefix}*", count=500))
+        for start in range(0, len(keys), 500):
+            self._client.delete(*keys[start:start + 500])
+
+
+class SafeBackend(CacheBackend):
+    """
+    Wraps a backend so failures are logged and counted instead of raised.
+
+    A circuit breaker skips the backend after repeated failures, so an unreachable
+    Redis costs one timeout now and then rather than one per lookup.
+    """
+
+    def __init__(self, backend: CacheBackend, key_prefix: str = CACHE_KEY_PREFIX):
+        self.backend = backend
+        self.name = backend.name
+        self.key_prefix = key_prefix
+        self._breaker = get_breaker(f"cache:{backend.name}")
+
+    def _call(self, op: str, fn, *args):
+        if not self._breaker.allow():
+            return None
+        try:
+            result = fn(*args)
+        except Exception:
+            self._breaker.record_failure()
+            CACHE_ERRORS.labels(backend=self.name, op=op).inc()
+            logger.warning("Cache %s failed on the %s backend", op, self.name, exc_info=True)
+            return None
+        self._breaker.record_success()
+        return result
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._call("get", self.backend.get, self.key_prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._call("set", self.backend.set, self.key_prefix + key, value, ttl)
+
+    def delete_prefix(self, prefix: str = ""):
+        self._call("delete", self.backend.delete_prefix, self.key_prefix + prefix)
+
+
+def cache_key(namespace: str, *parts) -> str:
+    """Key for a cached call: the namespace plus a digest of its arguments"""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest[:32]}"
+
+
+def create_backend(kind: str = CACHE_BACKEND) -> CacheBackend:
+    """Build the configured backend, falling back to memory if it cannot be set up"""
+    try:
+        if kind == "sqlite":
+            backend = SQLiteBackend()
+        elif kind == "redis":
+            backend = RedisBackend()
+        else:
+            if kind != "memory":
+                logger.warning("Unknown CACHE_BACKEND %r; using the in-memory cache", kind)
+            backend = MemoryBackend()
+    except ImportError:
+        logger.warning("CACHE_BACKEND=%s needs the %s package; using the in-memory cache", kind, kind)
+        backend = MemoryBackend()
+    except Exception:
+        logger.exception("Could not set up the %s cache backend; using the in-memory cache", kind)
+        backend = MemoryBackend()
+    return SafeBackend(backend)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> CacheBackend:
+    """Return the process-wide cache backend"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
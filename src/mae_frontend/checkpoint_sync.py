@@ -0,0 +1,157 @@
+"""
+Incremental sync of thread histories.
+
+Refreshing a running thread used to download its whole checkpoint list
+again. CheckpointSync remembers, per thread, the newest checkpoint it has seen
+and the extracted history (see history_extract) built from it. On the next
+refresh it pages through the history endpoint newest first, starting with a
+single checkpoint and widening the page up to HISTORY_PAGE_SIZE, using each
+page's oldest checkpoint as the next page's `before`. It stops at the
+checkpoint it already knows. A refresh of an unchanged thread therefore costs
+one checkpoint, and a refresh during a run costs only the steps since the
+last one. The new checkpoints are pruned to the report's keys and merged over
+the cached values, so keys they do not carry keep their earlier values.
+
+A thread this process has not synced yet starts from its last stored
+history when the caller can provide one (the blob store keeps them for
+months), so a restart or an expired cache entry costs a short sync too.
+
+A full fetch is used for threads with no known history, when the known checkpoint
+is no longer in the history (e.g. the thread was rewound), or when more than
+HISTORY_SYNC_MAX_NEW checkpoints arrived since the last sync.
+
+Configuration (environment):
+    HISTORY_PAGE_SIZE       Largest page requested while syncing (default 10)
+    HISTORY_SYNC_MAX_NEW    New checkpoints fetched incrementally before a full fetch is used
+                            instead (default 100)
+    HISTORY_SYNC_THREADS    Threads whose sync state is kept (default 500)
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from mae_frontend.history_extract import REPORT_KEYS, prune_history
+from mae_frontend.logging_config import get_logger
+from mae_frontend.metrics import counter
+
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "10"))
+HISTORY_SYNC_MAX_NEW = int(os.getenv("HISTORY_SYNC_MAX_NEW", "100"))
+HISTORY_SYNC_THREADS = int(os.getenv("HISTORY_SYNC_THREADS", "500"))
+
+HISTORY_SYNCS = counter("mae_history_syncs_total", "Thread history refreshes by how they were served", ("mode",))
+HISTORY_SYNC_CHECKPOINTS = counter("mae_history_sync_checkpoints_total", "Checkpoints downloaded by history syncs")
+
+logger = get_logger("history")
+
+
+def checkpoint_id(checkpoint) -> Optional[str]:
+    """ID of a history entry or of an extracted history's newest checkpoint"""
+    if not isinstance(checkpoint, dict):
+        return None
+    config = checkpoint.get("checkpoint")
+    if isinstance(config, dict):
+        return config.get("checkpoint_id")
+    return checkpoint.get("checkpoint_id")
+
+
+def merge_history(newer: List[dict], cached: List[dict]) -> List[dict]:
+    """Overlay an extracted history of newer checkpoints on the cached one"""
+    if not newer:
+        return cached
+    if not cached:
+        return newer
+    merged = dict(newer[0])
+    merged["values"] = {**cached[0].get("values", {}), **newer[0].get("values", {})}
+    return [merged]
+
+
+class CheckpointSync:
+    """
+    Per-thread sync state for thread histories, shared by every session.
+
+    Args:
+        fetch_full: Returns a thread's whole history, already extracted
+        fetch_page: Returns raw history entries, newest first, for (thread_id, limit, before);
+            before is None for the newest page
+        load_stored: Returns the extracted history last stored for a thread, or None;
+            consulted for threads without sync state
+    """
+
+    def __init__(self, fetch_full: Callable[[str], List[dict]],
+                 fetch_page: Callable[[str, int, Optional[dict]], list],
+                 page_size: int = HISTORY_PAGE_SIZE, max_new: int = HISTORY_SYNC_MAX_NEW,
+                 max_threads: int = HISTORY_SYNC_THREADS, keys=REPORT_KEYS,
+                 load_stored: Optional[Callable[[str], Optional[List[dict]]]] = None):
+        self.fetch_full = fetch_full
+        self.fetch_page = fetch_page
+        self.load_stored = load_stored
+        self.page_size = max(1, page_size)
+        self.max_new = max_new
+        self.max_threads = max_threads
+        self.keys = keys
+        # thread_id -> (newest checkpoint id, extracted history)
+        self._threads: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, thread_id: str, history: List[dict]):
+        newest = checkpoint_id(history[0]) if history else None
+        with self._lock:
+            if newest is None:
+                self._threads.pop(thread_id, None)
+                return
+            self._threads[thread_id] = (newest, history)
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+
+    def _newer_checkpoints(self, thread_id: str, known: str) -> Optional[list]:
+        """Entries newer than the known checkpoint, or None if a full fetch is needed"""
+        newer, before, limit = [], None, 1
+        while len(newer) <= self.max_new:
+            page = self.fetch_page(thread_id, limit, before)
+            HISTORY_SYNC_CHECKPOINTS.inc(len(page))
+            for entry in page:
+                if checkpoint_id(entry) == known:
+                    return newer
+                newer.append(entry)
+            if len(page) < limit or not isinstance(newer[-1].get("checkpoint"), dict):
+                # Reached the start of the history without meeting the known checkpoint
+                return None
+            before = newer[-1]["checkpoint"]
+            limit = min(limit * 2, self.page_size)
+        return None
+
+    def sync(self, thread_id: str) -> List[dict]:
+        """Return the thread's extracted history, downloading only what changed since the last sync"""
+        with self._lock:
+            state = self._threads.get(thread_id)
+        if state is None and self.load_stored is not None:
+            stored = self.load_stored(thread_id)
+            if stored and checkpoint_id(stored[0]) is not None:
+                state = (checkpoint_id(stored[0]), stored)
+
+        if state is not None:
+            known, cached = state
+            newer = self._newer_checkpoints(thread_id, known)
+            if newer is not None:
+                HISTORY_SYNCS.labels(mode="incremental" if newer else "unchanged").inc()
+                if not newer:
+                    return cached
+                history = merge_history(prune_history(newer, self.keys), cached)
+                self._remember(thread_id, history)
+                return history
+            logger.info("Checkpoint %s of thread %s not found in recent history; fetching it whole", known, thread_id)
+
+        HISTORY_SYNCS.labels(mode="full").inc()
+        history = self.fetch_full(thread_id)
+        self._remember(thread_id, history)
+        return history
+
+    def forget(self, thread_id: Optional[str] = None):
+        """Drop the sync state of one thread, or of all threads"""
+        with self._lock:
+            if thread_id is None:
+                self._threads.clear()
+            else:
+                self._threads.pop(thread_id, None)
@@ -0,0 +1,127 @@
+"""
+Conditional fetching for API resources that rarely change.
+
+Most refreshes of thread details, thread runs and run details return exactly
+what was fetched a minute earlier. conditional_get keeps the last parsed body
+of each URL with its validators:
+- if the server sent an ETag or Last-Modified, the next request carries
+  If-None-Match / If-Modified-Since, and a 304 reuses the parsed body without
+  downloading or parsing anything
+- if the caller says the last body cannot change any more (e.g. a run that
+  has finished), no request is made at all
+Either way the cached entry is revalidated and its value kept, rather than
+replaced.
+
+Configuration (environment):
+    CONDITIONAL_CACHE_SIZE   Resources whose last body and validators are kept (default 1024)
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional
+
+import requests
+
+from mae_frontend import jsoncodec
+from mae_frontend.api import api_request
+from mae_frontend.metrics import counter
+
+CONDITIONAL_CACHE_SIZE = int(os.getenv("CONDITIONAL_CACHE_SIZE", "1024"))
+
+CONDITIONAL_REQUESTS = counter(
+    "mae_conditional_requests_total",
+    "Conditional fetches by endpoint and outcome (not_modified, settled, modified, unvalidated)",
+    ("endpoint", "result"),
+)
+
+
+class Validated(NamedTuple):
+    value: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class ValidatorCache:
+    """Bounded LRU of the last parsed body and validators per URL"""
+
+    def __init__(self, max_entries: int = CONDITIONAL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Validated]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Validated]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, entry: Validated):
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, url: str):
+        with self._lock:
+            self._entries.pop(url, None)
+
+
+VALIDATORS = ValidatorCache()
+
+
+class Fetched(NamedTuple):
+    value: Any  # parsed body; None unless status_code is 200
+    status_code: int
+    revalidated: bool  # True if value is the cached copy (304 or settled)
+    response: Optional[requests.Response]  # None when no request was made
+
+
+def conditional_get(url: str, endpoint: str, headers: dict, settled: Optional[Callable[[Any], bool]] = None,
+                    cache: ValidatorCache = VALIDATORS, **kwargs) -> Fetched:
+    """
+    GET a JSON resource, revalidating the last copy instead of downloading it again.
+
+    Args:
+        url: Full request URL
+        endpoint: Path template used as the metric label
+        headers: Request headers; validators are added to a copy
+        settled: Returns True for a cached value that can no longer change, which is then
+            reused without a request
+        cache: Where last bodies and validators are kept
+        **kwargs: Passed through to api_request (retry defaults to True)
+
+    Returns:
+        The parsed body (fresh or revalidated) with the status it was served with
+    """
+    cached = cache.get(url)
+    if cached is not None and settled is not None and settled(cached.value):
+        CONDITIONAL_REQUESTS.labels(endpoint=endpoint, result="settled").inc()
+        return Fetched(cached.value, 200, True, None)
+
+    request_headers = dict(headers)
+    if cached is not None:
+        if cached.etag:
+            request_headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            request_headers["If-Modified-Since"] = cached.last_modified
+
+    kwargs.setdefault("retry", True)
+    response = api_request("GET", url, endpoint, headers=request_headers, **kwargs)
+    if response.status_code == 304 and cached is not None:
+        CONDITIONAL_REQUESTS.labels(endpoint=endpoint, result="not_modified").inc()
+        return Fetched(cached.value, 200, True, response)
+    if response.status_code != 200:
+        return Fetched(None, response.status_code, False, response)
+
+    value = jsoncodec.response_json(response)
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified or settled is not None:
+        cache.put(url, Validated(value, etag, last_modified))
+        CONDITIONAL_REQUESTS.labels(endpoint=endpoint, result="modified").inc()
+    else:
+        cache.discard(url)
+        CONDITIONAL_REQUESTS.labels(endpoint=endpoint, result="unvalidated").inc()
+    return Fetched(value, 200, False, response)
@@ -0,0 +1,81 @@
+"""
+Application configuration, loaded once per process.
+
+Streamlit re-executes app.py on every interaction, so reading .env there
+means a disk read on every click. The configuration is instead loaded on
+first use and cached for the life of the process; reload_config() re-reads
+.env explicitly (e.g. from the Developer Options sidebar).
+
+Most modules read their own settings (timeouts, cache sizes, backends) from
+the environment when they are imported, so .env is loaded by the package
+itself, before any of them. Those settings are fixed for the life of the
+process; reload_config() only refreshes the AppConfig fields.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """Settings read from the environment"""
+
+    api_url: Optional[str]
+    assistant_id: Optional[str]
+    api_key: Optional[str]
+    metrics_port: int = 0
+    metrics_addr: str = "127.0.0.1"
+    metrics_file: Optional[str] = None
+    metrics_file_interval: float = 15.0
+
+    @classmethod
+    def from_env(cls) -> "AppConfig":
+        return cls(
+            api_url=os.getenv("LANGGRAPH_STUDIO_URL") or None,
+            assistant_id=os.getenv("LANGGRAPH_ASSISTANT_ID") or None,
+            api_key=os.getenv("LANGGRAPH_API_KEY") or None,
+            metrics_port=int(os.getenv("METRICS_PORT", "0") or 0),
+            metrics_addr=os.getenv("METRICS_ADDR", "127.0.0.1"),
+            metrics_file=os.getenv("METRICS_FILE") or None,
+            metrics_file_interval=float(os.getenv("METRICS_FILE_INTERVAL", "15")),
+        )
+
+    def missing(self) -> list:
+        """Names of required environment variables that are not set"""
+        required = {
+            "LANGGRAPH_STUDIO_URL": self.api_url,
+            "LANGGRAPH_ASSISTANT_ID": self.assistant_id,
+            "LANGGRAPH_API_KEY": self.api_key,
+        }
+        return [name for name, value in required.items() if not value]
+
+
+_config: Optional[AppConfig] = None
+_lock = threading.Lock()
+
+
+def load_env():
+    """Load .env into the environment; .env values win over the inherited environment, as they always have"""
+    load_dotenv(override=True)
+
+
+def get_config() -> AppConfig:
+    """Return the process-wide configuration, read on first use from the environment .env was loaded into"""
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                _config = AppConfig.from_env()
+    return _config
+
+
+def reload_config() -> AppConfig:
+    """Re-read .env (overriding the current environment) and replace the cached configuration"""
+    global _config
+    with _lock:
+        load_env()
+        _config = AppConfig.from_env()
+    return _config
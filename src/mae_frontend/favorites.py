@@ -0,0 +1,180 @@
+"""
+Persistent favorites.
+
+Favorites are stored per user in a local SQLite database, so they survive
+the end of a session and are shared by every session of the same user across
+app processes. Each session keeps its user's favorites in memory as an
+ordered set (an insertion-ordered dict keyed by name). Membership checks
+while rendering long histories are then constant-time, and only adds and
+removes touch the database.
+
+Users without an account are identified by a random ID (see new_user_id) that
+the app keeps in a browser cookie, so their favorites are per browser and the
+ID never appears in a shareable link.
+
+Each favorite records the thread it came from, its overall score (when
+known) and arbitrary metadata, and a user's favorites can be exported in
+bulk as CSV or JSON.
+
+Configuration (environment):
+    FAVORITES_DB   SQLite database file (default data/favorites.db)
+"""
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+FAVORITES_DB = os.getenv("FAVORITES_DB", "data/favorites.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS favorites (
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    thread_id TEXT,
+    score REAL,
+    metadata TEXT,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (user_id, name)
+)
+"""
+
+EXPORT_FIELDS = ["name", "thread_id", "score", "added_at", "metadata"]
+
+_ANONYMOUS_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def new_user_id() -> str:
+    """A random, unguessable ID for a user without an account"""
+    return uuid.uuid4().hex
+
+
+def is_anonymous_user_id(value) -> bool:
+    """Whether value has the form of an ID from new_user_id (e.g. before trusting a cookie)"""
+    return isinstance(value, str) and _ANONYMOUS_ID.fullmatch(value) is not None
+
+
+class FavoritesStore:
+    """SQLite table of favorites keyed by (user, name), safe to share across threads"""
+
+    def __init__(self, path: str = FAVORITES_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                # Other app processes read and write the same file
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(_SCHEMA)
+
+    def load(self, user_id: str) -> List[dict]:
+        """All favorites of a user, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, thread_id, score, metadata, added_at FROM favorites "
+                "WHERE user_id = ? ORDER BY added_at",
+                (user_id,),
+            ).fetchall()
+        return [
+            {"name": name, "thread_id": thread_id, "score": score,
+             "metadata": json.loads(metadata) if metadata else {}, "added_at": added_at}
+            for name, thread_id, score, metadata, added_at in rows
+        ]
+
+    def save(self, user_id: str, record: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO favorites (user_id, name, thread_id, score, metadata, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, record["name"], record.get("thread_id"), record.get("score"),
+                 json.dumps(record.get("metadata") or {}, default=str), record["added_at"]),
+            )
+
+    def delete(self, user_id: str, name: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM favorites WHERE user_id = ? AND name = ?", (user_id, name))
+
+    def reassign(self, from_user: str, to_user: str) -> int:
+        """Move a user's favorites to another user ID, keeping the target's own copy of any shared name"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                moved = self._conn.execute(
+                    "UPDATE OR IGNORE favorites SET user_id = ? WHERE user_id = ?", (to_user, from_user)
+                ).rowcount
+                self._conn.execute("DELETE FROM favorites WHERE user_id = ?", (from_user,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return moved
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Favorites:
+    """A user's favorites as an in-memory ordered set, written through to the store"""
+
+    def __init__(self, store: FavoritesStore, user_id: str):
+        self.store = store
+        self.user_id = user_id
+        self._records: Dict[str, dict] = {record["name"]: record for record in store.load(user_id)}
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and name in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._records))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, name: str, thread_id: Optional[str] = None, score: Optional[float] = None,
+            metadata: Optional[dict] = None) -> bool:
+        """Add a name; returns False if it was already a favorite"""
+        if name in self._records:
+            return False
+        record = {"name": name, "thread_id": thread_id, "score": score,
+                  "metadata": metadata or {}, "added_at": time.time()}
+        self.store.save(self.user_id, record)
+        self._records[name] = record
+        return True
+
+    def remove(self, name: str) -> bool:
+        """Remove a name; returns False if it was not a favorite"""
+        if name not in self._records:
+            return False
+        self.store.delete(self.user_id, name)
+        del self._records[name]
+        return True
+
+    def get(self, name: str) -> Optional[dict]:
+        return self._records.get(name)
+
+    def records(self) -> List[dict]:
+        return list(self._records.values())
+
+    def reload(self):
+        """Pick up favorites added by the same user in other sessions"""
+        self._records = {record["name"]: record for record in self.store.load(self.user_id)}
+
+    def export_json(self) -> str:
+        return json.dumps(self.records(), indent=2, default=str)
+
+    def export_csv(self) -> str:
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for record in self.records():
+            writer.writerow({**record, "metadata": json.dumps(record.get("metadata") or {}, default=str)})
+        return output.getvalue()
@@ -0,0 +1,161 @@
+"""
+Selective extraction of thread history responses.
+
+/threads/{id}/history lists every checkpoint of a thread, newest first, and
+each checkpoint carries the whole state at that step, so the payload grows
+with steps times state size. The report only needs the latest value of a
+known set of state keys. read_history keeps, for each of REPORT_KEYS, the
+value from the newest checkpoint that has it, plus the newest checkpoint's
+own fields, and returns them as a one-checkpoint history that
+find_value_in_data and the renderers read like the full one.
+
+When ijson is installed the body is parsed incrementally while it
+downloads: only the wanted values are built, everything else is discarded as
+it streams past, and the download stops once every key has been found. Peak
+memory then follows the extracted data rather than the payload. Without
+ijson the body is parsed whole with jsoncodec and pruned the same way.
+
+Configuration (environment):
+    HISTORY_STREAMING   Extract histories while downloading when ijson is installed (default true)
+"""
+import os
+from typing import Iterable, List
+
+from mae_frontend import jsoncodec
+from mae_frontend.api import iter_body
+
+try:
+    import ijson
+except ImportError:  # optional; histories are parsed whole instead
+    ijson = None
+
+HISTORY_STREAMING = os.getenv("HISTORY_STREAMING", "true").strip().lower() in ("1", "true", "yes", "on")
+
+# Whether read_history parses while downloading (and so needs a streamed response)
+STREAMING = HISTORY_STREAMING and ijson is not None
+
+# State keys read by the report, the comparison view and the name index
+REPORT_KEYS = frozenset({
+    "user_prompt",
+    "brand_identity_brief", "brand_promise", "brand_values", "brand_purpose", "brand_mission",
+    "brand_personality", "brand_tone_of_voice",
+    "target_audience", "customer_needs", "market_positioning", "competitive_landscape",
+    "industry_focus", "industry_trends",
+    "generated_names", "shortlisted_names", "evaluation_results",
+    "linguistic_analysis_results", "semantic_analysis_results", "cultural_analysis_results",
+    "translation_analysis_results", "domain_analysis_results", "seo_analysis_results",
+    "competitor_analysis_results", "market_research_results", "survey_simulation_results",
+    "reports", "report_url", "file_size_kb",
+})
+
+# Fields kept from the newest checkpoint itself (metadata is skipped: it repeats node writes)
+CHECKPOINT_FIELDS = frozenset({"created_at", "checkpoint", "next"})
+
+CHUNK_SIZE = 64 * 1024
+
+
+def prune_history(history, keys=REPORT_KEYS) -> List[dict]:
+    """Reduce a parsed history to the newest value of each wanted key"""
+    if not isinstance(history, list):
+        return []
+    values, fields = {}, {}
+    for index, checkpoint in enumerate(history):
+        if not isinstance(checkpoint, dict):
+            continue
+        if index == 0:
+            fields = {key: value for key, value in checkpoint.items() if key in CHECKPOINT_FIELDS}
+        state = checkpoint.get("values")
+        if isinstance(state, dict):
+            for key in keys:
+                if key not in values and key in state:
+                    values[key] = state[key]
+    return [{**fields, "values": values}] if history else []
+
+
+class _ChunkReader:
+    """File-like view of an iterator of byte chunks, as ijson expects"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def extract_history(chunks: Iterable[bytes], keys=REPORT_KEYS) -> List[dict]:
+    """
+    Extract the wanted keys from a history body as it arrives.
+
+    Args:
+        chunks: The response body, in chunks
+        keys: State keys to keep
+
+    Returns:
+        The same one-checkpoint history prune_history builds from the parsed body
+    """
+    values, fields = {}, {}
+    checkpoints = 0
+    builder = target = building_prefix = None
+
+    for prefix, event, value in ijson.parse(_ChunkReader(chunks), use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == building_prefix and event in ("end_map", "end_array"):
+                target[building_prefix.rsplit(".", 1)[1]] = builder.value
+                builder = None
+            continue
+
+        if prefix == "item" and event == "start_map":
+            if checkpoints and len(values) == len(keys):
+                # Every key came from newer checkpoints; skip downloading the rest
+                break
+            checkpoints += 1
+            continue
+        if event == "map_key" or event in ("end_map", "end_array"):
+            continue
+
+        # Direct children of a checkpoint ("item.created_at") or of its state ("item.values.brand_promise")
+        if prefix.startswith("item.values.") and prefix.count(".") == 2:
+            key, destination = prefix[len("item.values."):], values
+            if key not in keys or key in values:
+                continue
+        elif checkpoints == 1 and prefix.startswith("item.") and prefix.count(".") == 1:
+            key, destination = prefix[len("item."):], fields
+            if key not in CHECKPOINT_FIELDS:
+                continue
+        else:
+            continue
+
+        if event in ("start_map", "start_array"):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            target, building_prefix = destination, prefix
+        else:
+            destination[key] = value
+
+    return [{**fields, "values": values}] if checkpoints else []
+
+
+def read_history(response, keys=REPORT_KEYS) -> List[dict]:
+    """
+    Read a history response down to the wanted keys.
+
+    The response should have been requested with stream=True when STREAMING is set;
+    otherwise the body is already in memory and is parsed whole.
+    """
+    try:
+        if STREAMING:
+            return extract_history(iter_body(response, "/threads/{thread_id}/history", CHUNK_SIZE), keys)
+        return prune_history(jsoncodec.response_json(response), keys)
+    finally:
+        response.close()
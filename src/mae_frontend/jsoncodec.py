@@ -0,0 +1,97 @@
+"""
+JSON encoding and decoding through the fastest available library.
+
+Stream events, API responses and cached payloads are all parsed through
+loads(), which takes bytes directly so response bodies and stream lines are
+never decoded to an intermediate str first. orjson is used when installed,
+then msgspec, then the standard library; all three produce the same plain
+dicts and lists.
+
+Configuration (environment):
+    JSON_CODEC   auto, orjson, msgspec or json (default auto: the fastest installed)
+"""
+import json
+import os
+from typing import Union
+
+from mae_frontend.logging_config import get_logger
+
+JSON_CODEC = os.getenv("JSON_CODEC", "auto").strip().lower()
+
+logger = get_logger("jsoncodec")
+
+
+def _stdlib_loads(data: Union[bytes, bytearray, memoryview, str]):
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def _stdlib_dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _load_orjson():
+    import orjson
+
+    def dumps(value) -> bytes:
+        try:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Integers beyond 64 bits
+            return _stdlib_dumps(value)
+
+    return orjson.loads, dumps, (orjson.JSONDecodeError,)
+
+
+def _load_msgspec():
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=str)
+
+    def dumps(value) -> bytes:
+        try:
+            return encoder.encode(value)
+        except (TypeError, OverflowError):
+            return _stdlib_dumps(value)
+
+    return msgspec.json.decode, dumps, (msgspec.DecodeError,)
+
+
+_CODECS = {"orjson": _load_orjson, "msgspec": _load_msgspec}
+
+
+def _select(preference: str):
+    candidates = ["orjson", "msgspec"] if preference == "auto" else [preference]
+    for name in candidates:
+        if name not in _CODECS:
+            if name != "json":
+                logger.warning("Unknown JSON_CODEC %r; using the standard library", name)
+            break
+        try:
+            return (name, *_CODECS[name]())
+        except ImportError:
+            if preference != "auto":
+                logger.warning("JSON_CODEC=%s is not installed; using the standard library", name)
+    return "json", _stdlib_loads, _stdlib_dumps, ()
+
+
+CODEC, _loads, _dumps, _errors = _select(JSON_CODEC)
+
+# Every codec's decode error; catch this instead of json.JSONDecodeError
+DecodeError = (json.JSONDecodeError, *_errors)
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]):
+    """Parse JSON from bytes or str"""
+    return _loads(data)
+
+
+def dumps(value) -> bytes:
+    """Encode a value as compact UTF-8 JSON; values JSON cannot represent are written as strings"""
+    return _dumps(value)
+
+
+def response_json(response):
+    """Parse a requests response body as JSON without decoding it to text first"""
+    return _loads(response.content)
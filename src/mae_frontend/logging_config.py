@@ -0,0 +1,200 @@
+"""
+Leveled, asynchronous logging for the frontend.
+
+Log calls only enqueue records; formatting, secret redaction and file I/O
+happen on a QueueListener thread. Records carry per-session context
+(session_id, thread_id), and high-volume records such as per-event stream
+logs can be sampled before they are enqueued.
+
+Configuration (environment):
+    LOG_LEVEL            Minimum level for the mae_frontend logger (default INFO)
+    LOG_FILE             Rotating log file (default logs/process.log)
+    LOG_JSON             Write JSON lines instead of plain text (default false)
+    LOG_MAX_BYTES        Rotate after this many bytes (default 10 MB)
+    LOG_BACKUP_COUNT     Number of rotated files to keep (default 5)
+    LOG_SAMPLE_RATE      Keep 1 in N sampled records (default 100)
+    LOG_CONSOLE_LEVEL    Level echoed to stderr (default WARNING)
+"""
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+LOGGER_NAME = "mae_frontend"
+
+# Per-session context attached to every record
+_log_context: contextvars.ContextVar = contextvars.ContextVar("mae_log_context", default={})
+
+# Environment variables whose values must never reach the logs
+SECRET_ENV_VARS = ("LANGGRAPH_API_KEY", "LANGCHAIN_API_KEY", "LANGSMITH_API_KEY")
+
+# Header/parameter style secrets, e.g. "X-Api-Key: abc" or "'x-api-key': 'abc'"
+_SECRET_PATTERN = re.compile(
+    r"""(?ix)
+    (["']?(?:x-api-key|api[_-]?key|authorization|token|password|secret)["']?\s*[:=]\s*["']?)
+    (?:bearer\s+)?
+    ([^\s"',}]+)
+    """
+)
+
+_listener: Optional[QueueListener] = None
+
+
+def set_log_context(**fields):
+    """Set context fields (e.g. session_id, thread_id) for records logged from this thread; None clears a field"""
+    context = dict(_log_context.get())
+    context.update(fields)
+    _log_context.set(context)
+
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    """Return the package logger or one of its children"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current session context onto the record (runs on the calling thread)"""
+
+    def filter(self, record):
+        context = _log_context.get()
+        record.session_id = context.get("session_id") or "-"
+        record.thread_id = context.get("thread_id") or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only 1 in N records marked with extra={"sampled": True}.
+
+    Warnings and errors are never sampled away.
+    """
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+class RedactionFilter(logging.Filter):
+    """Mask API keys and other secrets in the formatted message (runs on the listener thread)"""
+
+    def __init__(self):
+        super().__init__()
+        self._secrets = [os.getenv(var) for var in SECRET_ENV_VARS if os.getenv(var)]
+
+    def redact(self, text: str) -> str:
+        for secret in self._secrets:
+            text = text.replace(secret, "***")
+        return _SECRET_PATTERN.sub(r"\1***", text)
+
+    def filter(self, record):
+        message = self.redact(record.getMessage())
+        record.msg, record.args = message, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.redact(logging.Formatter().formatException(record.exc_info))
+            record.exc_info = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "session_id": getattr(record, "session_id", "-"),
+            "thread_id": getattr(record, "thread_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler formats the message before enqueueing; deferring it keeps
+    string building off the Streamlit script thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def configure_logging() -> logging.Logger:
+    """
+    Set up the queue-based logging pipeline once per process.
+
+    Returns:
+        The package logger
+    """
+    global _listener
+    logger = get_logger()
+    if _listener is not None:
+        return logger
+
+    level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    formatter = (
+        JsonFormatter()
+        if _env_flag("LOG_JSON")
+        else logging.Formatter(
+            "%(asctime)s - %(levelname)s - %(name)s - [%(session_id)s/%(thread_id)s] - %(message)s"
+        )
+    )
+    redaction = RedactionFilter()
+
+    handlers = []
+    log_file = os.getenv("LOG_FILE", os.path.join("logs", "process.log"))
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        # Append rather than truncate so concurrent workers do not wipe each other's logs
+        file_handler = RotatingFileHandler(
+            log_file,
+            mode="a",
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+            encoding="utf-8",
+            delay=True,
+        )
+        handlers.append(file_handler)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(getattr(logging, os.getenv("LOG_CONSOLE_LEVEL", "WARNING").upper(), logging.WARNING))
+    handlers.append(console_handler)
+
+    for handler in handlers:
+        handler.addFilter(redaction)
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(int(os.getenv("LOG_SAMPLE_RATE", "100"))))
+
+    logger.setLevel(level)
+    logger.handlers = [queue_handler]
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return logger
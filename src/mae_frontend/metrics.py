@@ -0,0 +1,337 @@
+"""
+Prometheus-style metrics for the frontend.
+
+A small, dependency-free registry of counters, gauges and histograms that can
+be rendered in the Prometheus text exposition format, served from a local
+HTTP endpoint, or written periodically to a scrape file (e.g. for the
+node_exporter textfile collector).
+"""
+import bisect
+import math
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) covering fast API calls through multi-minute runs
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# Size buckets (bytes) for response payloads
+BYTE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 512 * 1024, 1024 ** 2, 5 * 1024 ** 2, 20 * 1024 ** 2, 100 * 1024 ** 2)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class for labelled metrics"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """Return the child metric for a set of label values"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels: {', '.join(self.labelnames)}")
+        return self.labels()
+
+    def collect(self) -> List[str]:
+        """Render this metric in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, labelvalues):
+        return [f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally computed at collection time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._fn = fn
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().dec(amount)
+
+    def set_function(self, fn: Callable[[], float]):
+        """Compute the (unlabelled) value when metrics are collected"""
+        self._fn = fn
+
+    def collect(self) -> List[str]:
+        if self._fn is not None:
+            try:
+                self.set(float(self._fn()))
+            except Exception:
+                pass
+        return super().collect()
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        with self._lock:
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name, labelnames, labelvalues):
+        lines = []
+        cumulative = 0
+        with self._lock:
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                labels = _format_labels(labelnames, labelvalues, ("le", _format_value(bound)))
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _format_labels(labelnames, labelvalues, ("le", "+Inf"))
+            lines.append(f"{name}_bucket{labels} {self.count}")
+            plain = _format_labels(labelnames, labelvalues)
+            lines.append(f"{name}_sum{plain} {_format_value(self.sum)}")
+            lines.append(f"{name}_count{plain} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Module reloads (Streamlit reruns on file change) re-register the same names
+            self._metrics.setdefault(metric.name, metric)
+            return self._metrics[metric.name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=(), fn=None) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, fn))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# API helpers
+API_REQUESTS = counter(
+    "mae_api_requests_total", "LangGraph API requests by endpoint, method and status",
+    ("endpoint", "method", "status"),
+)
+API_LATENCY = histogram(
+    "mae_api_request_seconds", "LangGraph API request latency", ("endpoint", "method"),
+)
+API_RESPONSE_BYTES = histogram(
+    "mae_api_response_bytes", "LangGraph API response body size", ("endpoint",), BYTE_BUCKETS,
+)
+API_WIRE_BYTES = counter(
+    "mae_api_wire_bytes_total", "Response bytes received over the network, before decompression",
+    ("endpoint", "encoding"),
+)
+API_BODY_BYTES = counter(
+    "mae_api_body_bytes_total", "Response body bytes after decompression", ("endpoint", "encoding"),
+)
+
+# Run streams
+STREAM_EVENTS = counter("mae_stream_events_total", "Events received on run streams", ("event",))
+STREAM_BYTES = counter("mae_stream_bytes_total", "Bytes received on run streams")
+STREAM_EVENT_RATE = gauge("mae_stream_events_per_second", "Event rate of the most recently finished run stream")
+STREAM_FIRST_EVENT = histogram("mae_stream_time_to_first_event_seconds", "Time from run start to the first stream event")
+STREAM_FIRST_NAME = histogram("mae_stream_time_to_first_name_seconds", "Time from run start to the first generated name")
+RUN_DURATION = histogram("mae_run_duration_seconds", "Total run time by outcome", ("outcome",))
+
+# Caches and sessions
+CACHE_REQUESTS = counter("mae_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+ACTIVE_SESSIONS = gauge("mae_active_sessions", "Browser sessions currently connected")
+SESSIONS_STARTED = counter("mae_sessions_started_total", "Browser sessions started")
+
+
+class SessionTracker:
+    """Counts connected sessions, pruning ones that are no longer active at collection time"""
+
+    def __init__(self, is_session_active: Callable[[str], bool]):
+        self._is_session_active = is_session_active
+        self._sessions = set()
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str):
+        with self._lock:
+            if session_id in self._sessions:
+                return
+            self._sessions.add(session_id)
+        SESSIONS_STARTED.inc()
+
+    def count(self) -> int:
+        with self._lock:
+            self._sessions = {s for s in self._sessions if self._is_session_active(s)}
+            return len(self._sessions)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the app's output
+        pass
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def write_metrics_file(path: str):
+    """Atomically write the current metrics to a scrape file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    with os.fdopen(fd, "w") as fh:
+        fh.write(REGISTRY.render())
+    os.replace(tmp_name, path)
+
+
+def start_metrics_file_writer(path: str, interval: float = 15.0) -> threading.Thread:
+    """Rewrite the scrape file periodically from a daemon thread"""
+
+    def _loop():
+        while True:
+            try:
+                write_metrics_file(path)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_loop, name="metrics-file-writer", daemon=True)
+    thread.start()
+    return thread
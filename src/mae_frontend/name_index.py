@@ -0,0 +1,377 @@
+"""
+Near-duplicate detection for brand names across generations.
+
+Names are indexed under several keys so "has anything like this been
+generated before?" is answered from a few small posting lists, not by scanning
+every name:
+- the normalized form (case, spacing, punctuation and diacritics removed)
+- single-character deletions, which find every name one edit away
+- three positional segments per length (pigeonhole partitioning: two edits
+  leave at least one segment intact), which find longer names two edits away
+- a phonetic key (Metaphone plus Soundex digits) for names that sound alike
+
+Candidates are verified with a bounded Levenshtein distance. The index is
+shared by every session in the process and is thread-safe.
+
+Configuration (environment):
+    NAME_INDEX_MAX_NAMES   Most distinct names kept in the index (default 500000)
+"""
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+NAME_INDEX_MAX_NAMES = int(os.getenv("NAME_INDEX_MAX_NAMES", "500000"))
+
+# Names up to this length are matched within one edit, longer names within two
+SHORT_NAME_LENGTH = 5
+
+# Phonetic twins further apart than this in spelling are treated as different names
+PHONETIC_MAX_EDITS = 4
+
+
+class NameMatch(NamedTuple):
+    name: str
+    reason: str  # "exact", "spelling" or "phonetic"
+    distance: int
+    sources: tuple
+
+
+_REASON_ORDER = {"exact": 0, "spelling": 1, "phonetic": 2}
+
+
+def closest_matches(matches: Iterable[NameMatch], limit: int = 5) -> List[NameMatch]:
+    """Order matches (e.g. from several indexes) exact first, then by spelling distance, then phonetic"""
+    return sorted(matches, key=lambda m: (_REASON_ORDER[m.reason], m.distance, m.name))[:limit]
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase ASCII letters and digits only: "Zéta-Labs" and "zeta labs" both become "zetalabs" """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return re.sub(r"[^a-z0-9]", "", text)
+
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def soundex(name: str) -> str:
+    """American Soundex code, e.g. "Robert" -> "R163" """
+    text = re.sub(r"[^a-z]", "", normalize_name(name))
+    if not text:
+        return ""
+    code, previous = [text[0].upper()], _SOUNDEX_CODES.get(text[0], "")
+    for ch in text[1:]:
+        digit = _SOUNDEX_CODES.get(ch, "")
+        if digit and digit != previous:
+            code.append(digit)
+        # h and w do not separate letters with the same code; vowels do
+        if ch not in "hw":
+            previous = digit
+    return "".join(code + ["0"] * 3)[:4]
+
+
+def metaphone(name: str) -> str:
+    """Simplified Metaphone key, e.g. "Knight" -> "NT", "Phonix" -> "FNKS" """
+    word = re.sub(r"[^a-z]", "", normalize_name(name))
+    if not word:
+        return ""
+    for prefix, replacement in (("ae", "e"), ("gn", "n"), ("kn", "n"), ("pn", "n"), ("wr", "r"),
+                                ("x", "s"), ("wh", "w")):
+        if word.startswith(prefix):
+            word = replacement + word[len(prefix):]
+            break
+
+    vowels = "aeiou"
+    key = []
+    length = len(word)
+    i = 0
+    while i < length:
+        ch = word[i]
+        prev = word[i - 1] if i else ""
+        nxt = word[i + 1] if i + 1 < length else ""
+        after = word[i + 2] if i + 2 < length else ""
+        skip = 0
+
+        if ch == prev and ch != "c":
+            i += 1
+            continue
+        if ch in vowels:
+            if i == 0:
+                key.append(ch.upper())
+        elif ch == "b":
+            if not (prev == "m" and i == length - 1):
+                key.append("B")
+        elif ch == "c":
+            if nxt == "i" and after == "a":
+                key.append("X")
+            elif nxt == "h":
+                key.append("X")
+                skip = 1
+            elif nxt in "iey":
+                if prev != "s":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif ch == "d":
+            if nxt == "g" and after in "iey":
+                key.append("J")
+                skip = 2
+            else:
+                key.append("T")
+        elif ch == "g":
+            if nxt == "h" and after and after not in vowels:
+                pass
+            elif nxt == "n" and (i + 2 == length or word[i + 2:] == "ed"):
+                pass
+            elif nxt in "iey" and prev != "g":
+                key.append("J")
+            else:
+                key.append("K")
+        elif ch == "h":
+            if nxt in vowels and prev not in "csptg":
+                key.append("H")
+        elif ch == "k":
+            if prev != "c":
+                key.append("K")
+        elif ch == "p":
+            if nxt == "h":
+                key.append("F")
+                skip = 1
+            else:
+                key.append("P")
+        elif ch == "q":
+            key.append("K")
+        elif ch == "s":
+            if nxt == "h" or (nxt == "i" and after in "oa"):
+                key.append("X")
+                skip = 1 if nxt == "h" else 0
+            else:
+                key.append("S")
+        elif ch == "t":
+            if nxt == "i" and after in "oa":
+                key.append("X")
+            elif nxt == "h":
+                key.append("0")
+                skip = 1
+            elif not (nxt == "c" and after == "h"):
+                key.append("T")
+        elif ch == "v":
+            key.append("F")
+        elif ch in "wy":
+            if nxt in vowels:
+                key.append(ch.upper())
+        elif ch == "x":
+            key.append("KS")
+        elif ch == "z":
+            key.append("S")
+        else:
+            # f, j, l, m, n, r sound as written
+            key.append(ch.upper())
+        i += 1 + skip
+    return "".join(key)
+
+
+def phonetic_key(name: str) -> str:
+    """Metaphone plus Soundex digits; both must agree for two names to count as phonetic twins"""
+    meta = metaphone(name)
+    # Two-consonant keys match too many unrelated names to be useful
+    return f"{meta}:{soundex(name)[1:]}" if len(meta) >= 3 else ""
+
+
+def _deletions(text: str) -> Set[str]:
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+def _segments(length: int, edits: int = 2) -> List[tuple]:
+    """Split a length into edits + 1 (start, size) segments, the longer ones last"""
+    parts = edits + 1
+    short, extra = divmod(length, parts)
+    segments, start = [], 0
+    for i in range(parts):
+        size = short + (1 if i >= parts - extra else 0)
+        segments.append((start, size))
+        start += size
+    return segments
+
+
+def max_edits(text: str) -> int:
+    return 1 if len(text) <= SHORT_NAME_LENGTH else 2
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> Optional[int]:
+    """
+    Edit distance between a and b, or None if it exceeds limit.
+
+    Uses Myers' bit-parallel algorithm: one pass over b with a few integer
+    operations per character, stopping as soon as the limit cannot be met.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if not a or not b:
+        distance = max(len(a), len(b))
+        return distance if distance <= limit else None
+
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    peq = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    pv, mv, score, remaining = mask, 0, len(a), len(b)
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        remaining -= 1
+        # The score drops by at most one per remaining character
+        if score - remaining > limit:
+            return None
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score if score <= limit else None
+
+
+class NameIndex:
+    """Thread-safe index of every name seen, answering near-duplicate queries"""
+
+    def __init__(self, max_names: int = NAME_INDEX_MAX_NAMES):
+        self.max_names = max_names
+        # normalized form -> {"name": first display form, "sources": set of sources}
+        self._names: "OrderedDict[str, dict]" = OrderedDict()
+        self._deletes: Dict[str, Set[str]] = defaultdict(set)
+        # (length, segment number, segment text) -> names of that length, for two-edit matches
+        self._segments: Dict[tuple, Set[str]] = defaultdict(set)
+        self._phonetic: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._names)
+
+    def _keys(self, normalized: str):
+        deletes = _deletions(normalized) | {normalized}
+        segments = set()
+        if max_edits(normalized) >= 2:
+            length = len(normalized)
+            segments = {(length, i, normalized[start:start + size])
+                        for i, (start, size) in enumerate(_segments(length))}
+        return deletes, segments, phonetic_key(normalized)
+
+    def _unlink(self, normalized: str):
+        deletes, segments, phonetic = self._keys(normalized)
+        for table, keys in ((self._deletes, deletes), (self._segments, segments),
+                            (self._phonetic, [phonetic] if phonetic else [])):
+            for key in keys:
+                posting = table.get(key)
+                if posting is not None:
+                    posting.discard(normalized)
+                    if not posting:
+                        del table[key]
+
+    def add(self, name: str, source: str):
+        """Index a name as seen in source (a thread ID, "favorites", ...)"""
+        normalized = normalize_name(name)
+        if not normalized:
+            return
+        with self._lock:
+            entry = self._names.get(normalized)
+            if entry is not None:
+                entry["sources"].add(source)
+                self._names.move_to_end(normalized)
+                return
+            self._names[normalized] = {"name": name, "sources": {source}}
+            deletes, segments, phonetic = self._keys(normalized)
+            for key in deletes:
+                self._deletes[key].add(normalized)
+            for key in segments:
+                self._segments[key].add(normalized)
+            if phonetic:
+                self._phonetic[phonetic].add(normalized)
+            while len(self._names) > self.max_names:
+                oldest, _ = self._names.popitem(last=False)
+                self._unlink(oldest)
+
+    def add_many(self, names: Iterable[str], source: str):
+        for name in names:
+            self.add(name, source)
+
+    def remove(self, name: str, source: str):
+        """Forget that a name was seen in source, dropping the name once no source is left"""
+        normalized = normalize_name(name)
+        with self._lock:
+            entry = self._names.get(normalized)
+            if entry is None:
+                return
+            entry["sources"].discard(source)
+            if not entry["sources"]:
+                del self._names[normalized]
+                self._unlink(normalized)
+
+    def _spelling_candidates(self, normalized: str, limit: int) -> Set[str]:
+        # Deletion neighbours cover every name within one edit
+        candidates = set()
+        for key in _deletions(normalized) | {normalized}:
+            candidates |= self._deletes.get(key, set())
+        if limit < 2:
+            return candidates
+
+        # A name within two edits keeps one of its three segments intact. Segment i can only
+        # have moved by as many edits as fall before it (i) or after it (limit - i).
+        length = len(normalized)
+        for other_length in range(max(SHORT_NAME_LENGTH + 1, length - limit), length + limit + 1):
+            shift = length - other_length
+            for i, (start, size) in enumerate(_segments(other_length, limit)):
+                low = max(0, start - i, start + shift - (limit - i))
+                high = min(length - size, start + i, start + shift + (limit - i))
+                for position in range(low, high + 1):
+                    candidates |= self._segments.get((other_length, i, normalized[position:position + size]), set())
+        return candidates
+
+    def find_similar(self, name: str, exclude_source: Optional[str] = None, limit: int = 5) -> List[NameMatch]:
+        """
+        Find indexed names that look or sound like name.
+
+        Args:
+            name: Name to check
+            exclude_source: Ignore names seen only in this source (e.g. the current thread)
+            limit: Most matches to return, closest first
+
+        Returns:
+            Matches ordered by exact, then spelling distance, then phonetic
+        """
+        normalized = normalize_name(name)
+        if not normalized:
+            return []
+        edits = max_edits(normalized)
+        phonetic = phonetic_key(normalized)
+        with self._lock:
+            matches = {}
+            for candidate in self._spelling_candidates(normalized, edits):
+                distance = bounded_levenshtein(normalized, candidate, min(edits, max_edits(candidate)))
+                if distance is not None:
+                    matches[candidate] = ("exact" if distance == 0 else "spelling", distance)
+            for candidate in self._phonetic.get(phonetic, ()) if phonetic else ():
+                distance = bounded_levenshtein(normalized, candidate, PHONETIC_MAX_EDITS)
+                if distance is not None:
+                    matches.setdefault(candidate, ("phonetic", distance))
+
+            results = []
+            for candidate, (reason, distance) in matches.items():
+                sources = self._names[candidate]["sources"] - {exclude_source}
+                if sources:
+                    results.append(NameMatch(self._names[candidate]["name"], reason, distance, tuple(sorted(sources))))
+        return closest_matches(results, limit)
@@ -0,0 +1,171 @@
+"""
+Per-rerun profiling for the Streamlit script.
+
+A RerunProfiler times the major sections of one script run. Top-level
+sections are laps (entering the next one ends the previous one), so a linear
+script can be split without re-indenting it. Nested sections use the
+section() context manager. Section times are exported as the
+mae_section_seconds histogram and shown in an overlay by the app.
+
+Optionally, each profiled rerun is also captured with cProfile (.prof, for
+snakeviz or pstats) or pyinstrument (.html) into PROFILE_DIR. File capture is
+only configurable from the environment, so a URL cannot make the server write
+profiles.
+
+Configuration (environment):
+    PROFILE           Profile every rerun of every session (default false); a single
+                      session can opt in with the ?profile=1 query parameter
+    PROFILE_CAPTURE   "cprofile" or "pyinstrument" to save a profile per profiled rerun
+                      (default off)
+    PROFILE_DIR       Directory for captured profiles (default profiles)
+"""
+import contextlib
+import os
+import time
+from typing import List, Optional
+
+from mae_frontend.logging_config import get_logger
+from mae_frontend.metrics import histogram
+
+PROFILE_ENABLED = os.getenv("PROFILE", "false").strip().lower() in ("1", "true", "yes", "on")
+PROFILE_CAPTURE = os.getenv("PROFILE_CAPTURE", "").strip().lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+SECTION_SECONDS = histogram("mae_section_seconds", "Time spent in each section of a script run", ("section",))
+
+logger = get_logger("profiler")
+
+
+def profiling_requested(query_value: Optional[str]) -> bool:
+    """Whether this rerun should be profiled, given the ?profile= query value"""
+    if PROFILE_ENABLED:
+        return True
+    return (query_value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class RerunProfiler:
+    """Section timings (and an optional whole-run capture) for one script run"""
+
+    def __init__(self, enabled: bool = True, capture: str = PROFILE_CAPTURE, output_dir: str = PROFILE_DIR):
+        self.enabled = enabled
+        self.capture = capture if enabled else ""
+        self.output_dir = output_dir
+        self.started = time.perf_counter()
+        self.total = None
+        self.capture_path = None
+        self._records = []  # (path, depth, start, end)
+        self._stack = []  # (path, record index) of open sections
+        self._lap = None
+        self._capturer = None
+        if self.capture:
+            self._start_capture()
+
+    @property
+    def running(self) -> bool:
+        return self.enabled and self.total is None
+
+    def _open(self, name: str) -> int:
+        path = f"{self._stack[-1][0]}/{name}" if self._stack else name
+        self._records.append([path, len(self._stack), time.perf_counter(), None])
+        index = len(self._records) - 1
+        self._stack.append((path, index))
+        return index
+
+    def _close(self, index: int):
+        while self._stack:
+            _, open_index = self._stack.pop()
+            self._records[open_index][3] = time.perf_counter()
+            if open_index == index:
+                break
+
+    def enter(self, name: str):
+        """Start a top-level section, ending the previous top-level section"""
+        if not self.running:
+            return
+        if self._lap is not None:
+            self._close(self._lap)
+        self._lap = self._open(name)
+
+    @contextlib.contextmanager
+    def section(self, name: str):
+        """Time a section nested in the current one"""
+        if not self.running:
+            yield
+            return
+        index = self._open(name)
+        try:
+            yield
+        finally:
+            self._close(index)
+
+    def finish(self) -> List[dict]:
+        """End the run: close open sections, record metrics and save any capture"""
+        if not self.running:
+            return self.timings()
+        while self._stack:
+            self._close(self._stack[-1][1])
+        self.total = time.perf_counter() - self.started
+        for path, _, start, end in self._records:
+            SECTION_SECONDS.labels(section=path).observe(end - start)
+        if self._capturer is not None:
+            self._stop_capture()
+        return self.timings()
+
+    def timings(self) -> List[dict]:
+        """Sections in the order they started, with seconds and share of the run"""
+        total = self.total or (time.perf_counter() - self.started)
+        rows = []
+        for path, depth, start, end in self._records:
+            seconds = (end if end is not None else time.perf_counter()) - start
+            rows.append({
+                "section": path,
+                "depth": depth,
+                "ms": round(seconds * 1000, 1),
+                "share": round(100 * seconds / total, 1) if total else 0.0,
+            })
+        return rows
+
+    def _start_capture(self):
+        if self.capture == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("pyinstrument is not installed; capturing with cProfile instead")
+                self.capture = "cprofile"
+            else:
+                self._capturer = Profiler()
+                self._capturer.start()
+                return
+        if self.capture == "cprofile":
+            import cProfile
+            capturer = cProfile.Profile()
+            try:
+                capturer.enable()
+            except ValueError:
+                # Python 3.12+ allows one active cProfile per process; another session is profiling
+                logger.info("Skipping profile capture: another rerun is being captured")
+                self.capture = ""
+                return
+            self._capturer = capturer
+        elif self.capture:
+            logger.warning("Unknown PROFILE_CAPTURE %r; expected cprofile or pyinstrument", self.capture)
+            self.capture = ""
+
+    def _stop_capture(self):
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if self.capture == "pyinstrument":
+                self._capturer.stop()
+                self.capture_path = os.path.join(self.output_dir, f"rerun-{stamp}.html")
+                with open(self.capture_path, "w", encoding="utf-8") as f:
+                    f.write(self._capturer.output_html())
+            else:
+                self._capturer.disable()
+                self.capture_path = os.path.join(self.output_dir, f"rerun-{stamp}.prof")
+                self._capturer.dump_stats(self.capture_path)
+        except OSError:
+            logger.exception("Could not save the rerun profile")
+            self.capture_path = None
+        finally:
+            self._capturer = None
@@ -0,0 +1,82 @@
+"""
+Prompt-level cache of finished generation runs.
+
+build_complete_prompt is deterministic, so a re-submitted brief (often one of
+the example prompts) produces the same complete prompt. The cache maps the
+normalized prompt and assistant ID to the thread of the last finished run.
+Users can then reuse that result instead of paying for a full pipeline again.
+
+The cache is opt-in (PROMPT_CACHE_ENABLED) and shared by every session in the
+process. Entries expire after PROMPT_CACHE_TTL seconds, and the least recently
+used entries are evicted beyond PROMPT_CACHE_MAX_ENTRIES.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from mae_frontend.metrics import CACHE_REQUESTS
+
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+PROMPT_CACHE_TTL = float(os.getenv("PROMPT_CACHE_TTL", str(24 * 3600)))
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "500"))
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so trivially different submissions share a cache key"""
+    text = unicodedata.normalize("NFKC", prompt or "").casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    # Spacing around punctuation is not meaningful to the pipeline
+    return re.sub(r"\s+([.,;:!?])", r"\1", text)
+
+
+def prompt_cache_key(prompt: str, assistant_id: str) -> str:
+    """Stable cache key for a prompt submitted to an assistant"""
+    digest = hashlib.sha256(f"{assistant_id}\0{normalize_prompt(prompt)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PromptResultCache:
+    """Thread-safe TTL + LRU map from prompt keys to finished runs"""
+
+    def __init__(self, ttl: float = PROMPT_CACHE_TTL, max_entries: int = PROMPT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached run for a key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created_at"] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        CACHE_REQUESTS.labels(cache="prompt_results", result="hit" if entry else "miss").inc()
+        return dict(entry) if entry else None
+
+    def put(self, key: str, thread_id: str, name_count: int = 0):
+        """Remember the thread that holds the finished result for a key"""
+        with self._lock:
+            self._entries[key] = {
+                "thread_id": thread_id,
+                "name_count": name_count,
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,275 @@
+"""
+Client-side rate limiting for generation runs and API calls.
+
+Every generation run is a full multi-agent pipeline. Runs are therefore admitted
+through a process-wide FIFO queue that enforces:
+- a per-user token bucket, so one user cannot start run after run; it is keyed
+  by the user's identity rather than the browser session, so reloading the page
+  or opening another tab does not reset the budget
+- a global token bucket shared by every session in the process
+- an optional cap on concurrently streaming runs
+
+Sessions that are over budget wait in the queue (and can see their position)
+instead of getting an error. Waiting never holds a script thread for long:
+RunAdmission.wait returns QUEUED after RUN_QUEUE_MAX_BLOCK seconds and the
+session keeps its place until it asks again on its next rerun. API calls can
+additionally be paced by a global token bucket.
+
+Configuration (environment):
+    RUN_SESSION_RATE       Runs per hour allowed per user (default 20)
+    RUN_SESSION_BURST      Runs a user may start back to back (default 3)
+    RUN_GLOBAL_RATE        Runs per minute allowed across the process (default 30)
+    RUN_GLOBAL_BURST       Global burst size (default 10)
+    MAX_CONCURRENT_RUNS    Streaming runs allowed at once, 0 for no limit (default 0)
+    RUN_QUEUE_TIMEOUT      Longest a session waits in the queue, in seconds (default 600)
+    RUN_QUEUE_MAX_BLOCK    Longest one wait call blocks before returning QUEUED, in seconds (default 3)
+    API_RATE_LIMIT         API requests per second across the process, 0 to disable (default 0)
+    API_RATE_BURST         API request burst size (default 20)
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mae_frontend.metrics import counter, gauge, histogram
+
+RUN_SESSION_RATE = float(os.getenv("RUN_SESSION_RATE", "20"))
+RUN_SESSION_BURST = float(os.getenv("RUN_SESSION_BURST", "3"))
+RUN_GLOBAL_RATE = float(os.getenv("RUN_GLOBAL_RATE", "30"))
+RUN_GLOBAL_BURST = float(os.getenv("RUN_GLOBAL_BURST", "10"))
+MAX_CONCURRENT_RUNS = int(os.getenv("MAX_CONCURRENT_RUNS", "0"))
+RUN_QUEUE_TIMEOUT = float(os.getenv("RUN_QUEUE_TIMEOUT", "600"))
+RUN_QUEUE_MAX_BLOCK = float(os.getenv("RUN_QUEUE_MAX_BLOCK", "3"))
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "0"))
+API_RATE_BURST = float(os.getenv("API_RATE_BURST", "20"))
+
+# How often a waiting session re-checks the queue
+RUN_QUEUE_POLL_INTERVAL = 1.0
+
+# Waiting tickets that have not been polled for this long belong to closed sessions
+TICKET_TTL = 30.0
+
+# Outcomes of RunAdmission.wait
+ADMITTED = "admitted"
+QUEUED = "queued"
+EXPIRED = "expired"
+
+RUN_QUEUE_DEPTH = gauge("mae_run_queue_depth", "Sessions waiting for a generation slot")
+RUN_QUEUE_WAIT = histogram("mae_run_queue_wait_seconds", "Time sessions waited for a generation slot")
+RATE_LIMITED = counter("mae_rate_limited_total", "Requests delayed by a rate limit", ("limit",))
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate tokens per second, holding at most capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens >= tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if they are available now"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until tokens will be available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self.tokens
+            if missing <= 0:
+                return 0.0
+            return missing / self.rate if self.rate > 0 else float("inf")
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until tokens are taken, or return False after timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire(tokens):
+            wait = self.wait_time(tokens)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+        return True
+
+    def is_full(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens >= self.capacity
+
+
+class QueueTicket:
+    """A session's place in the run queue, charged to its user's budget"""
+
+    def __init__(self, session_id: str, user_id: Optional[str] = None):
+        self.session_id = session_id
+        self.user_id = user_id or session_id
+        self.enqueued_at = time.monotonic()
+        self.last_seen = self.enqueued_at
+        self.delayed = False
+
+
+class RunAdmission:
+    """
+    FIFO admission queue for generation runs with per-user and global budgets.
+
+    Each browser session holds at most one ticket, and every ticket is charged
+    to its user's bucket. A ticket is admitted when it is the first ticket in
+    the queue whose user has budget left, and the global budget and concurrency
+    cap allow another run. Tickets from users that are still over their own
+    budget do not hold up the users behind them.
+    """
+
+    def __init__(
+        self,
+        session_rate: float = RUN_SESSION_RATE / 3600,
+        session_burst: float = RUN_SESSION_BURST,
+        global_rate: float = RUN_GLOBAL_RATE / 60,
+        global_burst: float = RUN_GLOBAL_BURST,
+        max_concurrent: int = MAX_CONCURRENT_RUNS,
+        active_runs: Optional[Callable[[], int]] = None,
+        queue_timeout: float = RUN_QUEUE_TIMEOUT,
+    ):
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._active_runs = active_runs or (lambda: 0)
+        self._global = TokenBucket(global_rate, global_burst)
+        self._users: Dict[str, TokenBucket] = {}
+        self._queue: List[QueueTicket] = []
+        self._lock = threading.Lock()
+        RUN_QUEUE_DEPTH.set_function(lambda: len(self._queue))
+
+    def _user_bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            bucket = self._users[user_id] = TokenBucket(self.session_rate, self.session_burst)
+        return bucket
+
+    def _prune(self, now: float):
+        self._queue = [t for t in self._queue if now - t.last_seen < TICKET_TTL]
+        queued = {t.user_id for t in self._queue}
+        # Full buckets carry no state worth keeping
+        for user_id in [u for u, b in self._users.items() if u not in queued and b.is_full()]:
+            del self._users[user_id]
+
+    def enqueue(self, session_id: str, user_id: Optional[str] = None) -> QueueTicket:
+        """Join the queue (or return the session's existing ticket)"""
+        with self._lock:
+            for ticket in self._queue:
+                if ticket.session_id == session_id:
+                    return ticket
+            ticket = QueueTicket(session_id, user_id)
+            self._queue.append(ticket)
+            return ticket
+
+    def poll(self, ticket: QueueTicket) -> Tuple[bool, int, float]:
+        """
+        Try to admit a ticket.
+
+        Returns:
+            (admitted, position, estimated_wait) where position is 1-based among
+            waiting tickets and estimated_wait is in seconds
+        """
+        now = time.monotonic()
+        with self._lock:
+            ticket.last_seen = now
+            self._prune(now)
+            if ticket not in self._queue:
+                self._queue.append(ticket)
+
+            capacity_free = not self.max_concurrent or self._active_runs() < self.max_concurrent
+            position = self._queue.index(ticket) + 1
+            own_bucket = self._user_bucket(ticket.user_id)
+
+            if capacity_free and self._global.available():
+                first_eligible = next(
+                    (t for t in self._queue if self._user_bucket(t.user_id).available()), None
+                )
+                if first_eligible is ticket and own_bucket.try_acquire() and self._global.try_acquire():
+                    self._queue.remove(ticket)
+                    RUN_QUEUE_WAIT.observe(now - ticket.enqueued_at)
+                    return True, 0, 0.0
+
+            if not ticket.delayed:
+                ticket.delayed = True
+                if not own_bucket.available():
+                    RATE_LIMITED.labels(limit="run_session").inc()
+                elif not capacity_free:
+                    RATE_LIMITED.labels(limit="run_concurrency").inc()
+                else:
+                    RATE_LIMITED.labels(limit="run_global").inc()
+
+            # Everyone ahead needs a global token before this ticket gets one
+            global_wait = self._global.wait_time(position)
+            return False, position, max(own_bucket.wait_time(), global_wait)
+
+    def leave(self, ticket: QueueTicket):
+        """Remove a ticket that gave up or was admitted"""
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+
+    def withdraw(self, session_id: str):
+        """Remove a session's ticket, if it has one"""
+        with self._lock:
+            self._queue = [t for t in self._queue if t.session_id != session_id]
+
+    def wait(self, session_id: str, on_wait: Callable[[int, float], None],
+             user_id: Optional[str] = None, timeout: float = RUN_QUEUE_MAX_BLOCK) -> str:
+        """
+        Wait briefly for the session's turn to start a run.
+
+        A session that is not admitted within timeout keeps its place in the
+        queue and calls wait again later (on its next rerun); one that has been
+        queued for longer than queue_timeout is removed.
+
+        Args:
+            session_id: Browser session requesting a run
+            on_wait: Called with (position, estimated_wait) while waiting
+            user_id: Identity whose budget the run is charged to (default: the session)
+            timeout: Longest this call blocks, in seconds
+
+        Returns:
+            ADMITTED, QUEUED if the session is still waiting, or EXPIRED if it gave up
+        """
+        ticket = self.enqueue(session_id, user_id)
+        deadline = time.monotonic() + timeout
+        while True:
+            admitted, position, eta = self.poll(ticket)
+            if admitted:
+                return ADMITTED
+            now = time.monotonic()
+            if now - ticket.enqueued_at >= self.queue_timeout:
+                self.leave(ticket)
+                return EXPIRED
+            on_wait(position, eta)
+            if now >= deadline:
+                return QUEUED
+            time.sleep(min(RUN_QUEUE_POLL_INTERVAL, deadline - now))
+
+
+# Global pacing for API requests (disabled unless API_RATE_LIMIT is set)
+API_BUCKET = TokenBucket(API_RATE_LIMIT, API_RATE_BURST) if API_RATE_LIMIT > 0 else None
+
+
+def throttle_api():
+    """Wait for the global API budget, if one is configured"""
+    if API_BUCKET is not None and not API_BUCKET.try_acquire():
+        RATE_LIMITED.labels(limit="api").inc()
+        API_BUCKET.acquire()
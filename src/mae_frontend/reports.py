@@ -0,0 +1,319 @@
+"""
+Disk-backed report cache and streaming downloader.
+
+Reports are streamed from the backend (or copied from inline payloads) into a
+per-thread cache directory in fixed-size chunks, so large PDF/DOCX files never
+have to live in Streamlit session memory.
+
+The cache is pruned after every write: reports unused for longer than the
+maximum age are removed, then the least recently used ones until the cache fits
+its size limit.
+
+Configuration (environment):
+    REPORT_CACHE_DIR      Cache root (default <tmp>/mae_report_cache)
+    REPORT_MAX_MB         Largest report that will be downloaded (default 100)
+    REPORT_CACHE_MAX_MB   Total size of the cache (default 1024)
+    REPORT_CACHE_MAX_AGE  Seconds a report is kept after its last use (default 604800, one week)
+"""
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import unquote, urlparse
+
+import requests
+
+from mae_frontend.api import api_request
+
+# Chunk size used for both downloading and reading cached reports
+REPORT_CHUNK_SIZE = 64 * 1024
+
+# Hard upper bound for a single report, overridable from the environment
+MAX_REPORT_BYTES = int(float(os.getenv("REPORT_MAX_MB", "100")) * 1024 * 1024)
+
+# Bounds for the whole cache, overridable from the environment
+MAX_CACHE_BYTES = int(float(os.getenv("REPORT_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+MAX_CACHE_AGE = float(os.getenv("REPORT_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+# Reported file_size_kb values are rounded, so allow a little slack
+SIZE_TOLERANCE_RATIO = 0.02
+SIZE_TOLERANCE_KB = 1.0
+
+
+class ReportDownloadError(Exception):
+    """Raised when a report cannot be downloaded or fails validation"""
+
+
+def get_report_cache_dir() -> Path:
+    """Return the root directory used for cached reports"""
+    cache_dir = os.getenv("REPORT_CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), "mae_report_cache"
+    )
+    return Path(cache_dir)
+
+
+def _safe_component(value: str, fallback: str) -> str:
+    """Strip anything that could escape the cache directory from a path component"""
+    cleaned = re.sub(r"[^A-Za-z0-9._-]", "_", str(value or "")).strip("._")
+    return cleaned or fallback
+
+
+def is_api_url(url: str, api_url: Optional[str]) -> bool:
+    """Whether url points at the API host itself (same scheme and host:port), so it may be sent credentials"""
+    if not url or not api_url:
+        return False
+    target, api = urlparse(url), urlparse(api_url)
+    return bool(api.netloc) and (target.scheme.lower(), target.netloc.lower()) == (api.scheme.lower(), api.netloc.lower())
+
+
+def report_file_name(report_url: str, default: str = "report.pdf") -> str:
+    """Derive a file name for a report from its URL"""
+    path = unquote(urlparse(report_url or "").path)
+    name = os.path.basename(path)
+    return _safe_component(name, default)
+
+
+def report_mime_type(file_name: str) -> str:
+    """Guess the MIME type for a cached report"""
+    mime_type, _ = mimetypes.guess_type(file_name)
+    return mime_type or "application/octet-stream"
+
+
+def report_cache_path(thread_id: str, file_name: str) -> Path:
+    """Return the cache location for a thread's report"""
+    return (
+        get_report_cache_dir()
+        / _safe_component(thread_id, "unknown_thread")
+        / _safe_component(file_name, "report")
+    )
+
+
+def cached_report(thread_id: str, file_name: str) -> Optional[Path]:
+    """Return the cached report path if it has already been downloaded, marking it as recently used"""
+    path = report_cache_path(thread_id, file_name)
+    try:
+        if path.is_file() and path.stat().st_size > 0:
+            os.utime(path)
+            return path
+    except OSError:
+        # Pruned by another session in the meantime
+        pass
+    return None
+
+
+def prune_report_cache(max_bytes: int = MAX_CACHE_BYTES, max_age: float = MAX_CACHE_AGE,
+                       keep: Optional[Path] = None) -> int:
+    """
+    Remove cached reports unused for longer than max_age, then the least recently used
+    ones until the cache fits in max_bytes.
+
+    Args:
+        max_bytes: Upper bound for the total size of the cache
+        max_age: Seconds a report is kept after it was last written or served
+        keep: A report that is never removed for size (e.g. the one just written)
+
+    Returns:
+        Number of files removed
+    """
+    root = get_report_cache_dir()
+    now = time.time()
+    entries = []
+    for path in root.glob("*/*"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if path.is_file():
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries, key=lambda entry: entry[0]):
+        expired = now - mtime > max_age
+        # Partial downloads still being written are only removed once they are abandoned
+        if not expired and (total <= max_bytes or path == keep or path.name.startswith(".partial-")):
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        removed += 1
+        total -= size
+        try:
+            path.parent.rmdir()
+        except OSError:
+            # Other reports of the thread are still cached
+            pass
+    return removed
+
+
+def validate_report_size(size_bytes: int, expected_size_kb=None, max_bytes: int = MAX_REPORT_BYTES):
+    """
+    Check a report size against the configured limit and the advertised file_size_kb.
+
+    Args:
+        size_bytes: Size of the report in bytes (from Content-Length or the written file)
+        expected_size_kb: Size advertised by the backend, if any
+        max_bytes: Upper bound for a single report
+
+    Raises:
+        ReportDownloadError: If the size is over the limit or does not match file_size_kb
+    """
+    if size_bytes > max_bytes:
+        raise ReportDownloadError(
+            f"Report is {size_bytes / (1024 * 1024):.1f} MB, above the "
+            f"{max_bytes / (1024 * 1024):.0f} MB limit"
+        )
+
+    if expected_size_kb in (None, ""):
+        return
+
+    try:
+        expected_kb = float(expected_size_kb)
+    except (TypeError, ValueError):
+        return
+
+    actual_kb = size_bytes / 1024
+    tolerance = max(SIZE_TOLERANCE_KB, expected_kb * SIZE_TOLERANCE_RATIO)
+    if abs(actual_kb - expected_kb) > tolerance:
+        raise ReportDownloadError(
+            f"Report size {actual_kb:.1f} KB does not match the expected {expected_kb:.1f} KB"
+        )
+
+
+def _write_chunks(path: Path, chunks, max_bytes: int) -> int:
+    """Write chunks to a temporary file next to path and atomically move it into place"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".partial-")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                written += len(chunk)
+                if written > max_bytes:
+                    raise ReportDownloadError(
+                        f"Report exceeded the {max_bytes / (1024 * 1024):.0f} MB limit while downloading"
+                    )
+                fh.write(chunk)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+def fetch_report(
+    report_url: str,
+    thread_id: str,
+    file_name: Optional[str] = None,
+    expected_size_kb=None,
+    headers: Optional[dict] = None,
+    max_bytes: int = MAX_REPORT_BYTES,
+    chunk_size: int = REPORT_CHUNK_SIZE,
+    timeout=(10, 60),
+) -> Path:
+    """
+    Stream a report into the on-disk cache, returning the cached path.
+
+    The report is written chunk by chunk, validated against Content-Length,
+    file_size_kb and max_bytes, and only then moved into place. Reports that
+    are already cached are returned without touching the network.
+
+    Args:
+        report_url: URL of the report
+        thread_id: Thread the report belongs to, used as the cache key
+        file_name: Name to store the report under (derived from the URL if omitted)
+        expected_size_kb: Size advertised by the backend, used for validation
+        headers: Extra request headers (only pass API credentials for API URLs)
+        max_bytes: Upper bound for a single report
+        chunk_size: Size of each streamed chunk
+        timeout: requests timeout tuple of (connect, read)
+
+    Returns:
+        Path to the cached report
+    """
+    file_name = file_name or report_file_name(report_url)
+    existing = cached_report(thread_id, file_name)
+    if existing is not None:
+        return existing
+
+    path = report_cache_path(thread_id, file_name)
+    try:
+        with api_request(
+            "GET", report_url, "report_download", headers=headers or {}, stream=True, timeout=timeout
+        ) as response:
+            response.raise_for_status()
+
+            # Content-Length is the encoded size, so it can only be checked for identity transfers
+            content_length = response.headers.get("Content-Length")
+            content_encoding = response.headers.get("Content-Encoding", "identity").lower()
+            declared_size = None
+            if content_length and content_length.isdigit() and content_encoding == "identity":
+                declared_size = int(content_length)
+                validate_report_size(declared_size, expected_size_kb, max_bytes)
+
+            written = _write_chunks(path, response.iter_content(chunk_size=chunk_size), max_bytes)
+    except requests.RequestException as e:
+        raise ReportDownloadError(f"Error downloading report: {str(e)}") from e
+
+    try:
+        if declared_size is not None and written != declared_size:
+            raise ReportDownloadError(
+                f"Report download was truncated ({written} of {declared_size} bytes)"
+            )
+        validate_report_size(written, expected_size_kb, max_bytes)
+    except ReportDownloadError:
+        path.unlink(missing_ok=True)
+        raise
+
+    prune_report_cache(MAX_CACHE_BYTES, MAX_CACHE_AGE, keep=path)
+    return path
+
+
+def store_report_content(
+    thread_id: str,
+    file_name: str,
+    content: Union[str, bytes],
+    max_bytes: int = MAX_REPORT_BYTES,
+    chunk_size: int = REPORT_CHUNK_SIZE,
+) -> Path:
+    """
+    Spill an inline report payload into the on-disk cache.
+
+    Args:
+        thread_id: Thread the report belongs to
+        file_name: Name to store the report under
+        content: Report body as text or bytes
+
+    Returns:
+        Path to the cached report
+    """
+    existing = cached_report(thread_id, file_name)
+    if existing is not None:
+        return existing
+
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+    path = report_cache_path(thread_id, file_name)
+    _write_chunks(path, chunks, max_bytes)
+    prune_report_cache(MAX_CACHE_BYTES, MAX_CACHE_AGE, keep=path)
+    return path
+
+
+def read_report(path: Path) -> bytes:
+    """
+    Read a cached report from disk (used as a deferred download callback).
+
+    Streamlit serves downloads from memory, so the body is read in one exactly
+    sized read rather than joined from chunks, which would hold it twice; it
+    is bounded by REPORT_MAX_MB.
+    """
+    return path.read_bytes()
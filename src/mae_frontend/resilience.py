@@ -0,0 +1,277 @@
+"""
+Retries, backoff and circuit breaking for LangGraph API calls.
+
+Read requests that fail with a connection error, a timeout or a retryable
+status (429/502/503/504) are retried a bounded number of times with full-jitter
+exponential backoff, honouring Retry-After. Each endpoint has a circuit breaker
+shared by every session in the process: after repeated failures it opens and
+calls fail fast (or are served from the last good response) until a single
+probe succeeds, so dozens of sessions cannot pile onto an overloaded backend.
+
+Configuration (environment):
+    MAX_RETRIES                Retries after the first attempt (default 3)
+    RETRY_DELAY                Base delay in seconds (default 1)
+    RETRY_BACKOFF              Multiplier per attempt (default 2)
+    RETRY_MAX_DELAY            Longest single wait, including Retry-After (default 60)
+    CIRCUIT_FAILURE_THRESHOLD  Consecutive failures that open a circuit (default 5)
+    CIRCUIT_RESET_TIMEOUT      Seconds an open circuit waits before probing (default 30)
+    STALE_CACHE_SIZE           Last good responses kept for open circuits (default 256)
+    STALE_CACHE_MAX_BYTES      Total body size of those responses (default 32 MiB)
+"""
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+
+from mae_frontend.metrics import counter, gauge
+
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+RETRY_DELAY = float(os.getenv("RETRY_DELAY", "1"))
+RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", "2"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "60"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+STALE_CACHE_SIZE = int(os.getenv("STALE_CACHE_SIZE", "256"))
+STALE_CACHE_MAX_BYTES = int(os.getenv("STALE_CACHE_MAX_BYTES", str(32 * 1024 ** 2)))
+
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+API_RETRIES = counter("mae_api_retries_total", "Retried API requests by endpoint and reason", ("endpoint", "reason"))
+CIRCUIT_TRIPS = counter("mae_circuit_trips_total", "Times an endpoint's circuit breaker opened", ("endpoint",))
+CIRCUIT_STATE = gauge("mae_circuit_state", "Circuit breaker state (0=closed, 1=half-open, 2=open)", ("endpoint",))
+CIRCUIT_REJECTIONS = counter(
+    "mae_circuit_rejections_total", "Requests short-circuited by an open breaker", ("endpoint", "served"),
+)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised when a request is rejected because the endpoint's circuit is open"""
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date"""
+    value = (response.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, base: float = RETRY_DELAY, factor: float = RETRY_BACKOFF,
+                  max_delay: float = RETRY_MAX_DELAY) -> float:
+    """Full-jitter exponential backoff: a random wait up to base * factor ** attempt"""
+    return random.uniform(0, min(max_delay, base * factor ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: requests flow, failures are counted
+    open: requests are rejected until reset_timeout has passed
+    half-open: one probe request is let through; success closes, failure re-opens
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, endpoint: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.endpoint = endpoint
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: int):
+        self.state = state
+        CIRCUIT_STATE.labels(endpoint=self.endpoint).set(state)
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """Let another request probe a half-open circuit (the outcome was not recorded)"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+                CIRCUIT_TRIPS.labels(endpoint=self.endpoint).inc()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for an endpoint template"""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
+
+
+class StaleResponseCache:
+    """
+    LRU of the last successful response per request, served while a circuit is open.
+
+    Bounded by entry count and by the total size of the response bodies; a body larger
+    than the whole budget is not kept.
+    """
+
+    def __init__(self, max_entries: int = STALE_CACHE_SIZE, max_bytes: int = STALE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (body size, response)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, url: str, kwargs: dict):
+        body = kwargs.get("json")
+        return method, url, repr(kwargs.get("params")), repr(body) if body is not None else None
+
+    def get(self, key) -> Optional[requests.Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _drop(self, key):
+        size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def put(self, key, response: requests.Response):
+        size = len(response.content or b"")
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (size, response)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+
+STALE_RESPONSES = StaleResponseCache()
+
+
+def _is_retryable(response: requests.Response) -> bool:
+    return response.status_code in RETRYABLE_STATUSES
+
+
+def send_with_retries(send, method: str, url: str, endpoint: str, max_retries: int = MAX_RETRIES,
+                      serve_stale: bool = False, **kwargs) -> requests.Response:
+    """
+    Send a read request through the endpoint's circuit breaker, retrying transient failures.
+
+    Args:
+        send: Callable performing a single attempt, called as send(method, url, **kwargs)
+        method: HTTP method
+        url: Full request URL
+        endpoint: Path template, used for the breaker and metric labels
+        max_retries: Retries after the first attempt
+        serve_stale: Keep the last good response and return it while the circuit is open
+
+    Returns:
+        The final response. With serve_stale, the last good response for the same
+        request is returned while the circuit is open (response.stale is True).
+
+    Raises:
+        CircuitOpenError: If the circuit is open and no stale response is available
+        requests.RequestException: If every attempt failed with a connection error or timeout
+    """
+    breaker = get_breaker(endpoint)
+    stale_key = StaleResponseCache.key(method, url, kwargs)
+
+    def _serve_stale(error: Optional[Exception] = None):
+        stale = STALE_RESPONSES.get(stale_key) if serve_stale else None
+        CIRCUIT_REJECTIONS.labels(endpoint=endpoint, served="stale" if stale is not None else "none").inc()
+        if stale is not None:
+            stale.stale = True
+            return stale
+        if error is not None:
+            raise error
+        raise CircuitOpenError(f"{endpoint} is temporarily unavailable (circuit open)")
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            return _serve_stale()
+
+        try:
+            response = send(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            breaker.record_failure()
+            if attempt >= max_retries:
+                if breaker.state == CircuitBreaker.OPEN:
+                    return _serve_stale(e)
+                raise
+            reason, delay = type(e).__name__, backoff_delay(attempt)
+        else:
+            if not _is_retryable(response):
+                # Anything but overload/gateway errors means the backend is answering
+                breaker.record_success()
+                response.stale = False
+                # Only full bodies: a 304 to a conditional request would replace the last good 200
+                if serve_stale and response.status_code == 200:
+                    STALE_RESPONSES.put(stale_key, response)
+                return response
+
+            breaker.record_failure()
+            retry_after = retry_after_seconds(response)
+            # Give up rather than block the page for longer than the configured maximum
+            if attempt >= max_retries or (retry_after is not None and retry_after > RETRY_MAX_DELAY):
+                if serve_stale and breaker.state == CircuitBreaker.OPEN and STALE_RESPONSES.get(stale_key) is not None:
+                    return _serve_stale()
+                return response
+            reason = str(response.status_code)
+            delay = max(retry_after, backoff_delay(attempt)) if retry_after is not None else backoff_delay(attempt)
+            response.close()
+        finally:
+            # Any other exception leaves the outcome unrecorded; never leave a half-open circuit without a probe
+            breaker.release_probe()
+
+        API_RETRIES.labels(endpoint=endpoint, reason=reason).inc()
+        attempt += 1
+        time.sleep(delay)
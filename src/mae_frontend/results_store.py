@@ -0,0 +1,234 @@
+"""
+Normalized per-thread results for comparing names across generations.
+
+A thread's history is a deep, loosely structured state snapshot. The
+comparison view needs one flat row per brand name instead, with evaluation
+metrics, translation viability, domain availability and survey scores side by
+side. normalize_thread_results builds those rows once per thread, and
+ResultStore caches them so adding a thread to a comparison only loads that
+thread.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Evaluation fields copied into each row, keyed by column name
+EVALUATION_FIELDS = {
+    "overall_score": "overall_score",
+    "memorability": "memorability_score",
+    "pronounceability": "pronounceability_score",
+    "domain_viability": "domain_viability_score",
+    "brand_fit": "brand_fit_score",
+    "strategic_alignment": "strategic_alignment_score",
+}
+
+# Survey persona scores averaged per brand name
+SURVEY_FIELDS = {
+    "survey_market_adoption": "simulated_market_adoption_score",
+    "survey_personality_fit": "personality_fit_score",
+    "survey_differentiation": "competitive_differentiation_score",
+    "survey_brand_promise": "brand_promise_perception_score",
+}
+
+# Numeric columns offered for charting
+METRIC_COLUMNS = list(EVALUATION_FIELDS) + ["translation_viability"] + list(SURVEY_FIELDS)
+
+# How long normalized rows are reused before the thread is reloaded
+RESULT_STORE_TTL = 600.0
+
+
+def find_value_in_data(data, field_names, max_depth=10, current_depth=0):
+    """
+    Recursively search through a data structure to find values matching any of the given field names.
+
+    Args:
+        data: The data structure to search (can be dict, list, or scalar)
+        field_names: List of field names to search for
+        max_depth: Maximum recursion depth to prevent stack overflow
+        current_depth: Current recursion depth (used internally)
+
+    Returns:
+        The first matching value found, or None if no match is found
+    """
+    # Prevent excessive recursion
+    if current_depth > max_depth:
+        return None
+
+    # If data is None, return None
+    if data is None:
+        return None
+
+    # If data is a dictionary
+    if isinstance(data, dict):
+        # First check if any of our field names are direct keys
+        for field_name in field_names:
+            if field_name in data:
+                return data[field_name]
+
+        # If not found, recursively check all values
+        for value in data.values():
+            result = find_value_in_data(value, field_names, max_depth, current_depth + 1)
+            if result is not None:
+                return result
+
+    # If data is a list
+    elif isinstance(data, list):
+        # Check each item in the list
+        for item in data:
+            result = find_value_in_data(item, field_names, max_depth, current_depth + 1)
+            if result is not None:
+                return result
+
+    # If we get here, we didn't find anything
+    return None
+
+
+def to_number(value) -> Optional[float]:
+    """Read a score given as a number or as text such as "8.5" or "7/10" """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", value)
+        if match:
+            return float(match.group())
+    return None
+
+
+def _mean(values: Iterable) -> Optional[float]:
+    numbers = [n for n in (to_number(v) for v in values) if n is not None]
+    return round(sum(numbers) / len(numbers), 2) if numbers else None
+
+
+def _by_brand(results, name_keys=("brand_name", "name")) -> Dict[str, list]:
+    """Group per-name analysis results that come either as a dict keyed by name or as a list"""
+    grouped: Dict[str, list] = {}
+    if isinstance(results, dict):
+        for name, value in results.items():
+            grouped.setdefault(name, []).append(value)
+    elif isinstance(results, list):
+        for item in results:
+            if isinstance(item, dict):
+                name = next((item[key] for key in name_keys if item.get(key)), None)
+                if name:
+                    grouped.setdefault(name, []).append(item)
+    return grouped
+
+
+def _translation_entries(entries: list) -> List[dict]:
+    """Flatten translation results, which may be nested by language"""
+    flat = []
+    for entry in entries:
+        if isinstance(entry, dict) and entry and all(isinstance(v, dict) for v in entry.values()) \
+                and "target_language" not in entry:
+            flat.extend(entry.values())
+        elif isinstance(entry, dict):
+            flat.append(entry)
+    return flat
+
+
+def normalize_thread_results(thread_id: str, thread_data, created_at: Optional[str] = None) -> List[dict]:
+    """
+    Build one comparison row per brand name in a thread.
+
+    Args:
+        thread_id: Thread the results belong to
+        thread_data: Thread history or state as returned by the API
+        created_at: Thread creation time, shown alongside the results
+
+    Returns:
+        List of flat dicts, one per brand name
+    """
+    evaluations = find_value_in_data(thread_data, ["evaluation_results"]) or {}
+    translations = _by_brand(find_value_in_data(thread_data, ["translation_analysis_results"]))
+    domains = _by_brand(find_value_in_data(thread_data, ["domain_analysis_results"]))
+    surveys = _by_brand(find_value_in_data(thread_data, ["survey_simulation_results"]))
+    if not isinstance(evaluations, dict):
+        evaluations = {name: items[0] for name, items in _by_brand(evaluations).items()}
+
+    names = list(evaluations)
+    generated = find_value_in_data(thread_data, ["generated_names"])
+    if isinstance(generated, dict):
+        generated = generated.get("names", [])
+    for item in generated or []:
+        name = item.get("brand_name") or item.get("name") if isinstance(item, dict) else item
+        if isinstance(name, str) and name not in names:
+            names.append(name)
+
+    rows = []
+    for name in names:
+        evaluation = evaluations.get(name) or {}
+        row = {
+            "thread_id": thread_id,
+            "created_at": created_at,
+            "brand_name": name,
+            "shortlisted": evaluation.get("shortlist_status") == "Yes",
+        }
+        for column, field in EVALUATION_FIELDS.items():
+            row[column] = to_number(evaluation.get(field))
+
+        translation = _translation_entries(translations.get(name, []))
+        row["translation_viability"] = _mean(entry.get("rank") for entry in translation)
+        row["languages_needing_adaptation"] = sum(1 for entry in translation if entry.get("adaptation_needed"))
+
+        domain = (domains.get(name) or [{}])[0]
+        row["domain_exact_match"] = bool(domain.get("domain_exact_match")) if domain else None
+        row["domain_acquisition_cost"] = domain.get("acquisition_cost") if domain else None
+
+        personas = [
+            persona
+            for survey in surveys.get(name, [])
+            if isinstance(survey, dict)
+            for persona in survey.get("individual_personas", []) or []
+            if isinstance(persona, dict)
+        ]
+        for column, field in SURVEY_FIELDS.items():
+            row[column] = _mean(persona.get(field) for persona in personas)
+        row["survey_respondents"] = len(personas)
+        rows.append(row)
+    return rows
+
+
+class ResultStore:
+    """Thread-safe, size-bounded cache of normalized rows per thread"""
+
+    def __init__(self, ttl: float = RESULT_STORE_TTL, max_threads: int = 200):
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, thread_id: str) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._rows.get(thread_id)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                return None
+            self._rows.move_to_end(thread_id)
+            return entry[1]
+
+    def put(self, thread_id: str, rows: List[dict]):
+        with self._lock:
+            self._rows[thread_id] = (time.time(), rows)
+            self._rows.move_to_end(thread_id)
+            while len(self._rows) > self.max_threads:
+                self._rows.popitem(last=False)
+
+    def rows_for(self, thread_ids: List[str], load_missing: Callable[[List[str]], Dict[str, List[dict]]]) -> List[dict]:
+        """
+        Return rows for the given threads, loading only threads that are not cached.
+
+        Args:
+            thread_ids: Threads to compare, in display order
+            load_missing: Called with the uncached thread IDs; returns their normalized rows
+        """
+        missing = [thread_id for thread_id in thread_ids if self.cached(thread_id) is None]
+        if missing:
+            for thread_id, rows in load_missing(missing).items():
+                self.put(thread_id, rows)
+        rows = []
+        for thread_id in thread_ids:
+            rows.extend(self.cached(thread_id) or [])
+        return rows
@@ -0,0 +1,339 @@
+"""
+Lifecycle control for in-flight LangGraph runs.
+
+Tracks the streaming run owned by each browser session so it can be cancelled
+on request, when it exceeds its time budget, or when the session goes away.
+"""
+import argparse
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import requests
+from urllib3.exceptions import ReadTimeoutError
+
+from mae_frontend.api import CONNECT_TIMEOUT, api_headers, api_request
+from mae_frontend.jsoncodec import DecodeError, response_json
+
+# Timeouts (seconds), overridable from the environment
+RUN_TIMEOUT = float(os.getenv("RUN_TIMEOUT", "1800"))
+STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", "300"))
+
+# How often the reaper looks for runs whose session has gone away
+REAPER_INTERVAL = float(os.getenv("RUN_REAPER_INTERVAL", "30"))
+
+# How long a session must stay disconnected before its run is cancelled, so a
+# reconnect or reload can pick the run up first
+REAPER_GRACE = float(os.getenv("RUN_REAPER_GRACE", "120"))
+
+# Stream modes supported by the LangGraph runs/stream endpoint
+AVAILABLE_STREAM_MODES = ["updates", "values", "messages", "messages-tuple", "events", "debug", "custom"]
+
+# Node deltas only; the final state is fetched once when the run ends
+DEFAULT_STREAM_MODES = ["updates"]
+
+# Run statuses after which a run will not produce more events
+TERMINAL_RUN_STATUSES = {"success", "error", "timeout", "interrupted"}
+
+# Polling interval used when a run's stream cannot be rejoined
+RUN_POLL_INTERVAL = float(os.getenv("RUN_POLL_INTERVAL", "3"))
+
+# Consecutive failed status checks after which a polled run is given up on
+RUN_STATUS_MAX_FAILURES = int(os.getenv("RUN_STATUS_MAX_FAILURES", "3"))
+
+# Status reported for a run the API does not know (e.g. a stale ?run= after the run was deleted)
+RUN_NOT_FOUND = "not_found"
+
+# How many times a dropped stream is rejoined before giving up
+MAX_STREAM_RECONNECTS = int(os.getenv("MAX_STREAM_RECONNECTS", "3"))
+
+
+def parse_stream_modes(value) -> List[str]:
+    """
+    Normalize stream modes from a comma-separated string or a list.
+
+    Unknown modes are dropped; an empty result falls back to DEFAULT_STREAM_MODES.
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    modes = []
+    for mode in value or []:
+        mode = str(mode).strip().lower()
+        if mode in AVAILABLE_STREAM_MODES and mode not in modes:
+            modes.append(mode)
+    return modes or list(DEFAULT_STREAM_MODES)
+
+
+def configured_stream_modes(argv: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Read the stream modes from the command line or the environment.
+
+    Command line arguments go after ``--`` when launched through Streamlit, e.g.
+    ``streamlit run app.py -- --stream-mode updates --stream-mode values``.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--stream-mode", action="append", dest="stream_modes")
+    args, _ = parser.parse_known_args(argv)
+    if args.stream_modes:
+        return parse_stream_modes(",".join(args.stream_modes))
+    return parse_stream_modes(os.getenv("LANGGRAPH_STREAM_MODE", ""))
+
+
+class RunTimeoutError(Exception):
+    """Raised when a streaming run exceeds its overall or idle timeout"""
+
+
+def stream_timeout():
+    """Return the requests timeout tuple used for streaming runs"""
+    return (CONNECT_TIMEOUT, STREAM_IDLE_TIMEOUT)
+
+
+def run_id_from_response(response) -> Optional[str]:
+    """
+    Extract the run ID from a runs/stream response.
+
+    LangGraph points Content-Location at the created run, e.g.
+    /threads/<thread_id>/runs/<run_id>.
+    """
+    location = response.headers.get("Content-Location", "") if response is not None else ""
+    parts = [part for part in location.split("/") if part]
+    if "runs" in parts:
+        index = parts.index("runs")
+        if index + 1 < len(parts) and parts[index + 1] != "stream":
+            return parts[index + 1]
+    return None
+
+
+def cancel_run(api_url: str, api_key: str, thread_id: str, run_id: str, wait: bool = False) -> bool:
+    """
+    Ask the LangGraph API to cancel a run.
+
+    Returns:
+        True if the API accepted the cancellation, False otherwise
+    """
+    if not thread_id or not run_id:
+        return False
+    try:
+        response = api_request(
+            "POST",
+            f"{api_url}/threads/{thread_id}/runs/{run_id}/cancel",
+            "/threads/{thread_id}/runs/{run_id}/cancel",
+            headers=api_headers(api_key),
+            params={"wait": str(wait).lower(), "action": "interrupt"},
+            timeout=(CONNECT_TIMEOUT, 30),
+        )
+        # 404/409 mean the run already finished, which is what we wanted anyway
+        return response.status_code < 400 or response.status_code in (404, 409)
+    except requests.RequestException:
+        return False
+
+
+def join_run_stream(api_url: str, api_key: str, thread_id: str, run_id: str, last_event_id: Optional[str] = None):
+    """
+    Rejoin the event stream of a run that is still in flight.
+
+    When last_event_id is given the server only replays events after it
+    (requires the run to have been created with stream_resumable).
+
+    Returns:
+        The streaming requests response (caller must close it)
+    """
+    headers = {"X-Api-Key": api_key, "Accept": "text/event-stream"}
+    if last_event_id:
+        headers["Last-Event-ID"] = last_event_id
+
+    response = api_request(
+        "GET",
+        f"{api_url}/threads/{thread_id}/runs/{run_id}/stream",
+        "/threads/{thread_id}/runs/{run_id}/stream",
+        headers=headers,
+        stream=True,
+        timeout=stream_timeout(),
+    )
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+
+def get_run_status(api_url: str, api_key: str, thread_id: str, run_id: str) -> Optional[str]:
+    """Return the current status of a run, RUN_NOT_FOUND if the API has no such run, or None if it cannot be fetched"""
+    try:
+        response = api_request(
+            "GET",
+            f"{api_url}/threads/{thread_id}/runs/{run_id}",
+            "/threads/{thread_id}/runs/{run_id}",
+            headers=api_headers(api_key),
+            timeout=(CONNECT_TIMEOUT, 30),
+            retry=True,
+        )
+        if response.status_code == 404:
+            return RUN_NOT_FOUND
+        response.raise_for_status()
+        return response_json(response).get("status")
+    except (requests.RequestException, ValueError, AttributeError, *DecodeError):
+        return None
+
+
+def get_thread_state(api_url: str, api_key: str, thread_id: str) -> Optional[dict]:
+    """Return the latest state values of a thread"""
+    try:
+        response = api_request(
+            "GET",
+            f"{api_url}/threads/{thread_id}/state",
+            "/threads/{thread_id}/state",
+            headers=api_headers(api_key),
+            timeout=(CONNECT_TIMEOUT, 60),
+            retry=True,
+        )
+        response.raise_for_status()
+        return response_json(response).get("values")
+    except (requests.RequestException, ValueError, AttributeError, *DecodeError):
+        return None
+
+
+def iter_with_timeouts(lines: Iterable, started_at: float, run_timeout: float = RUN_TIMEOUT) -> Iterator:
+    """
+    Wrap a stream iterator with an overall deadline and idle timeout handling.
+
+    The idle timeout itself is enforced by the socket read timeout passed to
+    requests; this converts it, and the overall deadline, into RunTimeoutError.
+    """
+    deadline = started_at + run_timeout
+    iterator = iter(lines)
+    while True:
+        try:
+            line = next(iterator)
+        except StopIteration:
+            return
+        except requests.exceptions.ConnectionError as e:
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise RunTimeoutError(
+                    f"No data received from the server for {STREAM_IDLE_TIMEOUT:.0f}s"
+                ) from e
+            raise
+        except requests.exceptions.Timeout as e:
+            raise RunTimeoutError(
+                f"No data received from the server for {STREAM_IDLE_TIMEOUT:.0f}s"
+            ) from e
+
+        if time.time() > deadline:
+            raise RunTimeoutError(f"Run exceeded the {run_timeout:.0f}s time limit")
+        yield line
+
+
+class ActiveRunRegistry:
+    """
+    Process-wide registry of streaming runs, keyed by browser session ID.
+
+    A background reaper cancels runs whose session has been gone for longer
+    than the grace period or that have outlived the overall run timeout. A run
+    belongs to one session at a time: a session that resumes it (e.g. after a
+    page reload) takes it over from the session that started it.
+    """
+
+    def __init__(self, cancel_fn: Callable[[str, str], bool], run_timeout: float = RUN_TIMEOUT,
+                 grace: float = REAPER_GRACE):
+        self._cancel_fn = cancel_fn
+        self._run_timeout = run_timeout
+        self._grace = grace
+        self._runs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        session_id: str,
+        thread_id: str,
+        run_id: Optional[str] = None,
+        response=None,
+        started_at: Optional[float] = None,
+    ):
+        """Record the run currently streaming for a session, taking it over from any other session"""
+        with self._lock:
+            if run_id:
+                # The old session's stream is closed by its own script when it stops
+                for other in [other for other, entry in self._runs.items()
+                              if other != session_id and entry["thread_id"] == thread_id
+                              and entry.get("run_id") == run_id]:
+                    del self._runs[other]
+            self._runs[session_id] = {
+                "thread_id": thread_id,
+                "run_id": run_id,
+                "response": response,
+                "started_at": started_at or time.time(),
+            }
+
+    def update(self, session_id: str, **fields):
+        """Update fields (e.g. run_id) of a session's run"""
+        with self._lock:
+            if session_id in self._runs:
+                self._runs[session_id].update(fields)
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """Return a copy of the run registered for a session"""
+        with self._lock:
+            entry = self._runs.get(session_id)
+            return dict(entry) if entry else None
+
+    def active_count(self) -> int:
+        """Number of runs currently registered"""
+        with self._lock:
+            return len(self._runs)
+
+    def unregister(self, session_id: str):
+        """Forget a session's run without cancelling it"""
+        with self._lock:
+            self._runs.pop(session_id, None)
+
+    def cancel(self, session_id: str) -> bool:
+        """Close the session's stream and cancel its run on the backend"""
+        with self._lock:
+            entry = self._runs.pop(session_id, None)
+        if not entry:
+            return False
+
+        response = entry.get("response")
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+
+        return self._cancel_fn(entry["thread_id"], entry.get("run_id"))
+
+    def reap(self, is_session_active: Callable[[str], bool]) -> int:
+        """Cancel runs owned by sessions inactive for the grace period, or past the run timeout"""
+        now = time.time()
+        stale = []
+        with self._lock:
+            for session_id, entry in self._runs.items():
+                if is_session_active(session_id):
+                    entry.pop("inactive_since", None)
+                elif now - entry.setdefault("inactive_since", now) >= self._grace:
+                    stale.append(session_id)
+                    continue
+                if now - entry["started_at"] > self._run_timeout:
+                    stale.append(session_id)
+        for session_id in stale:
+            self.cancel(session_id)
+        return len(stale)
+
+    def start_reaper(self, is_session_active: Callable[[str], bool], interval: float = REAPER_INTERVAL):
+        """Start the background reaper thread (idempotent)"""
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+
+        def _loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reap(is_session_active)
+                except Exception:
+                    pass
+
+        self._reaper = threading.Thread(target=_loop, name="run-reaper", daemon=True)
+        self._reaper.start()
@@ -0,0 +1,272 @@
+"""
+Per-node timing for LangGraph runs, built from stream events.
+
+Spans are derived from three kinds of events:
+- progress events (metadata with langgraph_node) open or extend a node's span
+- update events ("updates" stream mode) close the span of the node that produced them
+- debug task events ("debug" stream mode) give exact start and end times
+
+Only spans opened by a debug task event are exact. Without the debug mode a
+node's start is inferred from the end of the node before it, which draws
+parallel nodes one after another; such spans are marked approximate.
+
+Timelines are kept per thread in a process-wide TimelineStore, so they
+survive page reloads and resumed streams. The store holds the most recent
+TIMELINE_MAX_THREADS threads in memory, and when given load and save
+callbacks it also writes each finished timeline to durable storage and reads
+it back after a restart.
+
+Configuration (environment):
+    TIMELINE_MAX_THREADS   Threads whose node timeline is kept (default 200)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+TIMELINE_MAX_THREADS = int(os.getenv("TIMELINE_MAX_THREADS", "200"))
+
+
+def extract_token_count(payload, max_depth: int = 4) -> int:
+    """
+    Find a token count in an event payload or its metadata.
+
+    Looks for LangChain usage_metadata, OpenAI-style token_usage and the
+    prompt_tokens/completion_tokens pair, including in the messages of a state
+    update, without walking the whole payload.
+    """
+    if max_depth < 0:
+        return 0
+
+    if isinstance(payload, dict):
+        for usage_key in ("usage_metadata", "token_usage", "usage"):
+            usage = payload.get(usage_key)
+            if isinstance(usage, dict):
+                total = usage.get("total_tokens")
+                if isinstance(total, (int, float)):
+                    return int(total)
+                return int(
+                    (usage.get("input_tokens") or usage.get("prompt_tokens") or 0)
+                    + (usage.get("output_tokens") or usage.get("completion_tokens") or 0)
+                )
+
+        prompt = payload.get("prompt_tokens")
+        completion = payload.get("completion_tokens")
+        if isinstance(prompt, (int, float)) or isinstance(completion, (int, float)):
+            return int((prompt or 0) + (completion or 0))
+
+        for key in ("metadata", "response_metadata", "llm_output"):
+            if isinstance(payload.get(key), dict):
+                found = extract_token_count(payload[key], max_depth - 1)
+                if found:
+                    return found
+
+        if isinstance(payload.get("messages"), list):
+            return extract_token_count(payload["messages"], max_depth - 1)
+
+    elif isinstance(payload, list):
+        return sum(extract_token_count(item, max_depth - 1) for item in payload[:8])
+
+    return 0
+
+
+class NodeTimeline:
+    """
+    Timeline of node executions for a single run.
+
+    Times are stored in seconds relative to the start of the run.
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at or time.time()
+        self.spans: List[dict] = []
+
+    def _now(self, at: Optional[float]) -> float:
+        return (at or time.time()) - self.started_at
+
+    def _open_span(self, node: str) -> Optional[dict]:
+        """Return the latest span for node if it is still open"""
+        for span in reversed(self.spans):
+            if span["node"] == node and span["end"] is None:
+                return span
+        return None
+
+    def _last_end(self) -> float:
+        ends = [span["end"] for span in self.spans if span["end"] is not None]
+        return max(ends) if ends else 0.0
+
+    def _new_span(self, node: str, start: float, step=None) -> dict:
+        span = {
+            "node": node,
+            "step": step,
+            "start": start,
+            "end": None,
+            "last_seen": start,
+            "events": 0,
+            "tokens": 0,
+            "bytes": 0,
+            "exact": False,
+        }
+        self.spans.append(span)
+        return span
+
+    @staticmethod
+    def _account(span: dict, now: float, step, tokens: int, nbytes: int):
+        span["events"] += 1
+        span["tokens"] += tokens or 0
+        span["bytes"] += nbytes or 0
+        span["last_seen"] = max(span["last_seen"], now)
+        if step is not None:
+            span["step"] = step
+
+    @property
+    def approximate(self) -> bool:
+        """Whether any span's start was inferred rather than reported"""
+        return any(not span["exact"] for span in self.spans)
+
+    def node_started(self, node: str, step=None, at: Optional[float] = None):
+        """Record that a node started executing"""
+        if self._open_span(node) is None:
+            self._new_span(node, self._now(at), step)["exact"] = True
+
+    def node_progress(self, node: str, step=None, tokens: int = 0, nbytes: int = 0, at: Optional[float] = None):
+        """Record an event emitted while a node is running"""
+        now = self._now(at)
+        span = self._open_span(node) or self._new_span(node, now, step)
+        self._account(span, now, step, tokens, nbytes)
+
+    def node_finished(self, node: str, step=None, tokens: int = 0, nbytes: int = 0, at: Optional[float] = None) -> int:
+        """
+        Record that a node finished, returning the tokens credited to it.
+
+        If the node's start was never seen, it is assumed to have started when
+        the previous node finished (or at the start of the run). Tokens already
+        counted from the node's message events are not counted again.
+        """
+        now = self._now(at)
+        span = self._open_span(node) or self._new_span(node, min(self._last_end(), now), step)
+        if span["tokens"]:
+            tokens = 0
+        self._account(span, now, step, tokens, nbytes)
+        span["end"] = now
+        return tokens or 0
+
+    def close(self, at: Optional[float] = None):
+        """
+        Close any spans still open at the end of the stream.
+
+        A span that only saw progress events is assumed to run until the next
+        node started, or until the end of the stream if it was the last one.
+        """
+        now = self._now(at)
+        for index, span in enumerate(self.spans):
+            if span["end"] is not None:
+                continue
+            next_starts = [
+                other["start"]
+                for other in self.spans[index + 1:]
+                if other["node"] != span["node"] and other["start"] >= span["start"]
+            ]
+            span["end"] = max(span["last_seen"], min(next_starts) if next_starts else now)
+
+    def rows(self) -> List[dict]:
+        """Return one row per span, suitable for a DataFrame or chart"""
+        rows = []
+        for span in self.spans:
+            end = span["end"] if span["end"] is not None else span["last_seen"]
+            rows.append({
+                "node": span["node"],
+                "step": span["step"],
+                "start": round(span["start"], 3),
+                "end": round(end, 3),
+                "duration": round(max(end - span["start"], 0.0), 3),
+                "events": span["events"],
+                "tokens": span["tokens"],
+                "bytes": span["bytes"],
+                "timing": "exact" if span["exact"] else "approximate",
+            })
+        return rows
+
+    def summary(self) -> List[dict]:
+        """Aggregate spans per node, sorted by total duration (slowest first)"""
+        totals: Dict[str, dict] = {}
+        for row in self.rows():
+            entry = totals.setdefault(row["node"], {
+                "node": row["node"],
+                "runs": 0,
+                "duration": 0.0,
+                "tokens": 0,
+                "bytes": 0,
+                "timing": "exact",
+            })
+            entry["runs"] += 1
+            entry["duration"] += row["duration"]
+            entry["tokens"] += row["tokens"]
+            entry["bytes"] += row["bytes"]
+            if row["timing"] != "exact":
+                entry["timing"] = row["timing"]
+
+        total_duration = sum(entry["duration"] for entry in totals.values()) or 1.0
+        result = sorted(totals.values(), key=lambda entry: entry["duration"], reverse=True)
+        for entry in result:
+            entry["duration"] = round(entry["duration"], 3)
+            entry["share"] = round(100 * entry["duration"] / total_duration, 1)
+        return result
+
+    def to_dict(self) -> dict:
+        return {"started_at": self.started_at, "spans": [dict(span) for span in self.spans]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NodeTimeline":
+        timeline = cls(data["started_at"])
+        timeline.spans = [{"exact": False, **span} for span in data.get("spans", [])]
+        return timeline
+
+
+class TimelineStore:
+    """
+    Thread-safe LRU of node timelines by thread ID, shared by every session.
+
+    load(thread_id) and save(thread_id, data) connect it to durable storage:
+    timelines missing from memory are loaded on first use, and save() writes a
+    thread's timeline out (normally once its stream has ended).
+    """
+
+    def __init__(self, max_threads: int = TIMELINE_MAX_THREADS,
+                 load: Optional[Callable[[str], Optional[dict]]] = None,
+                 save: Optional[Callable[[str, dict], None]] = None):
+        self.max_threads = max(1, max_threads)
+        self._timelines: "OrderedDict[str, NodeTimeline]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load = load
+        self._save = save
+
+    def get(self, thread_id: Optional[str]) -> Optional[NodeTimeline]:
+        with self._lock:
+            timeline = self._timelines.get(thread_id)
+            if timeline is not None:
+                self._timelines.move_to_end(thread_id)
+                return timeline
+        if thread_id is None or self._load is None:
+            return None
+        data = self._load(thread_id)
+        if not data:
+            return None
+        timeline = NodeTimeline.from_dict(data)
+        self.put(thread_id, timeline)
+        return timeline
+
+    def put(self, thread_id: str, timeline: NodeTimeline):
+        with self._lock:
+            self._timelines[thread_id] = timeline
+            self._timelines.move_to_end(thread_id)
+            while len(self._timelines) > self.max_threads:
+                self._timelines.popitem(last=False)
+
+    def save(self, thread_id: Optional[str]):
+        """Write a thread's timeline to durable storage, if the store has any"""
+        with self._lock:
+            timeline = self._timelines.get(thread_id)
+        if timeline is not None and self._save is not None:
+            self._save(thread_id, timeline.to_dict())
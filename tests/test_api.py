@@ -0,0 +1,71 @@
+import zlib
+
+import pytest
+
+from mae_frontend import api
+from mae_frontend.api import _decompressor, iter_lines
+
+
+@pytest.fixture
+def body(monkeypatch):
+    """Feed iter_lines a body in the given chunks"""
+    def feed(*chunks):
+        monkeypatch.setattr(api, "iter_body", lambda response, endpoint, chunk_size=None: iter(chunks))
+        return list(iter_lines(None, "/stream"))
+    return feed
+
+
+def test_lines_split_across_chunks_are_joined(body):
+    assert body(b"event: val", b"ues\ndata: {\"a\"", b": 1}\n\n") == [b"event: values", b'data: {"a": 1}', b""]
+
+
+def test_a_final_line_without_a_line_break_is_kept(body):
+    assert body(b"data: 1\ndata: 2") == [b"data: 1", b"data: 2"]
+
+
+def test_crlf_line_breaks(body):
+    assert body(b"data: 1\r\ndata: 2\r\n\r\n") == [b"data: 1", b"data: 2", b""]
+
+
+def test_crlf_split_between_chunks_is_one_line_break(body):
+    assert body(b"data: 1\r", b"\ndata: 2\r", b"\n\r", b"\n") == [b"data: 1", b"data: 2", b""]
+
+
+def test_empty_chunks_are_ignored(body):
+    assert body(b"", b"data: 1", b"", b"\n") == [b"data: 1"]
+
+
+@pytest.mark.parametrize("retry", [False, True])
+def test_requests_without_a_timeout_get_the_defaults(monkeypatch, retry):
+    sent = {}
+
+    def send(method, url, endpoint, **kwargs):
+        sent.update(kwargs)
+        return "response"
+
+    monkeypatch.setattr(api, "_send", send)
+    monkeypatch.setattr(api, "send_with_retries", lambda fn, method, url, endpoint, serve_stale, **kw: fn(method, url, **kw))
+    api.api_request("POST", "http://api/threads", "/threads", retry=retry, json={})
+    assert sent["timeout"] == (api.CONNECT_TIMEOUT, api.READ_TIMEOUT)
+
+    api.api_request("POST", "http://api/threads", "/threads", retry=retry, timeout=5)
+    assert sent["timeout"] == 5
+
+
+def _deflate(data: bytes, wbits: int) -> bytes:
+    compressor = zlib.compressobj(wbits=wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize("wbits", [zlib.MAX_WBITS, -zlib.MAX_WBITS], ids=["zlib", "raw"])
+def test_deflate_bodies_decode_with_or_without_a_zlib_header(wbits):
+    data = b"data: " + b"x" * 5000 + b"\n\n"
+    body = _deflate(data, wbits)
+    decode = _decompressor("deflate")
+    assert b"".join(decode(body[i:i + 7]) for i in range(0, len(body), 7)) == data
+
+
+def test_corrupt_deflate_bodies_still_fail():
+    decode = _decompressor("deflate")
+    with pytest.raises(zlib.error):
+        decode(b"\xff" * 64)
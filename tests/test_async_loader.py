@@ -0,0 +1,133 @@
+import concurrent.futures
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mae_frontend import api
+from mae_frontend.async_loader import PageLoadCancelled, PageLoader
+
+
+@pytest.fixture
+def loader():
+    return PageLoader(max_concurrency=4)
+
+
+@pytest.fixture
+def stalled_url():
+    """A server that sends headers and part of the body, then stalls"""
+    class Stalled(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b"x" * 10)
+            self.wfile.flush()
+            time.sleep(5)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stalled)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_calls_run_concurrently_and_return_by_name(loader):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def call(value):
+        # Only returns once all three calls are running at the same time
+        barrier.wait()
+        return value
+
+    results = loader.gather({name: (lambda name=name: call(name)) for name in ("history", "details", "runs")})
+    assert results == {"history": "history", "details": "details", "runs": "runs"}
+
+
+def test_the_pool_bounds_calls_in_flight():
+    loader = PageLoader(max_concurrency=2)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    loader.gather({i: call for i in range(6)})
+    assert peak[0] == 2
+
+
+def test_errors_are_raised_after_every_call_finished(loader):
+    finished = []
+
+    def slow():
+        time.sleep(0.1)
+        finished.append("slow")
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        loader.gather({"fail": fail, "slow": slow})
+    assert finished == ["slow"]
+
+
+def test_a_single_call_runs_on_the_callers_thread(loader):
+    assert loader.gather({"only": threading.current_thread}) == {"only": threading.current_thread()}
+
+
+def test_timeouts_skip_calls_that_have_not_started():
+    loader = PageLoader(max_concurrency=1)
+    started = []
+
+    def call(name):
+        started.append(name)
+        time.sleep(0.3)
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        loader.gather({"first": lambda: call("first"), "second": lambda: call("second")}, timeout=0.1)
+    time.sleep(0.4)
+    assert started == ["first"]
+
+
+def test_cancelling_a_scope_aborts_requests_in_flight(loader, stalled_url):
+    def fetch():
+        return api.api_request("GET", stalled_url, "/stalled")
+
+    threading.Timer(0.3, loader.cancel_scope, args=("session-1",)).start()
+    started = time.monotonic()
+    with pytest.raises(PageLoadCancelled):
+        loader.gather({"a": fetch, "b": fetch}, scope="session-1")
+    assert time.monotonic() - started < 2
+
+
+def test_reap_cancels_loads_of_inactive_sessions(loader, stalled_url):
+    def fetch():
+        return api.api_request("GET", stalled_url, "/stalled")
+
+    threading.Timer(0.3, loader.reap, args=(lambda session_id: session_id != "gone",)).start()
+    started = time.monotonic()
+    with pytest.raises(PageLoadCancelled):
+        loader.gather({"only": fetch}, scope="gone")
+    assert time.monotonic() - started < 2
+
+
+def test_requests_in_a_cancelled_scope_fail_without_being_sent(monkeypatch):
+    monkeypatch.setattr(api._session, "request", lambda *args, **kwargs: pytest.fail("request was sent"))
+    scope = api.CancelScope()
+    scope.cancel()
+    with api.request_scope(scope):
+        assert api.request_cancelled()
+        with pytest.raises(api.RequestCancelled):
+            api.api_request("GET", "http://api/threads", "/threads")
+    assert not api.request_cancelled()
@@ -0,0 +1,79 @@
+import pytest
+
+from mae_frontend import blob_store
+from mae_frontend.blob_store import REF_KEY, BlobStore, guarded
+from mae_frontend.resilience import CircuitBreaker
+
+
+def history(step_names):
+    context = {"brand_promise": "Clarity for growing businesses. " * 20}
+    return [
+        {"checkpoint": {"checkpoint_id": f"c{i}"},
+         "values": {"brand_context": context, "generated_names": [f"Name{n}" for n in range(count)]}}
+        for i, count in enumerate(step_names)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs.db"), min_subtree_bytes=256)
+
+
+def blob_count(store):
+    return store._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+
+def test_round_trip(store):
+    value = history([0, 5, 10])
+    assert store.get(store.put(value)) == value
+
+
+def test_small_values_get_a_root_blob(store):
+    assert store.get(store.put({"a": 1})) == {"a": 1}
+    assert store.get(store.put([])) == []
+
+
+def test_repeated_subtrees_are_stored_once(store):
+    first = store.put(history([0, 5]))
+    blobs = blob_count(store)
+    # The same brand context repeats in every checkpoint and in every refetch
+    assert store.put(history([0, 5])) == first
+    assert blob_count(store) == blobs
+    store.put(history([0, 5, 6]))
+    assert blob_count(store) < 2 * blobs
+
+
+def test_refs_name_stored_values(store):
+    value = history([3])
+    store.set_ref("thread_history:abc", store.put(value))
+    assert store.get_value("thread_history:abc") == value
+    assert store.get_value("missing") is None
+
+
+def test_garbage_collection_keeps_only_reachable_blobs(store):
+    kept = history([1])
+    store.set_ref("kept", store.put(kept))
+    store.put({"orphan": "x" * 1000})
+    assert store.collect_garbage() > 0
+    assert store.get_value("kept") == kept
+
+    # Refs past their retention are dropped, and their blobs with them
+    store.collect_garbage(retention_days=-1)
+    assert store.get_value("kept") is None
+    assert blob_count(store) == 0
+
+
+def test_values_cannot_forge_refs(store):
+    assert REF_KEY.startswith("\x00")
+    value = {"blob": "not a ref", "items": ["x" * 300]}
+    assert store.get(store.put(value)) == value
+
+
+def test_guarded_turns_failures_into_none(monkeypatch):
+    monkeypatch.setattr(blob_store, "_breaker", CircuitBreaker("blobs-test", failure_threshold=2))
+
+    def locked():
+        raise blob_store.sqlite3.OperationalError("database is locked")
+
+    assert guarded("put", locked) is None
+    assert guarded("get", lambda: "value") == "value"
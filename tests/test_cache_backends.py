@@ -0,0 +1,165 @@
+import itertools
+
+import pytest
+
+from mae_frontend import cache_backends
+from mae_frontend.cache_backends import (
+    CacheBackend,
+    MemoryBackend,
+    RedisBackend,
+    SafeBackend,
+    SQLiteBackend,
+    cache_key,
+    create_backend,
+)
+
+_names = itertools.count()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(cache_backends.time, "time", fake)
+    return fake
+
+
+def _redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisBackend(client=fakeredis.FakeRedis())
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_bytes=1024)
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "cache.db"), max_bytes=1024)
+    return _redis_backend()
+
+
+def test_round_trip_and_prefix_deletes(backend):
+    backend.set("threads:1", b"one", 60)
+    backend.set("threads:2", b"two", 60)
+    backend.set("runs:1", b"run", 60)
+    assert backend.get("threads:1") == b"one"
+    assert backend.get("missing") is None
+
+    backend.delete_prefix("threads:")
+    assert backend.get("threads:1") is None and backend.get("threads:2") is None
+    assert backend.get("runs:1") == b"run"
+
+    backend.delete_prefix()
+    assert backend.get("runs:1") is None
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_entries_expire_after_their_ttl(kind, tmp_path, clock):
+    backend = MemoryBackend() if kind == "memory" else SQLiteBackend(str(tmp_path / "cache.db"))
+    backend.set("k", b"v", 10)
+    clock.now += 9
+    assert backend.get("k") == b"v"
+    clock.now += 2
+    assert backend.get("k") is None
+
+
+def test_redis_entries_get_a_ttl():
+    backend = _redis_backend()
+    backend.set("k", b"v", 1.5)
+    assert 0 < backend._client.pttl("k") <= 1500
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_least_recently_used_entries_are_evicted_to_fit_the_budget(kind, tmp_path, clock):
+    backend = MemoryBackend(max_bytes=30) if kind == "memory" else SQLiteBackend(str(tmp_path / "c.db"), max_bytes=30)
+    backend.set("a", b"x" * 10, 600)
+    clock.now += SQLiteBackend.TOUCH_INTERVAL + 1
+    backend.set("b", b"x" * 10, 600)
+    clock.now += SQLiteBackend.TOUCH_INTERVAL + 1
+    backend.get("a")
+    clock.now += SQLiteBackend.TOUCH_INTERVAL + 1
+    backend.set("c", b"x" * 15, 600)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == b"x" * 10
+    assert backend.get("c") == b"x" * 15
+
+    # A value larger than the whole budget is not cached at all
+    backend.set("huge", b"x" * 31, 600)
+    assert backend.get("huge") is None
+
+
+def test_memory_backend_tracks_its_size():
+    backend = MemoryBackend(max_bytes=100)
+    backend.set("a", b"x" * 10, 60)
+    backend.set("a", b"x" * 20, 60)
+    backend.set("b", b"x" * 5, 60)
+    assert backend.bytes == 25
+
+
+class BrokenBackend(CacheBackend):
+    def __init__(self):
+        self.name = f"broken-{next(_names)}"
+        self.calls = 0
+
+    def get(self, *args):
+        self.calls += 1
+        raise ConnectionError("cache down")
+
+    set = delete_prefix = get
+
+
+def test_safe_backend_turns_failures_into_misses_then_opens_its_breaker():
+    broken = BrokenBackend()
+    safe = SafeBackend(broken, key_prefix="test:")
+    safe._breaker.failure_threshold = 2
+    safe._breaker.reset_timeout = 60
+
+    assert safe.get("k") is None
+    safe.set("k", b"v", 60)
+    assert broken.calls == 2
+
+    # The open breaker skips the backend entirely
+    assert safe.get("k") is None
+    safe.delete_prefix("threads:")
+    assert broken.calls == 2
+
+
+def test_safe_backend_prefixes_keys():
+    inner = MemoryBackend()
+    safe = SafeBackend(inner, key_prefix="app1:")
+    safe.set("threads:1", b"v", 60)
+    assert inner.get("app1:threads:1") == b"v"
+    assert SafeBackend(inner, key_prefix="app2:").get("threads:1") is None
+
+    safe.delete_prefix("threads:")
+    assert inner.get("app1:threads:1") is None
+
+
+def test_cache_keys_differ_per_api_url_and_key():
+    args = ("thread-1",)
+    key = cache_key("threads", "https://api.one", "key-a", args, {})
+    assert key.startswith("threads:")
+    assert key == cache_key("threads", "https://api.one", "key-a", args, {})
+    assert key != cache_key("threads", "https://api.two", "key-a", args, {})
+    assert key != cache_key("threads", "https://api.one", "key-b", args, {})
+    assert key != cache_key("runs", "https://api.one", "key-a", args, {})
+    # The key itself never reveals the API key
+    assert "key-a" not in key
+
+
+def test_unknown_or_unavailable_backends_fall_back_to_memory(monkeypatch):
+    assert isinstance(create_backend("bogus").backend, MemoryBackend)
+
+    def missing(*args, **kwargs):
+        raise ImportError("redis")
+
+    monkeypatch.setattr(cache_backends, "RedisBackend", missing)
+    assert isinstance(create_backend("redis").backend, MemoryBackend)
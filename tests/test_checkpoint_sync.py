@@ -0,0 +1,107 @@
+from mae_frontend.checkpoint_sync import CheckpointSync, merge_history
+from mae_frontend.history_extract import prune_history
+
+
+class FakeThread:
+    """A thread's history on the server, newest checkpoint first, with request counters"""
+
+    def __init__(self):
+        self.checkpoints = []
+        self.full_fetches = 0
+        self.pages = []
+
+    def add(self, **values):
+        step = len(self.checkpoints)
+        self.checkpoints.insert(0, {"checkpoint": {"checkpoint_id": f"c{step}"}, "values": values})
+
+    def fetch_full(self, thread_id):
+        self.full_fetches += 1
+        return prune_history(self.checkpoints)
+
+    def fetch_page(self, thread_id, limit, before):
+        self.pages.append(limit)
+        start = 0
+        if before is not None:
+            start = next(i for i, c in enumerate(self.checkpoints) if c["checkpoint"] == before) + 1
+        return self.checkpoints[start:start + limit]
+
+
+def make_sync(thread, **kwargs):
+    return CheckpointSync(thread.fetch_full, thread.fetch_page, **kwargs)
+
+
+def test_first_sync_fetches_the_whole_history():
+    thread = FakeThread()
+    thread.add(user_prompt="A firm")
+    sync = make_sync(thread)
+    assert sync.sync("t") == prune_history(thread.checkpoints)
+    assert thread.full_fetches == 1 and thread.pages == []
+
+
+def test_unchanged_thread_costs_one_checkpoint():
+    thread = FakeThread()
+    thread.add(user_prompt="A firm")
+    sync = make_sync(thread)
+    first = sync.sync("t")
+    assert sync.sync("t") is first
+    assert thread.full_fetches == 1 and thread.pages == [1]
+
+
+def test_incremental_sync_matches_a_full_fetch():
+    thread = FakeThread()
+    thread.add(user_prompt="A firm", brand_promise="Clarity")
+    sync = make_sync(thread, page_size=4)
+    sync.sync("t")
+
+    for step in range(6):
+        thread.add(generated_names=[f"Name{n}" for n in range(step)])
+    history = sync.sync("t")
+
+    assert history == prune_history(thread.checkpoints)
+    assert thread.full_fetches == 1
+    # Pages widen from one checkpoint up to page_size, stopping at the known checkpoint
+    assert thread.pages == [1, 2, 4]
+
+
+def test_rewound_thread_falls_back_to_a_full_fetch():
+    thread = FakeThread()
+    thread.add(user_prompt="A firm")
+    sync = make_sync(thread)
+    sync.sync("t")
+
+    thread.checkpoints = []
+    thread.add(user_prompt="Another firm")
+    thread.checkpoints[0]["checkpoint"]["checkpoint_id"] = "rewound"
+    assert sync.sync("t") == prune_history(thread.checkpoints)
+    assert thread.full_fetches == 2
+
+
+def test_too_many_new_checkpoints_fall_back_to_a_full_fetch():
+    thread = FakeThread()
+    thread.add(user_prompt="A firm")
+    sync = make_sync(thread, max_new=3)
+    sync.sync("t")
+    for step in range(10):
+        thread.add(generated_names=[step])
+    assert sync.sync("t") == prune_history(thread.checkpoints)
+    assert thread.full_fetches == 2
+
+
+def test_stored_history_seeds_a_thread_without_sync_state():
+    thread = FakeThread()
+    thread.add(user_prompt="A firm")
+    stored = prune_history(thread.checkpoints)
+    thread.add(generated_names=["Lumora"])
+
+    sync = make_sync(thread, load_stored=lambda thread_id: stored)
+    assert sync.sync("t") == prune_history(thread.checkpoints)
+    assert thread.full_fetches == 0 and thread.pages == [1, 2]
+
+
+def test_merge_keeps_keys_the_newer_checkpoints_lack():
+    cached = [{"checkpoint": {"checkpoint_id": "c1"}, "values": {"user_prompt": "A firm", "generated_names": []}}]
+    newer = [{"checkpoint": {"checkpoint_id": "c2"}, "values": {"generated_names": ["Lumora"]}}]
+    assert merge_history(newer, cached) == [
+        {"checkpoint": {"checkpoint_id": "c2"}, "values": {"user_prompt": "A firm", "generated_names": ["Lumora"]}}
+    ]
+    assert merge_history([], cached) is cached
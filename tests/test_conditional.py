@@ -0,0 +1,80 @@
+import json
+
+import pytest
+import requests
+
+from mae_frontend import conditional
+from mae_frontend.conditional import ValidatorCache, conditional_get
+
+
+def make_response(status=200, value=None, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(value).encode("utf-8") if value is not None else b""
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Records request headers and answers with the queued responses"""
+    calls, responses = [], []
+
+    def api_request(method, url, endpoint, headers=None, **kwargs):
+        calls.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(conditional, "api_request", api_request)
+    return calls, responses
+
+
+def test_not_modified_reuses_the_cached_body(server):
+    calls, responses = server
+    cache = ValidatorCache()
+    responses.append(make_response(200, {"status": "busy"}, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024"}))
+    first = conditional_get("http://api/threads/t", "/threads/{thread_id}", {"X-Api-Key": "k"}, cache=cache)
+    assert first.value == {"status": "busy"} and not first.revalidated
+
+    responses.append(make_response(304))
+    second = conditional_get("http://api/threads/t", "/threads/{thread_id}", {"X-Api-Key": "k"}, cache=cache)
+    assert second.value == {"status": "busy"} and second.status_code == 200 and second.revalidated
+    assert calls[1]["If-None-Match"] == '"v1"' and calls[1]["If-Modified-Since"] == "Mon, 01 Jan 2024"
+    # The caller's headers are not modified
+    assert "If-None-Match" not in calls[0]
+
+
+def test_settled_values_are_reused_without_a_request(server):
+    calls, responses = server
+    cache = ValidatorCache()
+    finished = lambda run: run.get("status") == "success"
+
+    responses.append(make_response(200, {"status": "running"}))
+    conditional_get("http://api/runs/r", "/runs/{run_id}", {}, settled=finished, cache=cache)
+    responses.append(make_response(200, {"status": "success"}))
+    conditional_get("http://api/runs/r", "/runs/{run_id}", {}, settled=finished, cache=cache)
+
+    fetched = conditional_get("http://api/runs/r", "/runs/{run_id}", {}, settled=finished, cache=cache)
+    assert fetched.value == {"status": "success"} and fetched.revalidated and fetched.response is None
+    assert len(calls) == 2
+
+
+def test_unvalidated_responses_are_not_kept(server):
+    calls, responses = server
+    cache = ValidatorCache()
+    responses.append(make_response(200, {"a": 1}))
+    conditional_get("http://api/x", "/x", {}, cache=cache)
+    assert cache.get("http://api/x") is None
+
+
+def test_errors_return_no_value(server):
+    calls, responses = server
+    responses.append(make_response(404, {"detail": "not found"}))
+    fetched = conditional_get("http://api/x", "/x", {}, cache=ValidatorCache())
+    assert fetched.value is None and fetched.status_code == 404
+
+
+def test_validator_cache_is_bounded():
+    cache = ValidatorCache(max_entries=2)
+    for url in ("a", "b", "c"):
+        cache.put(url, conditional.Validated(url, None, None))
+    assert cache.get("a") is None and cache.get("c").value == "c"
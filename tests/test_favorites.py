@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+
+import pytest
+
+from mae_frontend.favorites import Favorites, FavoritesStore, is_anonymous_user_id, new_user_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FavoritesStore(str(tmp_path / "favorites.db"))
+    yield store
+    store.close()
+
+
+def test_favorites_persist_per_user(store, tmp_path):
+    favorites = Favorites(store, "alice")
+    assert favorites.add("Lumora", thread_id="thread-1", score=8.5, metadata={"category": "Evocative"})
+    assert not favorites.add("Lumora")
+    Favorites(store, "bob").add("Vantiq")
+
+    reopened = FavoritesStore(str(tmp_path / "favorites.db"))
+    alice = Favorites(reopened, "alice")
+    assert list(alice) == ["Lumora"]
+    assert alice.get("Lumora")["metadata"] == {"category": "Evocative"}
+    assert "Vantiq" not in alice
+    reopened.close()
+
+
+def test_remove_and_reload(store):
+    session_a = Favorites(store, "alice")
+    session_b = Favorites(store, "alice")
+    session_a.add("Lumora")
+    session_a.add("Vantiq")
+    assert session_a.remove("Lumora")
+    assert not session_a.remove("Lumora")
+
+    session_b.reload()
+    assert list(session_b) == ["Vantiq"]
+
+
+def test_membership_only_matches_strings(store):
+    favorites = Favorites(store, "alice")
+    favorites.add("Lumora")
+    assert "Lumora" in favorites
+    assert {"brand_name": "Lumora"} not in favorites
+
+
+def test_exports(store):
+    favorites = Favorites(store, "alice")
+    favorites.add("Lumora", thread_id="thread-1", score=8.0)
+    favorites.add("Vantiq")
+
+    rows = list(csv.DictReader(io.StringIO(favorites.export_csv())))
+    assert [row["name"] for row in rows] == ["Lumora", "Vantiq"]
+    assert rows[0]["thread_id"] == "thread-1" and rows[0]["score"] == "8.0"
+
+    exported = json.loads(favorites.export_json())
+    assert [record["name"] for record in exported] == ["Lumora", "Vantiq"]
+
+
+def test_anonymous_user_ids_are_random_and_validated():
+    user_id = new_user_id()
+    assert is_anonymous_user_id(user_id)
+    assert new_user_id() != user_id
+    assert not is_anonymous_user_id(None)
+    assert not is_anonymous_user_id("abc")
+    assert not is_anonymous_user_id(user_id[:-1] + "'")
+
+
+def test_reassign_moves_favorites_to_the_new_user(store):
+    Favorites(store, "link-user").add("Acme", thread_id="t1")
+    Favorites(store, "link-user").add("Zenith", thread_id="t1")
+    Favorites(store, "cookie-user").add("Zenith", thread_id="t2")
+
+    assert store.reassign("link-user", "cookie-user") == 1
+    assert store.load("link-user") == []
+    names = {record["name"]: record["thread_id"] for record in store.load("cookie-user")}
+    assert names == {"Acme": "t1", "Zenith": "t2"}
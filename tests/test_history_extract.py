@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from mae_frontend.history_extract import prune_history
+
+HISTORY = [
+    {"checkpoint": {"checkpoint_id": "c3"}, "created_at": "2024-01-03", "next": [], "metadata": {"step": 3},
+     "values": {"generated_names": [{"brand_name": "Lumora"}], "evaluation_results": {"Lumora": {"score": 8}},
+                "messages": ["large and unused"] * 10}},
+    {"checkpoint": {"checkpoint_id": "c2"}, "created_at": "2024-01-02",
+     "values": {"generated_names": [], "brand_promise": "Clarity", "user_prompt": "A firm"}},
+    {"checkpoint": {"checkpoint_id": "c1"}, "created_at": "2024-01-01",
+     "values": {"brand_promise": "Older promise", "brand_values": ["trust", 1.5, None, True]}},
+]
+
+EXPECTED = [{
+    "checkpoint": {"checkpoint_id": "c3"}, "created_at": "2024-01-03", "next": [],
+    "values": {
+        "generated_names": [{"brand_name": "Lumora"}],
+        "evaluation_results": {"Lumora": {"score": 8}},
+        "brand_promise": "Clarity",
+        "user_prompt": "A firm",
+        "brand_values": ["trust", 1.5, None, True],
+    },
+}]
+
+
+def test_prune_keeps_the_newest_value_of_each_report_key():
+    assert prune_history(HISTORY) == EXPECTED
+
+
+def test_prune_ignores_malformed_histories():
+    assert prune_history(None) == []
+    assert prune_history([]) == []
+    assert prune_history(["not a checkpoint"]) == [{"values": {}}]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_extract_while_downloading_matches_prune(chunk_size):
+    pytest.importorskip("ijson")
+    from mae_frontend.history_extract import extract_history
+
+    body = json.dumps(HISTORY).encode("utf-8")
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    assert extract_history(iter(chunks)) == prune_history(HISTORY)
+
+
+def test_extract_stops_reading_once_every_key_is_found():
+    pytest.importorskip("ijson")
+    from mae_frontend.history_extract import extract_history
+
+    keys = frozenset({"generated_names"})
+    newest = {"checkpoint": {"checkpoint_id": "c2"}, "values": {"generated_names": ["Lumora"]}}
+    body = json.dumps([newest, {"values": {"generated_names": ["Old"]}}], separators=(",", ":")).encode("utf-8")
+    split = body.index(b"},{") + 2
+    read = []
+
+    def chunks():
+        for chunk in (body[:split], body[split:]):
+            read.append(chunk)
+            yield chunk
+
+    assert extract_history(chunks(), keys) == prune_history(json.loads(body), keys)
+    # The parser may look ahead into the second chunk, but nothing is requested after it
+    assert len(read) <= 2
@@ -0,0 +1,108 @@
+import pytest
+
+from mae_frontend.name_index import (
+    NameIndex,
+    bounded_levenshtein,
+    closest_matches,
+    metaphone,
+    normalize_name,
+    soundex,
+)
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("kitten", "sitting"), ("", "abc"), ("abc", ""), ("flaw", "lawn"), ("zenith", "zenith"),
+    ("aurora", "arora"), ("nexora", "nexorra"), ("abcdefghij", "jihgfedcba"),
+])
+def test_bounded_levenshtein_matches_full_distance_within_limit(a, b):
+    distance = levenshtein(a, b)
+    for limit in range(0, 5):
+        expected = distance if distance <= limit else None
+        assert bounded_levenshtein(a, b, limit) == expected
+
+
+def test_bounded_levenshtein_handles_names_longer_than_a_machine_word():
+    a = "x" * 100 + "abc"
+    assert bounded_levenshtein(a, "x" * 100 + "abd", 2) == 1
+    assert bounded_levenshtein(a, "y" * 103, 2) is None
+
+
+def test_normalize_name_drops_case_spacing_and_diacritics():
+    assert normalize_name("Zéta-Labs") == normalize_name("zeta labs") == "zetalabs"
+
+
+def test_phonetic_keys():
+    assert soundex("Robert") == soundex("Rupert") == "R163"
+    assert metaphone("Knight") == "NT"
+    assert metaphone("Phonix") == "FNKS"
+
+
+def test_find_similar_reports_exact_spelling_and_phonetic_matches():
+    index = NameIndex()
+    index.add_many(["Lumora", "Vantiq", "Fonetix"], "thread-1")
+
+    exact = index.find_similar("lumora")
+    assert [(m.name, m.reason, m.distance) for m in exact] == [("Lumora", "exact", 0)]
+
+    spelling = index.find_similar("Vantik")
+    assert spelling[0].name == "Vantiq" and spelling[0].reason == "spelling" and spelling[0].distance == 1
+
+    phonetic = index.find_similar("Phonetics")
+    assert phonetic and phonetic[0].name == "Fonetix" and phonetic[0].reason == "phonetic"
+
+
+def test_find_similar_finds_two_edits_in_long_names_only():
+    index = NameIndex()
+    index.add_many(["Brightpath", "Nova"], "thread-1")
+    assert index.find_similar("Brightpatch")[0].distance == 1
+    assert index.find_similar("Brihtpatch")[0].distance == 2
+    # Short names are only matched within one edit
+    assert index.find_similar("Nuvi") == []
+
+
+def test_find_similar_excludes_the_current_source():
+    index = NameIndex()
+    index.add("Lumora", "thread-1")
+    assert index.find_similar("Lumora", exclude_source="thread-1") == []
+    index.add("Lumora", "favorites")
+    assert index.find_similar("Lumora", exclude_source="thread-1")[0].sources == ("favorites",)
+
+
+def test_index_evicts_oldest_names_beyond_its_bound():
+    index = NameIndex(max_names=2)
+    index.add_many(["Alphacore", "Betawave", "Gammaline"], "thread-1")
+    assert len(index) == 2
+    assert index.find_similar("Alphacore") == []
+    assert index.find_similar("Gammaline")[0].reason == "exact"
+
+
+def test_removing_the_last_source_drops_the_name():
+    index = NameIndex()
+    index.add("Lumora", "favorites")
+    index.add("Lumora", "thread-1")
+    index.remove("lumora", "favorites")
+    assert [m.sources for m in index.find_similar("Lumora")] == [("thread-1",)]
+
+    index.remove("Lumora", "thread-1")
+    assert len(index) == 0
+    assert index.find_similar("Lumora") == []
+    assert index.find_similar("Lumorra") == []
+    index.remove("Unknown", "thread-1")
+
+
+def test_closest_matches_merges_results_from_several_indexes():
+    generations, favorites = NameIndex(), NameIndex()
+    generations.add("Lumoraa", "thread-1")
+    favorites.add("Lumora", "favorites")
+    merged = closest_matches(generations.find_similar("Lumora") + favorites.find_similar("Lumora"), limit=1)
+    assert [(m.name, m.reason) for m in merged] == [("Lumora", "exact")]
@@ -0,0 +1,40 @@
+from mae_frontend import prompt_cache
+from mae_frontend.prompt_cache import PromptResultCache, normalize_prompt, prompt_cache_key
+
+
+def test_normalize_prompt_ignores_case_spacing_and_unicode_forms():
+    assert normalize_prompt("  A Global   FIRM ,\tfocused on ﬁntech ") == "a global firm, focused on fintech"
+
+
+def test_prompt_cache_key_depends_on_the_assistant():
+    assert prompt_cache_key("A firm", "assistant-1") == prompt_cache_key("a  FIRM", "assistant-1")
+    assert prompt_cache_key("A firm", "assistant-1") != prompt_cache_key("A firm", "assistant-2")
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prompt_cache.time, "time", lambda: now[0])
+    cache = PromptResultCache(ttl=60)
+    cache.put("key", "thread-1", name_count=12)
+    assert cache.get("key")["thread_id"] == "thread-1"
+
+    now[0] += 61
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PromptResultCache(max_entries=2)
+    cache.put("a", "thread-a")
+    cache.put("b", "thread-b")
+    cache.get("a")
+    cache.put("c", "thread-c")
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+
+
+def test_invalidate_removes_an_entry():
+    cache = PromptResultCache()
+    cache.put("a", "thread-a")
+    cache.invalidate("a")
+    assert cache.get("a") is None
@@ -0,0 +1,128 @@
+import pytest
+
+from mae_frontend import ratelimit
+from mae_frontend.ratelimit import RunAdmission, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", fake)
+    return fake
+
+
+def test_token_bucket_allows_a_burst_then_refills(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.wait_time() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    clock.now += 100
+    assert bucket.is_full()
+
+
+def test_token_bucket_acquire_gives_up_after_timeout(clock):
+    bucket = TokenBucket(rate=0.01, capacity=1)
+    assert bucket.acquire(timeout=1)
+    assert not bucket.acquire(timeout=1)
+
+
+def test_run_admission_enforces_the_session_budget(clock):
+    admission = RunAdmission(session_rate=1 / 60, session_burst=1, global_rate=10, global_burst=10)
+    first = admission.enqueue("a")
+    assert admission.poll(first)[0]
+
+    second = admission.enqueue("a")
+    admitted, position, wait = admission.poll(second)
+    assert not admitted and position == 1 and wait == pytest.approx(60)
+
+    clock.now += 60
+    assert admission.poll(second)[0]
+
+
+def test_run_admission_is_fifo_but_skips_sessions_over_budget(clock):
+    admission = RunAdmission(session_rate=1 / 3600, session_burst=1, global_rate=1 / 100, global_burst=1)
+    # Spend session a's only run and the only global token
+    assert admission.poll(admission.enqueue("a"))[0]
+
+    waiting_a = admission.enqueue("a")
+    waiting_b = admission.enqueue("b")
+    assert admission.poll(waiting_a)[:2] == (False, 1)
+    assert admission.poll(waiting_b)[:2] == (False, 2)
+
+    # Once a global token is back, b goes first: a is still over its own budget
+    clock.now += 100
+    assert not admission.poll(waiting_a)[0]
+    assert admission.poll(waiting_b)[0]
+
+
+def test_run_admission_respects_the_concurrency_cap(clock):
+    running = {"count": 1}
+    admission = RunAdmission(session_rate=10, session_burst=10, global_rate=10, global_burst=10,
+                             max_concurrent=1, active_runs=lambda: running["count"])
+    ticket = admission.enqueue("a")
+    assert not admission.poll(ticket)[0]
+    running["count"] = 0
+    assert admission.poll(ticket)[0]
+
+
+def test_run_budget_is_per_user_across_sessions(clock):
+    admission = RunAdmission(session_rate=1 / 3600, session_burst=1, global_rate=10, global_burst=10)
+    assert admission.poll(admission.enqueue("tab-1", "alice"))[0]
+
+    # A reload or a second tab is a new session for the same user
+    assert not admission.poll(admission.enqueue("tab-2", "alice"))[0]
+    assert admission.poll(admission.enqueue("tab-3", "bob"))[0]
+
+
+def test_wait_returns_queued_after_a_short_block_and_keeps_the_place(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda seconds: setattr(clock, "now", clock.now + seconds))
+    admission = RunAdmission(session_rate=1 / 60, session_burst=1, global_rate=10, global_burst=10,
+                             queue_timeout=100)
+    positions = []
+
+    def on_wait(position, eta):
+        positions.append(position)
+
+    assert admission.wait("s1", on_wait, user_id="alice") == ratelimit.ADMITTED
+    started = clock.now
+    assert admission.wait("s1", on_wait, user_id="alice", timeout=3) == ratelimit.QUEUED
+    assert clock.now - started == pytest.approx(3)
+    assert positions and set(positions) == {1}
+    ticket = admission.enqueue("s1")
+    assert ticket.user_id == "alice"
+
+    # The bucket refills after a minute, so a later rerun is admitted
+    clock.now += 60
+    assert admission.wait("s1", on_wait, user_id="alice") == ratelimit.ADMITTED
+
+
+def test_wait_gives_up_after_the_queue_timeout(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda seconds: setattr(clock, "now", clock.now + seconds))
+    admission = RunAdmission(session_rate=1 / 3600, session_burst=1, global_rate=10, global_burst=10,
+                             queue_timeout=10)
+
+    def on_wait(position, eta):
+        pass
+
+    assert admission.wait("s1", on_wait) == ratelimit.ADMITTED
+    assert admission.wait("s1", on_wait, timeout=3) == ratelimit.QUEUED
+    clock.now += 10
+    assert admission.wait("s1", on_wait, timeout=3) == ratelimit.EXPIRED
+    assert admission.enqueue("s1").enqueued_at == clock.now
+
+
+def test_withdraw_removes_the_sessions_ticket(clock):
+    admission = RunAdmission(session_rate=1 / 3600, session_burst=1, global_rate=10, global_burst=10)
+    first = admission.enqueue("s1")
+    admission.withdraw("s1")
+    assert admission.enqueue("s1") is not first
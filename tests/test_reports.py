@@ -0,0 +1,161 @@
+import os
+
+import pytest
+import requests
+
+from mae_frontend import reports
+from mae_frontend.reports import (
+    ReportDownloadError,
+    cached_report,
+    fetch_report,
+    is_api_url,
+    prune_report_cache,
+    read_report,
+    report_cache_path,
+    report_file_name,
+    store_report_content,
+    validate_report_size,
+)
+
+
+class FakeResponse:
+    def __init__(self, body=b"", headers=None, status_code=200):
+        self.body = body
+        self.headers = headers if headers is not None else {"Content-Length": str(len(body))}
+        self.status_code = status_code
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPORT_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Answer report downloads with the given response, recording the requests"""
+    sent = []
+
+    def respond(response):
+        def api_request(method, url, endpoint, **kwargs):
+            sent.append((url, kwargs))
+            return response
+        monkeypatch.setattr(reports, "api_request", api_request)
+        return sent
+    return respond
+
+
+def test_api_credentials_only_go_to_the_api_host():
+    assert is_api_url("https://api.host/reports/r.pdf", "https://api.host")
+    assert is_api_url("https://API.host/r.pdf", "https://api.host/")
+    assert not is_api_url("https://api.host.evil.com/r.pdf", "https://api.host")
+    assert not is_api_url("http://api.host/r.pdf", "https://api.host")
+    assert not is_api_url("https://api.host:8443/r.pdf", "https://api.host")
+    assert not is_api_url("https://api.host/r.pdf", None)
+
+
+def test_file_names_and_cache_paths_stay_inside_the_cache(cache_dir):
+    assert report_file_name("https://x/files/brand%20report.pdf?sig=1") == "brand_report.pdf"
+    assert report_file_name("https://x/") == "report.pdf"
+    path = report_cache_path("../../etc", "../passwd")
+    assert path.parent.parent == cache_dir
+
+
+def test_size_validation():
+    validate_report_size(100 * 1024, expected_size_kb=100.4)
+    with pytest.raises(ReportDownloadError):
+        validate_report_size(100 * 1024, expected_size_kb=150)
+    with pytest.raises(ReportDownloadError):
+        validate_report_size(11, max_bytes=10)
+    validate_report_size(10, expected_size_kb="unknown")
+
+
+def test_inline_reports_round_trip():
+    path = store_report_content("t1", "report.md", "# Report\n" * 1000, chunk_size=7)
+    assert cached_report("t1", "report.md") == path
+    assert read_report(path) == b"# Report\n" * 1000
+
+
+def test_fetch_streams_to_disk_once(serve):
+    body = b"%PDF" + b"x" * 200_000
+    sent = serve(FakeResponse(body))
+    path = fetch_report("https://api.host/r.pdf", "t1", headers={"X-Api-Key": "k"}, chunk_size=4096)
+    assert read_report(path) == body
+
+    # The second fetch is served from the cache
+    assert fetch_report("https://api.host/r.pdf", "t1") == path
+    assert len(sent) == 1
+
+
+def test_truncated_downloads_are_not_cached(serve):
+    serve(FakeResponse(b"x" * 10, headers={"Content-Length": "20"}))
+    with pytest.raises(ReportDownloadError, match="truncated"):
+        fetch_report("https://api.host/r.pdf", "t1")
+    assert cached_report("t1", "r.pdf") is None
+
+
+def test_oversized_downloads_are_stopped(serve, cache_dir):
+    serve(FakeResponse(b"x" * 100, headers={}))
+    with pytest.raises(ReportDownloadError, match="limit"):
+        fetch_report("https://api.host/r.pdf", "t1", max_bytes=50, chunk_size=10)
+    assert list(cache_dir.glob("*/*")) == []
+
+
+def test_http_errors_become_download_errors(serve):
+    serve(FakeResponse(status_code=404))
+    with pytest.raises(ReportDownloadError):
+        fetch_report("https://api.host/r.pdf", "t1")
+
+
+def _age(path, seconds):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_prune_removes_expired_reports_and_their_thread_folders(cache_dir):
+    old = store_report_content("t1", "old.pdf", b"x" * 10)
+    new = store_report_content("t2", "new.pdf", b"x" * 10)
+    _age(old, 3600)
+    assert prune_report_cache(max_bytes=1000, max_age=60) == 1
+    assert not old.exists() and not old.parent.exists()
+    assert new.exists()
+
+
+def test_prune_removes_least_recently_used_reports_over_the_size_limit():
+    paths = [store_report_content(f"t{i}", "r.pdf", b"x" * 100) for i in range(4)]
+    for age, path in zip([400, 300, 200, 100], paths):
+        _age(path, age)
+
+    # Serving a report marks it as recently used
+    cached_report("t0", "r.pdf")
+    assert prune_report_cache(max_bytes=250, max_age=3600) == 2
+    assert [path.exists() for path in paths] == [True, False, False, True]
+
+
+def test_prune_keeps_the_report_just_written():
+    path = store_report_content("t1", "big.pdf", b"x" * 100)
+    assert prune_report_cache(max_bytes=10, max_age=3600, keep=path) == 0
+    assert path.exists()
+
+
+def test_writes_prune_the_cache(monkeypatch):
+    monkeypatch.setattr(reports, "MAX_CACHE_BYTES", 150)
+    first = store_report_content("t1", "r.pdf", b"x" * 100)
+    _age(first, 10)
+    second = store_report_content("t2", "r.pdf", b"x" * 100)
+    assert not first.exists()
+    assert second.exists()
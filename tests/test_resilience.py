@@ -0,0 +1,143 @@
+import itertools
+
+import pytest
+import requests
+
+from mae_frontend import resilience
+from mae_frontend.resilience import (
+    STALE_RESPONSES,
+    CircuitBreaker,
+    CircuitOpenError,
+    StaleResponseCache,
+    backoff_delay,
+    get_breaker,
+    retry_after_seconds,
+    send_with_retries,
+)
+
+_endpoints = itertools.count()
+
+
+def make_response(status=200, body=b"{}", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def endpoint():
+    """A fresh endpoint name, so every test gets its own breaker"""
+    return f"/test/{next(_endpoints)}"
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+def test_backoff_delay_is_full_jitter_capped_at_max(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    assert backoff_delay(0, base=1, factor=2, max_delay=60) == 1
+    assert backoff_delay(3, base=1, factor=2, max_delay=60) == 8
+    assert backoff_delay(10, base=1, factor=2, max_delay=60) == 60
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert retry_after_seconds(make_response(headers={"Retry-After": "7"})) == 7
+    assert retry_after_seconds(make_response(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+    assert retry_after_seconds(make_response()) is None
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker("/breaker", failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # reset_timeout has passed: exactly one probe is let through
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_open_breaker_rejects_until_reset_timeout():
+    breaker = CircuitBreaker("/breaker", failure_threshold=1, reset_timeout=3600)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+
+def test_send_retries_transient_statuses_then_succeeds(endpoint):
+    responses = iter([make_response(503), make_response(502), make_response(200, b"ok")])
+    result = send_with_retries(lambda m, u, **kw: next(responses), "GET", "http://api/x", endpoint, max_retries=3)
+    assert result.status_code == 200 and result.content == b"ok"
+
+
+def test_send_raises_connection_errors_after_last_retry(endpoint):
+    attempts = []
+
+    def send(method, url, **kwargs):
+        attempts.append(url)
+        raise requests.ConnectionError("down")
+
+    with pytest.raises(requests.ConnectionError):
+        send_with_retries(send, "GET", "http://api/x", endpoint, max_retries=2)
+    assert len(attempts) == 3
+
+
+def test_open_circuit_serves_the_last_good_response(endpoint):
+    get_breaker(endpoint).failure_threshold = 1
+    url = f"http://api{endpoint}"
+    good = send_with_retries(lambda m, u, **kw: make_response(200, b"good"), "GET", url, endpoint,
+                             serve_stale=True)
+    assert not good.stale
+
+    def down(method, url, **kwargs):
+        raise requests.ConnectionError("down")
+
+    stale = send_with_retries(down, "GET", url, endpoint, max_retries=0, serve_stale=True)
+    assert stale.stale and stale.content == b"good"
+
+    with pytest.raises(CircuitOpenError):
+        send_with_retries(down, "GET", url + "/other", endpoint, serve_stale=True)
+
+
+def test_not_modified_does_not_replace_the_stale_response(endpoint):
+    url = f"http://api{endpoint}"
+    send_with_retries(lambda m, u, **kw: make_response(200, b"full"), "GET", url, endpoint, serve_stale=True)
+    send_with_retries(lambda m, u, **kw: make_response(304, b""), "GET", url, endpoint, serve_stale=True)
+    key = StaleResponseCache.key("GET", url, {})
+    assert STALE_RESPONSES.get(key).content == b"full"
+
+
+def test_unexpected_errors_release_the_half_open_probe(endpoint):
+    breaker = get_breaker(endpoint)
+    breaker.failure_threshold, breaker.reset_timeout = 1, 0
+    breaker.record_failure()
+
+    def broken(method, url, **kwargs):
+        raise ValueError("bug")
+
+    with pytest.raises(ValueError):
+        send_with_retries(broken, "GET", "http://api/x", endpoint)
+    assert breaker.allow()
+
+
+def test_stale_cache_is_bounded_by_bytes():
+    cache = StaleResponseCache(max_entries=10, max_bytes=100)
+    cache.put("a", make_response(body=b"a" * 60))
+    cache.put("b", make_response(body=b"b" * 60))
+    assert cache.get("a") is None and cache.get("b") is not None
+    assert cache.bytes == 60
+
+    cache.put("huge", make_response(body=b"h" * 101))
+    assert cache.get("huge") is None
@@ -0,0 +1,52 @@
+from mae_frontend.results_store import normalize_thread_results, to_number
+
+
+def test_to_number_reads_scores_given_as_text():
+    assert to_number("7/10") == 7.0
+    assert to_number("8.5") == 8.5
+    assert to_number(True) is None
+    assert to_number("n/a") is None
+
+
+def test_rows_combine_evaluations_translations_domains_and_surveys():
+    history = [{"values": {
+        "generated_names": [{"brand_name": "Lumora"}, {"brand_name": "Vantiq"}],
+        "evaluation_results": {
+            "Lumora": {"overall_score": "8", "memorability_score": 9, "shortlist_status": "Yes"},
+        },
+        "translation_analysis_results": {
+            "Lumora": {
+                "Spanish": {"target_language": "Spanish", "rank": 8, "adaptation_needed": False},
+                "German": {"target_language": "German", "rank": 6, "adaptation_needed": True},
+            },
+        },
+        "domain_analysis_results": [{"brand_name": "Lumora", "domain_exact_match": True, "acquisition_cost": "$10"}],
+        "survey_simulation_results": [{"brand_name": "Lumora", "individual_personas": [
+            {"personality_fit_score": 6}, {"personality_fit_score": 8},
+        ]}],
+    }}]
+
+    rows = {row["brand_name"]: row for row in normalize_thread_results("thread-1", history, "2024-01-01")}
+
+    lumora = rows["Lumora"]
+    assert lumora["thread_id"] == "thread-1" and lumora["created_at"] == "2024-01-01"
+    assert lumora["shortlisted"] is True
+    assert lumora["overall_score"] == 8.0 and lumora["memorability"] == 9.0
+    assert lumora["translation_viability"] == 7.0 and lumora["languages_needing_adaptation"] == 1
+    assert lumora["domain_exact_match"] is True and lumora["domain_acquisition_cost"] == "$10"
+    assert lumora["survey_personality_fit"] == 7.0 and lumora["survey_respondents"] == 2
+
+    # Generated but never evaluated
+    vantiq = rows["Vantiq"]
+    assert vantiq["overall_score"] is None and vantiq["shortlisted"] is False
+    assert vantiq["survey_respondents"] == 0
+
+
+def test_evaluations_given_as_a_list_are_keyed_by_name():
+    state = {"evaluation_results": [{"brand_name": "Lumora", "overall_score": 7}]}
+    rows = normalize_thread_results("thread-1", state)
+    assert [(row["brand_name"], row["overall_score"]) for row in rows] == [("Lumora", 7.0)]
+
+
+def test_a_thread_without_results_has_no_rows():
+    assert normalize_thread_results("thread-1", []) == []
@@ -0,0 +1,116 @@
+import pytest
+
+from mae_frontend import runs
+from mae_frontend.runs import ActiveRunRegistry, parse_stream_modes, run_id_from_response
+
+
+class FakeResponse:
+    def __init__(self, location=""):
+        self.headers = {"Content-Location": location}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def cancelled():
+    return []
+
+
+@pytest.fixture
+def registry(cancelled):
+    def cancel(thread_id, run_id):
+        cancelled.append((thread_id, run_id))
+        return True
+    return ActiveRunRegistry(cancel, run_timeout=60, grace=30)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(runs.time, "time", lambda: now[0])
+    return now
+
+
+def test_run_id_comes_from_content_location():
+    assert run_id_from_response(FakeResponse("/threads/t1/runs/r1")) == "r1"
+    assert run_id_from_response(FakeResponse("/threads/t1/runs/stream")) is None
+    assert run_id_from_response(None) is None
+
+
+def test_stream_modes_drop_unknown_values_and_duplicates():
+    assert parse_stream_modes("values, updates,values,bogus") == ["values", "updates"]
+    assert parse_stream_modes("") == ["updates"]
+
+
+def test_register_update_and_unregister(registry, cancelled):
+    registry.register("s1", "t1")
+    registry.update("s1", run_id="r1")
+    assert registry.get("s1")["run_id"] == "r1"
+    assert registry.active_count() == 1
+
+    registry.unregister("s1")
+    assert registry.get("s1") is None
+    assert cancelled == []
+
+
+def test_cancel_closes_the_stream_and_cancels_the_run(registry, cancelled):
+    response = FakeResponse()
+    registry.register("s1", "t1", "r1", response)
+    assert registry.cancel("s1")
+    assert response.closed
+    assert cancelled == [("t1", "r1")]
+
+    # Nothing left to cancel
+    assert not registry.cancel("s1")
+    assert cancelled == [("t1", "r1")]
+
+
+def test_reap_cancels_runs_of_sessions_gone_past_the_grace_period(registry, cancelled, clock):
+    registry.register("gone", "t1", "r1")
+    registry.register("here", "t2", "r2")
+
+    def is_active(session_id):
+        return session_id == "here"
+
+    assert registry.reap(is_active) == 0
+    clock[0] += 29
+    assert registry.reap(is_active) == 0
+    clock[0] += 1
+    assert registry.reap(is_active) == 1
+    assert cancelled == [("t1", "r1")]
+    assert registry.get("here") is not None
+
+
+def test_a_session_that_reconnects_within_the_grace_period_keeps_its_run(registry, cancelled, clock):
+    registry.register("s1", "t1", "r1")
+    registry.reap(lambda session_id: False)
+    clock[0] += 20
+    registry.reap(lambda session_id: True)
+    clock[0] += 20
+    assert registry.reap(lambda session_id: False) == 0
+    assert cancelled == []
+
+
+def test_reap_cancels_runs_past_the_run_timeout(registry, cancelled, clock):
+    registry.register("s1", "t1", "r1")
+    clock[0] += 61
+    assert registry.reap(lambda session_id: True) == 1
+    assert cancelled == [("t1", "r1")]
+
+
+def test_reload_then_reap_keeps_the_resumed_run(registry, cancelled, clock):
+    old_stream = FakeResponse()
+    registry.register("before-reload", "t1", "r1", old_stream)
+
+    # The reloaded page resumes the run under a new session ID
+    registry.register("after-reload", "t1", "r1", FakeResponse())
+    assert registry.get("before-reload") is None
+    assert registry.active_count() == 1
+
+    clock[0] += 45
+    assert registry.reap(lambda session_id: session_id == "after-reload") == 0
+    assert cancelled == []
+    assert not old_stream.closed
+    assert registry.get("after-reload")["run_id"] == "r1"
@@ -0,0 +1,92 @@
+import pytest
+
+from mae_frontend.timeline import NodeTimeline, TimelineStore, extract_token_count
+
+
+@pytest.fixture
+def timeline():
+    return NodeTimeline(started_at=100.0)
+
+
+def test_token_counts_come_from_usage_metadata_and_update_messages():
+    assert extract_token_count({"usage_metadata": {"input_tokens": 3, "output_tokens": 4}}) == 7
+    assert extract_token_count({"response_metadata": {"token_usage": {"total_tokens": 12}}}) == 12
+    update = {"messages": [{"content": "hi", "usage_metadata": {"total_tokens": 5}},
+                           {"content": "there", "usage_metadata": {"total_tokens": 6}}]}
+    assert extract_token_count(update) == 11
+    assert extract_token_count({"brand_names": ["Acme"]}) == 0
+
+
+def test_debug_task_events_give_exact_spans(timeline):
+    timeline.node_started("survey", step=2, at=101.0)
+    timeline.node_started("seo", step=2, at=101.0)
+    timeline.node_finished("seo", step=2, at=103.0)
+    timeline.node_finished("survey", step=2, at=106.0)
+
+    rows = {row["node"]: row for row in timeline.rows()}
+    assert rows["survey"]["duration"] == 5.0
+    assert rows["seo"]["duration"] == 2.0
+    assert {row["timing"] for row in rows.values()} == {"exact"}
+    assert not timeline.approximate
+
+
+def test_update_only_spans_are_approximate(timeline):
+    timeline.node_finished("brief", at=102.0)
+    timeline.node_finished("names", at=105.0)
+
+    rows = timeline.rows()
+    assert [(row["node"], row["start"], row["end"]) for row in rows] == [("brief", 0.0, 2.0), ("names", 2.0, 5.0)]
+    assert {row["timing"] for row in rows} == {"approximate"}
+    assert timeline.approximate
+    assert {entry["node"]: entry["timing"] for entry in timeline.summary()} == {
+        "brief": "approximate", "names": "approximate"}
+
+
+def test_tokens_from_message_events_are_not_counted_again_by_the_update(timeline):
+    timeline.node_progress("names", tokens=40, at=101.0)
+    assert timeline.node_finished("names", tokens=40, at=102.0) == 0
+    assert timeline.node_finished("seo", tokens=15, at=103.0) == 15
+    assert {row["node"]: row["tokens"] for row in timeline.rows()} == {"names": 40, "seo": 15}
+
+
+def test_close_ends_open_spans_at_the_next_node_or_the_end(timeline):
+    timeline.node_progress("brief", at=101.0)
+    timeline.node_progress("names", at=103.0)
+    timeline.close(at=108.0)
+    assert [(row["node"], row["end"]) for row in timeline.rows()] == [("brief", 3.0), ("names", 8.0)]
+
+
+def test_summary_orders_nodes_by_total_duration(timeline):
+    timeline.node_started("a", at=100.0)
+    timeline.node_finished("a", at=101.0)
+    timeline.node_started("b", at=101.0)
+    timeline.node_finished("b", at=104.0)
+    summary = timeline.summary()
+    assert [entry["node"] for entry in summary] == ["b", "a"]
+    assert [entry["share"] for entry in summary] == [75.0, 25.0]
+
+
+def test_store_keeps_the_most_recent_threads(timeline):
+    store = TimelineStore(max_threads=2)
+    for thread_id in ("t1", "t2", "t3"):
+        store.put(thread_id, NodeTimeline())
+    assert store.get("t1") is None
+    assert store.get("t3") is not None
+
+
+def test_store_saves_timelines_and_loads_them_after_a_restart(timeline):
+    saved = {}
+    timeline.node_started("names", step=1, at=101.0)
+    timeline.node_finished("names", step=1, tokens=9, at=104.0)
+
+    store = TimelineStore(load=saved.get, save=saved.__setitem__)
+    store.put("t1", timeline)
+    store.save("t1")
+    store.save("missing")
+    assert list(saved) == ["t1"]
+
+    restarted = TimelineStore(load=saved.get, save=saved.__setitem__)
+    loaded = restarted.get("t1")
+    assert loaded.rows() == timeline.rows()
+    assert restarted.get("t1") is loaded
+    assert restarted.get("t2") is None